@@ -0,0 +1,443 @@
+"""
+General performance tests for the TinyTroupe library. These are micro-benchmarks of the simulation machinery itself,
+so they do not require LLM calls.
+"""
+
+import pytest
+import time
+import copy
+import json
+import os
+import gc
+import tracemalloc
+import pandas as pd
+
+import logging
+logger = logging.getLogger("tinytroupe")
+
+import sys
+sys.path.append('../../tinytroupe/')
+sys.path.append('../../')
+sys.path.append('..')
+
+import tinytroupe
+import tinytroupe.utils
+from tinytroupe.agent import TinyPerson, EpisodicMemory, EpisodicMemoryEntry
+from tinytroupe import control
+from tinytroupe.control import Simulation, Transaction
+from tinytroupe.extraction import ResultsReducer
+
+from testing_utils import *
+
+def aux_time_calls(func, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n
+
+def aux_time_without_gc(func):
+    """
+    Times a single call, with the garbage collector paused (as timeit does), since otherwise its pauses 
+    dominate measurements that allocate many objects.
+    """
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        result = func()
+        return time.perf_counter() - start, result
+    finally:
+        gc.enable()
+
+def test_transactional_overhead(setup):
+    """
+    Measures the per-call overhead of @transactional methods outside of any simulation and for reentrant calls,
+    which should not pay for event hashing, state encoding or log formatting.
+    """
+    n = 20000
+
+    agent = TinyPerson("Benchmark Agent")
+    raw_pop_latest_actions = TinyPerson.pop_latest_actions.__wrapped__
+
+    def aux_unguarded_full_path():
+        # what every call used to cost when no simulation was running
+        obj_sim_id = agent.simulation_id if hasattr(agent, 'simulation_id') else None
+        logger.debug(f"Transaction: pop_latest_actions with args {()} and kwargs {{}} under simulation {obj_sim_id}.")
+        return Transaction(agent, None, raw_pop_latest_actions, agent).execute()
+
+    raw_time = aux_time_calls(lambda: raw_pop_latest_actions(agent), n)
+    full_path_time = aux_time_calls(aux_unguarded_full_path, n)
+    fast_path_time = aux_time_calls(agent.pop_latest_actions, n)
+
+    print(f"Raw call: {raw_time * 1e6:.2f} us | full path: {full_path_time * 1e6:.2f} us | fast path: {fast_path_time * 1e6:.2f} us")
+    assert fast_path_time < full_path_time, "Calls outside a simulation should skip the transaction machinery."
+
+    # reentrant calls inside a started simulation
+    cache_path = get_relative_to_test_path("performance_test.cache.json")
+    remove_file_if_exists(cache_path)
+
+    control.reset()
+    control.begin(cache_path=cache_path)
+    agent.define("age", 30) # captures the agent in the simulation
+
+    simulation = control.current_simulation()
+    simulation.begin_transaction()
+    try:
+        reentrant_time = aux_time_calls(agent.pop_latest_actions, n)
+    finally:
+        simulation.end_transaction()
+    control.end()
+    control.reset()
+    remove_file_if_exists(cache_path)
+
+    print(f"Reentrant call: {reentrant_time * 1e6:.2f} us")
+    assert reentrant_time < full_path_time, "Reentrant calls should skip the transaction machinery."
+
+def test_complete_state_encoding_with_long_memory(setup):
+    """
+    Measures the cost of snapshotting and restoring an agent with thousands of memory entries, as done by 
+    the simulation cache at every transaction.
+    """
+    n_entries = 5000
+    n_snapshots = 10
+
+    agent = TinyPerson("Benchmark Agent With Memory")
+    for i in range(n_entries):
+        agent.episodic_memory.store({'role': 'user', 
+                                     'content': {'stimuli': [{'type': 'CONVERSATION', 'content': f"Message number {i}.", 'source': "Someone"}]}, 
+                                     'simulation_timestamp': None})
+    
+    def aux_deepcopy_encode():
+        # the previous encoding, which copied everything twice
+        to_copy = copy.copy(agent.__dict__)
+        del to_copy["environment"]
+        del to_copy["_mental_faculties"]
+        to_copy["_accessible_agents"] = [a.name for a in agent._accessible_agents.values()]
+        to_copy['episodic_memory'] = agent.episodic_memory.to_json()
+        to_copy['semantic_memory'] = agent.semantic_memory.to_json()
+        to_copy["_mental_faculties"] = [faculty.to_json() for faculty in agent._mental_faculties]
+        return copy.deepcopy(to_copy)
+
+    def aux_snapshots(encode):
+        # a snapshot per transaction, each adding a new memory entry
+        start = time.perf_counter()
+        for i in range(n_snapshots):
+            agent.episodic_memory.store({'role': 'assistant', 'content': {'action': {'type': 'THINK', 'content': f"Thought {i}."}}, 'simulation_timestamp': None})
+            state = encode()
+        return (time.perf_counter() - start) / n_snapshots, state
+
+    deepcopy_encode_time, _ = aux_snapshots(aux_deepcopy_encode)
+    encode_time, state = aux_snapshots(agent.encode_complete_state)
+
+    def aux_deepcopy_decode():
+        copy.deepcopy(state) # the previous decoding began with this, before copying everything once more
+        agent.episodic_memory = EpisodicMemory.from_json(state['episodic_memory'])
+
+    deepcopy_decode_time, _ = aux_time_without_gc(aux_deepcopy_decode)
+    decode_time, _ = aux_time_without_gc(lambda: agent.decode_complete_state(state))
+
+    print(f"Encoding: {deepcopy_encode_time * 1e3:.2f} ms (deepcopy) vs {encode_time * 1e3:.2f} ms | "
+          f"Decoding: {deepcopy_decode_time * 1e3:.2f} ms (deepcopy) vs {decode_time * 1e3:.2f} ms")
+
+    assert len(agent.episodic_memory.retrieve_all()) == n_entries + 2 * n_snapshots
+    assert encode_time < deepcopy_encode_time
+    assert decode_time < deepcopy_decode_time
+
+def aux_long_trace_simulation(n_nodes):
+    """
+    Creates a simulation with a long trace, whose states have agents with growing memories.
+    """
+    simulation = Simulation()
+
+    memory = []
+    for i in range(n_nodes):
+        memory.append({'role': 'user', 'content': {'stimuli': [{'type': 'CONVERSATION', 'content': f"Message number {i}. " * 5, 'source': "Someone"}]}, 
+                       'simulation_timestamp': None})
+        state = {"agents": [{"name": f"Agent {j}", "episodic_memory": {"memory": list(memory)}} for j in range(3)], 
+                 "environments": [], "factories": []}
+        simulation._add_to_cache_trace(state, f"event_{i}", None)
+        simulation._add_to_execution_trace(state, f"event_{i}", None)
+    
+    return simulation
+
+def test_cache_file_save_and_load(setup):
+    """
+    Measures how long it takes to save and load a large simulation cache file, comparing the standard library
+    with the serialization backend in use (see `utils.write_serialized_file`).
+    """
+    simulation = aux_long_trace_simulation(200)
+    
+    json_path = get_relative_to_test_path("performance_test_stdlib.cache.json")
+    cache_path = get_relative_to_test_path("performance_test.cache.json")
+
+    start = time.perf_counter()
+    with open(json_path, "w") as f:
+        json.dump(list(simulation.cached_trace.values()), f, indent=4)
+    with open(json_path, "r") as f:
+        json.load(f)
+    stdlib_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    simulation._save_cache_file(cache_path)
+    simulation._load_cache_file(cache_path)
+    backend_time = time.perf_counter() - start
+
+    print(f"Cache file of {os.path.getsize(cache_path) / 1e6:.1f} MB: {stdlib_time:.2f} s (stdlib json, indented) vs "
+          f"{backend_time:.2f} s ({tinytroupe.utils.json_backend()})")
+
+    assert len(simulation.cached_trace) == 200
+    assert backend_time < stdlib_time
+
+    remove_file_if_exists(json_path)
+    remove_file_if_exists(cache_path)
+
+def test_indexed_trace_file_loading(setup):
+    """
+    Measures how long it takes to load a large cache file, and to resume from its last state, for a regular JSON cache
+    file and for an indexed trace file, whose states are only parsed when needed.
+    """
+    simulation = aux_long_trace_simulation(200)
+
+    timings = {}
+    for cache_file_name in ["performance_test.cache.json", "performance_test.cache.trace"]:
+        cache_path = get_relative_to_test_path(cache_file_name)
+        simulation._save_cache_file(cache_path)
+
+        loaded = Simulation()
+        start = time.perf_counter()
+        loaded._load_cache_file(cache_path)
+        load_time = time.perf_counter() - start
+
+        last_node = next(reversed(loaded.cached_trace.values()))
+        assert len(Simulation._node_state(last_node)["agents"][0]["episodic_memory"]["memory"]) == 200
+        resume_time = time.perf_counter() - start
+
+        timings[cache_file_name] = (load_time, resume_time)
+        print(f"{cache_file_name} ({os.path.getsize(cache_path) / 1e6:.1f} MB): loaded in {load_time * 1e3:.1f} ms, "
+              f"last state available in {resume_time * 1e3:.1f} ms")
+        
+        loaded._close_trace_file()
+        remove_file_if_exists(cache_path)
+    
+    assert timings["performance_test.cache.trace"][0] < timings["performance_test.cache.json"][0]
+
+def test_episodic_memory_serialization(setup):
+    """
+    Measures the serialization of a large episodic memory with to_json/from_json, against a plain deep copy of 
+    its values as dicts, which is what serialization used to cost at the very least. Memory entries themselves are 
+    read-only, so they are not copied at all.
+    """
+    n_entries = 20000
+
+    messages = [{'role': 'assistant', 
+                 'content': {'action': {'type': 'TALK', 'content': f"Answer number {i}.", 'target': "Someone"}, 
+                             'cognitive_state': {'goals': "Answer.", 'attention': "The question.", 'emotions': "Calm."}}, 
+                 'simulation_timestamp': "2024-01-01T10:00:00"} for i in range(n_entries)]
+    memory = EpisodicMemory()
+    for message in messages:
+        memory.store(message)
+
+    deepcopy_time, _ = aux_time_without_gc(lambda: copy.deepcopy(messages))
+    to_json_time, json_dict = aux_time_without_gc(memory.to_json)
+    from_json_time, loaded = aux_time_without_gc(lambda: EpisodicMemory.from_json(json_dict))
+
+    print(f"{n_entries} entries: deepcopy {deepcopy_time * 1e3:.1f} ms | to_json {to_json_time * 1e3:.1f} ms | from_json {from_json_time * 1e3:.1f} ms")
+
+    assert loaded.retrieve_all() == memory.retrieve_all()
+    assert to_json_time < deepcopy_time
+    assert from_json_time < deepcopy_time
+
+def test_episodic_memory_entries_footprint(setup):
+    """
+    Measures the memory taken by episodic memory entries, against the plain dicts they replace.
+    """
+    n_entries = 20000
+
+    def aux_message(i):
+        # strings are built at runtime, as they would be when parsed from LLM outputs
+        return {'role': "".join(['us', 'er']), 
+                'content': {'stimuli': [{'type': "".join(['CONVER', 'SATION']), 'content': f"Message number {i}.", 'source': "".join(['Some', 'one'])}]}, 
+                'simulation_timestamp': "".join(['2024-01-01', 'T10:00:00'])}
+
+    def aux_footprint(store):
+        tracemalloc.start()
+        values = [store(aux_message(i)) for i in range(n_entries)]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size, values
+    
+    dicts_size, _ = aux_footprint(lambda message: message)
+    entries_size, entries = aux_footprint(EpisodicMemoryEntry.from_value)
+
+    print(f"{n_entries} messages: {dicts_size / 1e6:.1f} MB as dicts vs {entries_size / 1e6:.1f} MB as entries")
+    assert all(isinstance(entry, EpisodicMemoryEntry) for entry in entries)
+    assert entries_size < dicts_size
+
+def test_population_reduction(setup):
+    """
+    Measures the reduction of the conversations of many agents, one agent at a time with a per-event rule, against
+    a single vectorized rule over the whole population.
+    """
+    n_agents = 200
+    n_messages = 100
+
+    agents = [TinyPerson(f"Reduction Benchmark Agent {i}") for i in range(n_agents)]
+    for i, agent in enumerate(agents):
+        other = agents[(i + 1) % n_agents].name
+        for j in range(n_messages):
+            agent.episodic_memory.store({'role': 'user', 'content': {'stimuli': [{'type': 'CONVERSATION', 'content': f"Message {j}.", 'source': other}]}, 
+                                         'simulation_timestamp': None})
+    
+    reducer = ResultsReducer()
+    reducer.add_reduction_rule("CONVERSATION", lambda focus_agent, source_agent, target_agent, kind, event, content, timestamp: (source_agent.name, content))
+    
+    vectorized_reducer = ResultsReducer()
+    vectorized_reducer.add_vectorized_reduction_rule("CONVERSATION", lambda df: df[["source", "content"]])
+
+    per_agent_time, per_agent = aux_time_without_gc(lambda: pd.concat([reducer.reduce_agent_to_dataframe(agent) for agent in agents]))
+    population_time, population = aux_time_without_gc(lambda: vectorized_reducer.reduce_population(agents))
+
+    print(f"{n_agents * n_messages} interactions: per agent {per_agent_time * 1e3:.1f} ms | vectorized population {population_time * 1e3:.1f} ms")
+    assert len(per_agent) == len(population) == n_agents * n_messages
+    assert population_time < per_agent_time
+
+def test_bulk_agent_definition(setup):
+    """
+    Measures the construction of agents with a rich configuration, defining each value separately (which re-renders the 
+    prompt every time) against defining all values at once.
+    """
+    n_agents = 20
+    configuration = {"age": 35, "nationality": "Brazilian", "occupation": "Physician",
+                     "occupation_description": "You are a physician. " * 20,
+                     "personality_traits": [{"trait": f"Trait {i}."} for i in range(10)],
+                     "professional_interests": [{"interest": f"Interest {i}."} for i in range(10)],
+                     "skills": [{"skill": f"Skill {i}."} for i in range(10)]}
+
+    def aux_define_one_by_one(i):
+        agent = TinyPerson(f"One by One Agent {i}")
+        for key, value in configuration.items():
+            if isinstance(value, list):
+                agent.define_several(key, value)
+            else:
+                agent.define(key, value)
+        return agent
+
+    one_by_one_time, _ = aux_time_without_gc(lambda: [aux_define_one_by_one(i) for i in range(n_agents)])
+    bulk_time, agents = aux_time_without_gc(lambda: [TinyPerson.from_configuration(f"Bulk Agent {i}", configuration) for i in range(n_agents)])
+
+    print(f"{n_agents} agents: one by one {one_by_one_time * 1e3:.1f} ms | bulk {bulk_time * 1e3:.1f} ms")
+    assert all(len(agent._configuration["skills"]) == 10 for agent in agents)
+    assert bulk_time < one_by_one_time
+
+def test_world_membership_and_registry_scopes(setup):
+    """
+    Measures adding and removing many agents to and from a world, and checks that worlds built and dropped repeatedly 
+    within registry scopes do not accumulate in the global registries.
+    """
+    from tinytroupe.environment import TinyWorld
+
+    n_agents = 500
+    agents = [TinyPerson(f"Member {i}") for i in range(n_agents)]
+    world = TinyWorld("Crowded world", [])
+
+    add_time, _ = aux_time_without_gc(lambda: world.add_agents(agents))
+    remove_time, _ = aux_time_without_gc(lambda: [world.remove_agent(agent) for agent in agents[::-1]])
+    print(f"{n_agents} agents: add {add_time * 1e3:.1f} ms | remove {remove_time * 1e3:.1f} ms")
+    assert len(world.agents) == 0
+
+    n_registered_agents, n_registered_environments = len(TinyPerson.all_agents), len(TinyWorld.all_environments)
+    for round in range(5):
+        with control.registry_scope():
+            TinyWorld(f"Temporary world {round}", [TinyPerson(f"Temporary {round} {i}") for i in range(20)])
+
+    assert len(TinyPerson.all_agents) == n_registered_agents
+    assert len(TinyWorld.all_environments) == n_registered_environments
+
+def test_make_everyone_accessible(setup):
+    """
+    Measures making everyone accessible in a world with hundreds of agents, against making each pair accessible 
+    separately (as done before bulk operations existed).
+    """
+    from tinytroupe.environment import TinyWorld
+
+    n_agents = 200
+    world = TinyWorld("Crowded accessible world", [TinyPerson(f"Accessible {i}") for i in range(n_agents)])
+
+    def aux_pairwise():
+        for agent_1 in world.agents:
+            for agent_2 in world.agents:
+                if agent_1 is not agent_2:
+                    agent_1.make_agent_accessible(agent_2)
+
+    pairwise_time, _ = aux_time_without_gc(aux_pairwise)
+    for agent in world.agents:
+        agent.make_all_agents_inaccessible()
+    bulk_time, _ = aux_time_without_gc(world.make_everyone_accessible)
+
+    print(f"{n_agents} agents: pairwise {pairwise_time * 1e3:.1f} ms | bulk {bulk_time * 1e3:.1f} ms")
+    assert all(len(agent.accessible_agents) == n_agents - 1 for agent in world.agents)
+    assert bulk_time < pairwise_time
+
+def test_social_network_steps_with_many_relations(setup):
+    """
+    Measures the accessibility updates done at each step of a social network with many relations. Only the first
+    update, which follows the creation of all relations, should depend on the number of relations.
+    """
+    from tinytroupe.environment import TinySocialNetwork
+
+    n_agents = 200
+    agents = [TinyPerson(f"Related {i}") for i in range(n_agents)]
+    network = TinySocialNetwork("Dense network")
+
+    relations_time, _ = aux_time_without_gc(lambda: [network.add_relation(agents[i], agents[j], f"relation {(i + j) % 3}") 
+                                                     for i in range(n_agents) for j in range(i + 1, n_agents, 4)])
+    first_update_time, _ = aux_time_without_gc(network._update_agents_contexts)
+    update_time = aux_time_calls(network._update_agents_contexts, 100)
+
+    print(f"{n_agents} agents: add relations {relations_time * 1e3:.1f} ms | first update {first_update_time * 1e3:.1f} ms | later updates {update_time * 1e6:.1f} us")
+    assert all(len(agent.accessible_agents) > 0 for agent in agents)
+    assert update_time * 100 < first_update_time
+
+def test_broadcast_to_many_agents(setup):
+    """
+    Measures broadcasting to hundreds of agents, against having each of them listen to the same speech separately 
+    (as done before broadcasts shared their stimuli).
+    """
+    from tinytroupe.environment import TinyWorld
+
+    n_agents = 300
+    world = TinyWorld("Broadcast world", [TinyPerson(f"Listener {i}") for i in range(n_agents)])
+    speech = "Please gather in the main hall, the meeting is about to start. " * 5
+
+    separate_time, _ = aux_time_without_gc(lambda: [agent.listen(speech) for agent in world.agents])
+    broadcast_time, _ = aux_time_without_gc(lambda: world.broadcast(speech))
+
+    print(f"{n_agents} agents: separate listens {separate_time * 1e3:.1f} ms | broadcast {broadcast_time * 1e3:.1f} ms")
+    assert all(agent.episodic_memory.count() == 2 for agent in world.agents)
+    assert broadcast_time < separate_time
+
+def test_interaction_log_snapshots(setup):
+    """
+    Measures encoding snapshots of a long interaction log, each after a new interaction, as done by the simulation at 
+    every transaction. Only new rows should be encoded each time.
+    """
+    from tinytroupe.environment import InteractionLog
+
+    n_rows = 20000
+    n_snapshots = 10
+
+    log = InteractionLog()
+    for i in range(n_rows):
+        log.append(f"Agent {i % 10}", "stimulus", "CONVERSATION", "Someone", f"Agent {i % 10}", f"Message number {i}.", None)
+
+    first_time, _ = aux_time_without_gc(log.encode_complete_state)
+
+    def aux_snapshots():
+        for i in range(n_snapshots):
+            log.append("Agent 0", "action", "THINK", "Agent 0", None, f"Thought {i}.", None)
+            log.encode_complete_state()
+
+    snapshots_time, _ = aux_time_without_gc(aux_snapshots)
+
+    print(f"{n_rows} rows: first encoding {first_time * 1e3:.1f} ms | later encodings {snapshots_time / n_snapshots * 1e3:.2f} ms each")
+    assert snapshots_time / n_snapshots < first_time / 5
@@ -21,6 +21,7 @@ import logging
 logger = logging.getLogger("tinytroupe")
 
 import importlib
+from datetime import timedelta
 
 from testing_utils import *
 
@@ -149,3 +150,153 @@ def test_begin_checkpoint_end_with_factory(setup):
 
     assert age_1 == age_2, "The age should be the same in both simulations."
     assert nationality_1 == nationality_2, "The nationality should be the same in both simulations."
+
+def test_function_call_hash(setup):
+    simulation = Simulation()
+
+    agent_1 = TinyPerson("Hash Tester")
+    long_speech = "Hello there! " * 1000
+
+    hash_1 = simulation._function_call_hash("listen", agent_1, long_speech, source=None)
+    hash_2 = simulation._function_call_hash("listen", agent_1, long_speech, source=None)
+    hash_3 = simulation._function_call_hash("listen", agent_1, long_speech + "!", source=None)
+
+    assert hash_1 == hash_2, "The same function call should always have the same hash."
+    assert hash_1 != hash_3, "Different function calls should have different hashes."
+    assert len(hash_1) == 64, "Only a compact digest should be stored, regardless of the size of the arguments."
+
+    # agents are identified by name, so changes to their internal state do not change the hash
+    agent_1.define("age", 42)
+    assert hash_1 == simulation._function_call_hash("listen", agent_1, long_speech, source=None), \
+        "Agents should be identified by name only."
+
+def test_cached_trace_hash_chain(setup):
+    simulation = Simulation()
+
+    simulation._add_to_cache_trace({"agents": []}, "event_1", {"type": "JSON", "value": 1})
+    simulation._add_to_execution_trace({"agents": []}, "event_1", {"type": "JSON", "value": 1})
+    simulation._add_to_cache_trace({"agents": []}, "event_2", None)
+
+    nodes = list(simulation.cached_trace.values())
+    assert nodes[0][0] is None, "The first node should not have a previous node hash."
+    assert nodes[1][0] == simulation._node_hash(nodes[0]), "Nodes should be chained by hash."
+
+    # replaying the same events against the cache must match the chain
+    replay = Simulation(cached_trace=nodes)
+    assert replay._is_transaction_event_cached("event_1"), "The first event should be cached."
+    replay._skip_execution_with_cache("event_1")
+    assert replay._is_transaction_event_cached("event_2"), "The second event should be cached, since the chain matches."
+    assert not replay._is_transaction_event_cached("event_3"), "A different event should not be cached."
+
+    # a tampered chain must not be used
+    tampered_nodes = list(nodes)
+    tampered_nodes[1] = ("wrong hash",) + tuple(tampered_nodes[1][1:])
+    tampered = Simulation(cached_trace=tampered_nodes)
+    tampered._skip_execution_with_cache("event_1")
+    assert not tampered._is_transaction_event_cached("event_2"), "A broken chain should not be considered cached."
+
+def aux_execute_events(simulation, events):
+    """
+    Executes the given events against the simulation cache, as top-level transactions would.
+    """
+    computed = 0
+    for event in events:
+        if simulation._is_transaction_event_cached(event):
+            simulation._skip_execution_with_cache(event)
+        else:
+            simulation._add_to_cache_trace({"agents": []}, event, None)
+            simulation._add_to_execution_trace({"agents": []}, event, None)
+            computed += 1
+    
+    return computed
+
+def test_cached_trace_branches(setup):
+    simulation = Simulation()
+    assert aux_execute_events(simulation, ["start", "variant_a", "end"]) == 3
+
+    # diverging from the cached branch keeps it
+    simulation = Simulation(cached_trace=list(simulation.cached_trace.values()))
+    assert aux_execute_events(simulation, ["start", "variant_b", "end"]) == 2, "Only the divergent suffix should be computed."
+    assert len(simulation.cached_trace) == 5, "Both branches should be cached."
+
+    # so both variants can now be replayed without any computation
+    for variant in ["variant_a", "variant_b"]:
+        replay = Simulation(cached_trace=list(simulation.cached_trace.values()))
+        assert aux_execute_events(replay, ["start", variant, "end"]) == 0, f"The {variant} branch should be fully cached."
+
+def test_cached_trace_eviction(setup):
+    simulation = Simulation()
+    aux_execute_events(simulation, ["start", "variant_a", "end"])
+
+    simulation = Simulation(cached_trace=list(simulation.cached_trace.values()), max_cached_nodes=3)
+    aux_execute_events(simulation, ["start", "variant_b", "end"])
+
+    assert len(simulation.cached_trace) == 3, "The least recently used branch should have been evicted."
+
+    replay = Simulation(cached_trace=list(simulation.cached_trace.values()))
+    assert aux_execute_events(replay, ["start", "variant_b", "end"]) == 0, "The most recent branch should be kept."
+
+def test_simulation_state_encodes_each_agent_once(setup):
+    control.reset()
+    control.begin(cache_path=get_relative_to_test_path("control_test_state.cache.json"))
+
+    agent_1 = TinyPerson("State Tester 1")
+    agent_2 = TinyPerson("State Tester 2")
+    world = TinyWorld("State Test World", [agent_1, agent_2])
+    world.make_everyone_accessible()
+    world.skip(1, timedelta_per_step=timedelta(minutes=1)) # captures the world in the simulation
+    agent_1.define("age", 33)
+
+    simulation = control.current_simulation()
+    state = simulation._encode_simulation_state()
+
+    assert sorted(agent_state["name"] for agent_state in state["agents"]) == ["State Tester 1", "State Tester 2"], \
+        "Each agent should be encoded exactly once."
+    assert state["environments"][0]["agents"] == ["State Tester 1", "State Tester 2"], "Environments should reference agents by name."
+
+    # changes are undone by decoding the snapshot
+    agent_1.define("age", 90)
+    world.remove_agent(agent_2)
+    simulation._decode_simulation_state(state)
+
+    assert agent_1.get("age") == 33
+    assert world.get_agent_by_name("State Tester 2") is agent_2
+    assert agent_2.environment is world
+
+    control.end()
+    control.reset()
+    remove_file_if_exists(get_relative_to_test_path("control_test_state.cache.json"))
+
+def test_indexed_trace_file(setup):
+    cache_path = get_relative_to_test_path("control_test_indexed.cache.trace")
+    remove_file_if_exists(cache_path)
+
+    simulation = Simulation()
+    for i in range(3):
+        state = {"agents": [{"name": "Indexed Tester", "step": i}], "environments": [], "factories": []}
+        simulation._add_to_cache_trace(state, f"event_{i}", {"type": "JSON", "value": i})
+        simulation._add_to_execution_trace(state, f"event_{i}", {"type": "JSON", "value": i})
+    simulation._save_cache_file(cache_path)
+
+    # states are only read when needed
+    loaded = Simulation()
+    loaded._load_cache_file(cache_path)
+    nodes = list(loaded.cached_trace.values())
+    assert all(isinstance(node[3], control.LazyTraceState) for node in nodes), "States should be lazily loaded."
+    assert [Simulation._node_state(node)["agents"][0]["step"] for node in nodes] == [0, 1, 2]
+    assert list(loaded.cached_trace.keys()) == list(simulation.cached_trace.keys()), "The hash chain should be preserved."
+
+    # replaying part of the trace and then diverging, so that the file is rewritten while some states were never parsed
+    assert aux_execute_events(loaded, ["event_0", "event_x"]) == 1
+    loaded._save_cache_file(cache_path)
+    assert Simulation._node_state(nodes[2])["agents"][0]["step"] == 2, "Lazy states should still be readable after saving."
+
+    reloaded = Simulation()
+    reloaded._load_cache_file(cache_path)
+    assert len(reloaded.cached_trace) == 4
+    assert sorted(Simulation._node_state(node)["agents"][0]["step"] for node in reloaded.cached_trace.values() 
+                  if Simulation._node_state(node)["agents"]) == [0, 1, 2]
+    
+    reloaded._close_trace_file()
+    loaded._close_trace_file()
+    remove_file_if_exists(cache_path)
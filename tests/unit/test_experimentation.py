@@ -7,7 +7,8 @@ sys.path.append('..')
 
 from testing_utils import *
 
-from tinytroupe.experimentation import ABRandomizer
+from tinytroupe.experimentation import ABRandomizer, SimulationBatchRunner
+from tinytroupe.agent import TinyPerson
 
 def test_randomize():
     randomizer = ABRandomizer()
@@ -57,3 +58,35 @@ def test_passtrough_name():
 def test_intervention_1():
     pass # TODO
 
+def aux_batch_scenario(name, age):
+    # must be at the top level, so that it can be sent to worker processes
+    agent = TinyPerson(name)
+    agent.define("age", age)
+
+    return {"defined_age": agent.get("age")}
+
+def test_simulation_batch_runner():
+    cache_files = ["batch_test.cache-0.json", "batch_test.cache-1.json"]
+    for cache_file in cache_files:
+        remove_file_if_exists(cache_file)
+
+    try:
+        runner = SimulationBatchRunner(aux_batch_scenario, {"name": ["Ana"], "age": [20, 30]}, 
+                                       max_workers=2, max_concurrent_llm_calls=1, cache_file_prefix="batch_test.cache")
+
+        results = runner.run_all()
+
+        assert len(results) == 2, "There should be one result per parameter combination."
+        for result in results:
+            assert result["status"] == "success", f"Run {result['run_id']} should have succeeded, but got: {result['error']}"
+            assert result["output"]["defined_age"] == result["parameters"]["age"], "Each run should use its own parameters."
+            assert os.path.exists(result["cache_path"]), "Each run should have its own cache file."
+
+        metrics = runner.merged_metrics()
+        assert list(metrics["age"]) == [20, 30], "The merged metrics should have one row per run, in run order."
+        assert list(metrics["defined_age"]) == [20, 30], "The merged metrics should include the scenario outputs."
+    
+    finally:
+        # the cache files are only test artifacts
+        for cache_file in cache_files:
+            remove_file_if_exists(cache_file)
@@ -2,6 +2,7 @@ import pytest
 import os
 import json
 import random
+import pandas as pd
 
 import logging
 logger = logging.getLogger("tinytroupe")
@@ -12,7 +13,10 @@ sys.path.append('../../')
 sys.path.append('..')
 
 from testing_utils import *
-from tinytroupe.extraction import ArtifactExporter, Normalizer
+from tinytroupe.extraction import ArtifactExporter, Normalizer, ResultsReducer, ResultsExtractor
+from tinytroupe import openai_utils
+from tinytroupe.agent import TinyPerson
+from tinytroupe.environment import TinyWorld
 from tinytroupe import utils
 
 @pytest.fixture
@@ -80,6 +84,157 @@ def test_export_docx(exporter):
     assert "This is a sample markdown text" in exported_data, "The exported docx data should contain some of the original content."
     assert "#" not in exported_data, "The exported docx data should not contain Markdown."
 
+
+def test_reduce_population(setup):
+    agents = [TinyPerson(f"Reduced Agent {i}") for i in range(3)]
+    for i, agent in enumerate(agents):
+        other = agents[(i + 1) % len(agents)]
+        agent.listen(f"Hello from {other.name}.", source=other)
+        agent._store_in_memory({'role': 'assistant', 
+                                'content': {'action': {'type': 'TALK', 'content': f"Hi, {other.name}.", 'target': other.name}},
+                                'simulation_timestamp': None})
+    
+    def aux_extract_content(focus_agent, source_agent, target_agent, kind, event, content, timestamp):
+        return (source_agent.name, target_agent.name, content)
+
+    reducer = ResultsReducer()
+    reducer.add_reduction_rule("TALK", aux_extract_content)
+    reducer.add_reduction_rule("CONVERSATION", aux_extract_content)
+
+    interactions = reducer.interactions_dataframe(agents)
+    assert len(interactions) == 6, "There should be one row per stimulus and action."
+    assert interactions["event"].dtype == "category"
+
+    column_names = ["author", "recipient", "content"]
+    expected = pd.concat([reducer.reduce_agent_to_dataframe(agent, column_names=column_names) for agent in agents], ignore_index=True)
+    
+    assert reducer.reduce_population(agents, column_names=column_names).equals(expected)
+    assert reducer.reduce_population(agents, column_names=column_names, parallel=True, max_workers=2).equals(expected)
+
+    # vectorized rules get all matching interactions at once
+    vectorized_reducer = ResultsReducer()
+    vectorized_reducer.add_vectorized_reduction_rule("TALK", lambda df: df[["source", "target", "content"]].astype(str))
+    talks = vectorized_reducer.reduce_population(agents)
+    assert len(talks) == 3
+    assert list(talks["content"]) == [f"Hi, {agents[(i + 1) % 3].name}." for i in range(3)]
+
+    with pytest.raises(Exception):
+        vectorized_reducer.add_reduction_rule("TALK", aux_extract_content)
+
+    # in a world with an interaction log, the log is read instead of the memories, with the very same results
+    world = TinyWorld("Reduction world", agents[:2], interaction_log=True)
+    agents[0]._store_in_memory({'role': 'assistant', 
+                                'content': {'action': {'type': 'TALK', 'content': "Anyone there?", 'target': agents[1].name}},
+                                'simulation_timestamp': None})
+    assert agents[0].interaction_log_view() is not None and len(agents[0].interaction_log_view()) == 3
+    assert agents[2].interaction_log_view() is None
+
+    logged_interactions = reducer.interactions_dataframe(agents)
+    logged_reduction = reducer.reduce_population(agents, column_names=column_names)
+    world.interaction_log = None
+    pd.testing.assert_frame_equal(logged_interactions, reducer.interactions_dataframe(agents))
+    pd.testing.assert_frame_equal(logged_reduction, reducer.reduce_population(agents, column_names=column_names))
+
+
+def test_extract_results_from_agents(setup, monkeypatch):
+    agents = [TinyPerson(f"Extracted Agent {i}") for i in range(4)]
+    for i, agent in enumerate(agents):
+        # the last two agents have the same history, except for their names
+        agent.listen(f"Which color do you prefer? ({min(i, 2)})")
+
+    class FakeClient:
+        def __init__(self):
+            self.n_calls = 0
+
+        def send_message(self, messages, **kwargs):
+            self.n_calls += 1
+            if "(1)" in messages[-1]["content"]:
+                return None # simulates a failed call
+            return {"role": "assistant", "content": '{"color": "blue"}'}
+    
+    fake_client = FakeClient()
+    monkeypatch.setattr(openai_utils, "client", lambda: fake_client)
+
+    extractor = ResultsExtractor()
+    df = extractor.extract_results_from_agents(agents + [agents[3]], extraction_objective="Find the preferred color.", fields=["color"], max_workers=2)
+
+    assert fake_client.n_calls == 4, "Each agent should be extracted once, even if given more than once."
+    assert list(df["agent"]) == [agent.name for agent in agents] + [agents[3].name]
+    assert list(df["status"]) == [ResultsExtractor.STATUS_EXTRACTED, ResultsExtractor.STATUS_FAILED, 
+                                  ResultsExtractor.STATUS_EXTRACTED, ResultsExtractor.STATUS_EXTRACTED,
+                                  ResultsExtractor.STATUS_DEDUPLICATED]
+    assert list(df["color"].isna()) == [False, True, False, False, False]
+    assert set(df["color"].dropna()) == {"blue"}
+    assert extractor.agent_extraction[agents[3].name] == {"color": "blue"}
+
+    # agents get their own copies of the results
+    assert df["result"].iloc[3] is not df["result"].iloc[4]
+    df["result"].iloc[3]["color"] = "red"
+    assert df["result"].iloc[4] == {"color": "blue"}
+
+    # only failed and changed histories are extracted again
+    agents[0].listen("Any other color?")
+    df = extractor.extract_results_from_agents(agents, extraction_objective="Find the preferred color.", fields=["color"])
+
+    assert fake_client.n_calls == 6
+    assert list(df["status"]) == [ResultsExtractor.STATUS_EXTRACTED, ResultsExtractor.STATUS_FAILED, 
+                                  ResultsExtractor.STATUS_CACHED, ResultsExtractor.STATUS_CACHED]
+    assert list(df["color"])[2:] == ["blue", "blue"], "Cached results should not be affected by changes to earlier results."
+
+
+def test_extract_results_from_long_world(setup, monkeypatch):
+    agents = [TinyPerson(f"Long World Agent {i}") for i in range(3)]
+    world = TinyWorld("Long World", agents)
+    for i in range(20):
+        world.broadcast(f"Fact number {i}: the sky has {i} clouds. " * 5)
+
+    class FakeClient:
+        def __init__(self):
+            self.requests = []
+
+        def send_message(self, messages, **kwargs):
+            self.requests.append(messages[-1]["content"])
+            return {"role": "assistant", "content": '{"facts": "some facts"}'}
+    
+    fake_client = FakeClient()
+    monkeypatch.setattr(openai_utils, "client", lambda: fake_client)
+
+    extractor = ResultsExtractor()
+
+    # short enough for a single request
+    result = extractor.extract_results_from_world(world, max_tokens_per_chunk=100000)
+    assert result == {"facts": "some facts"}
+    assert len(fake_client.requests) == 1
+
+    # chunked: several partial extractions, then merges
+    fake_client.requests = []
+    result = extractor.extract_results_from_world(world, max_tokens_per_chunk=500, max_workers=4)
+    assert result == {"facts": "some facts"}
+    assert extractor.world_extraction[world.name] == result
+
+    chunk_requests = [request for request in fake_client.requests if "## Agents Interactions History" in request]
+    merge_requests = [request for request in fake_client.requests if "## Partial Extraction Results" in request]
+    assert len(chunk_requests) > 3, "The history should have been split in several chunks."
+    assert len(merge_requests) >= 1
+    assert all(f"of {len(chunk_requests)} of the interactions history" in request for request in chunk_requests)
+    assert all(openai_utils.count_tokens(request) < 1000 for request in chunk_requests)
+
+    # every step is cached, including single requests
+    n_requests = len(fake_client.requests)
+    assert extractor.extract_results_from_world(world, max_tokens_per_chunk=500) == result
+    assert extractor.extract_results_from_world(world, max_tokens_per_chunk=100000) == result
+    assert len(fake_client.requests) == n_requests
+
+    # if merges fail, the partial results are returned unmerged
+    def aux_send_message_failing_merges(messages, **kwargs):
+        if "## Partial Extraction Results" in messages[-1]["content"]:
+            return None
+        return {"role": "assistant", "content": '{"facts": "other facts"}'}
+    
+    fake_client.send_message = aux_send_message_failing_merges
+    result = ResultsExtractor().extract_results_from_world(world, max_tokens_per_chunk=500, max_workers=4)
+    assert result == {ResultsExtractor.UNMERGED_PARTIAL_RESULTS_KEY: [{"facts": "other facts"}] * len(chunk_requests)}
+
     
 def test_normalizer():
     # Define the concepts to be normalized
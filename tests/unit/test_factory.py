@@ -1,5 +1,10 @@
 import pytest
 import os
+import re
+import shutil
+import time
+import threading
+import json
 
 import sys
 sys.path.append('../../tinytroupe/')
@@ -10,7 +15,8 @@ sys.path.append('..')
 from tinytroupe.examples import create_oscar_the_architect
 from tinytroupe.control import Simulation
 import tinytroupe.control as control
-from tinytroupe.factory import TinyPersonFactory
+from tinytroupe.factory import TinyPersonFactory, PersonaIndex, PersonaLibrary
+from tinytroupe.agent import TinyPerson
 
 from testing_utils import *
 
@@ -30,3 +36,238 @@ def test_generate_person(setup):
     assert proposition_holds(f"The following is an acceptable short description for someone working in banking: '{minibio}'"), f"Proposition is false according to the LLM."
 
     
+
+def test_generate_people(setup, monkeypatch):
+    from tinytroupe import openai_utils
+
+    # (name, age, occupation) of each candidate, in request order
+    candidates = [("Ana", 31, "Nurse"), ("Bruno", 32, "Doctor"), ("Ana", 33, "Dentist"), # repeated name
+                  ("Carla", 34, "Teacher"), ("Duda", 34, "Teacher"), # repeated mini-biography, but for the name
+                  ("Eva", 36, "Pharmacist"), ("Fabio", 37, "Physiotherapist"), ("Gabi", 38, "Midwife")]
+
+    class FakeClient:
+        def __init__(self):
+            self.prompts = []
+
+        def send_message(self, messages, **kwargs):
+            self.prompts.append(messages[-1]["content"])
+            candidate_number = int(messages[-1]["content"].rsplit("candidate number ", 1)[1].rstrip("."))
+            name, age, occupation = candidates[candidate_number - 1]
+            spec = {"name": f"{name} Generated", 
+                    "_configuration": {"age": age, "nationality": "Brazilian", "country_of_residence": "Brazil", "occupation": occupation}}
+            return {"role": "assistant", "content": json.dumps(spec)}
+
+    fake_client = FakeClient()
+    monkeypatch.setattr(openai_utils, "client", lambda: fake_client)
+
+    factory = TinyPersonFactory("Health professionals in Brazil.")
+    people = factory.generate_people(5, parallelism=3)
+
+    assert len(people) == 5
+    assert len({person.name for person in people}) == 5, "Names must be unique."
+    assert len({person.minibio().split(" is a ")[1] for person in people}) == 5, "Mini-biographies must be unique."
+    assert len(fake_client.prompts) == 7, "Two candidates should have been rejected as repeated."
+    assert len(factory.generated_names) == 5
+
+    # prompts only mention a bounded number of previously generated agents
+    TinyPersonFactory.MAX_ALREADY_GENERATED_IN_PROMPT, previous_max = 2, TinyPersonFactory.MAX_ALREADY_GENERATED_IN_PROMPT
+    try:
+        prompt = factory._person_prompt()
+    finally:
+        TinyPersonFactory.MAX_ALREADY_GENERATED_IN_PROMPT = previous_max
+    
+    assert sum(person.minibio() in prompt for person in people) == 2
+
+def test_generate_people_several_per_call(setup, monkeypatch):
+    from tinytroupe import openai_utils
+
+    class FakeClient:
+        def __init__(self):
+            self.requests = []
+
+        def send_message(self, messages, **kwargs):
+            self.requests.append(messages[-1]["content"])
+            numbers = [int(number) for number in re.findall(r"candidates? number (\d+)(?: to (\d+))?", messages[-1]["content"])[0] if number]
+            first, last = numbers[0], numbers[-1]
+            
+            specs = []
+            for number in range(first, last + 1):
+                if number == 2:
+                    specs.append({"name": "Incomplete Spec"}) # invalid, so it must be requested again
+                elif number == 3:
+                    specs.append({"name": "Batch Person 3", "_configuration": {"age": 23, "occupation": "Baker of type 3"}}) # sparse, but valid
+                else:
+                    specs.append({"name": f"Batch Person {number}", 
+                                  "_configuration": {"age": 20 + number, "nationality": "Portuguese", "country_of_residence": "Portugal", "occupation": f"Baker of type {number}"}})
+            
+            return {"role": "assistant", "content": json.dumps(specs if first != last else specs[0])}
+
+    fake_client = FakeClient()
+    monkeypatch.setattr(openai_utils, "client", lambda: fake_client)
+
+    factory = TinyPersonFactory("Bakers in Portugal.")
+    people = factory.generate_people(6, people_per_call=3, parallelism=2)
+
+    assert len(people) == 6
+    assert len(fake_client.requests) == 3, "Only the rejected candidate should have been requested again."
+    assert "JSON array with exactly 3 elements" in fake_client.requests[0]
+    assert "candidate number 7" in fake_client.requests[2]
+    assert "Incomplete Spec" not in [person.name for person in people]
+    assert "Batch Person 3" in [person.name for person in people], "Specs accepted one at a time must also be accepted in batches."
+
+def test_persona_index():
+    index = PersonaIndex()
+
+    nurse = {"age": 30, "occupation": "Nurse", "nationality": "Brazilian", "country_of_residence": "Brazil",
+             "occupation_description": "You are a nurse at a public hospital in Recife, where you work night shifts in the emergency room "
+                                       "and take care of patients arriving from all over the city."}
+    index.add("Ana", nurse)
+
+    # same profile, different name
+    assert index.is_near_duplicate("Bia", dict(nurse))
+
+    # a clone with a slightly different age and description
+    clone = dict(nurse, age=32, occupation_description=nurse["occupation_description"].replace("Recife", "Olinda"))
+    assert index.is_near_duplicate("Carla", clone)
+
+    # similar descriptions, but different attributes
+    assert not index.is_near_duplicate("Duda", dict(clone, age=50))
+    assert not index.is_near_duplicate("Eva", dict(clone, occupation="Doctor"))
+
+    # a different person altogether
+    teacher = {"age": 45, "occupation": "Teacher", "nationality": "Portuguese", "country_of_residence": "Portugal",
+               "occupation_description": "You teach mathematics to teenagers at a secondary school in Porto."}
+    assert not index.is_near_duplicate("Fabio", teacher)
+    index.add("Fabio", teacher)
+
+    metrics = index.diversity_metrics()
+    assert metrics["personas"] == 2
+    assert metrics["distinct_occupations"] == 2
+    assert metrics["occupation_entropy"] == pytest.approx(1.0)
+    assert metrics["age_mean"] == pytest.approx(37.5)
+    assert metrics["mean_similarity"] < 0.2
+
+    # the index survives a round trip through its state
+    decoded = PersonaIndex().decode_complete_state(json.loads(json.dumps(index.encode_complete_state())))
+    assert decoded.is_near_duplicate("Carla", clone)
+    assert not decoded.is_near_duplicate("Duda", dict(clone, age=50))
+    assert decoded.diversity_metrics() == metrics
+
+def test_persona_library(setup, monkeypatch):
+    from tinytroupe import openai_utils
+
+    class FakeClient:
+        def __init__(self):
+            self.n_calls = 0
+
+        def send_message(self, messages, **kwargs):
+            self.n_calls += 1
+            spec = {"name": f"Library Person {self.n_calls}", 
+                    "_configuration": {"age": 20 + 5 * self.n_calls, "nationality": "Chilean", "country_of_residence": "Chile", 
+                                       "occupation": f"Miner of type {self.n_calls}"}}
+            return {"role": "assistant", "content": json.dumps(spec)}
+
+    fake_client = FakeClient()
+    monkeypatch.setattr(openai_utils, "client", lambda: fake_client)
+
+    library_folder = get_relative_to_test_path("test_persona_library")
+    if os.path.exists(library_folder):
+        shutil.rmtree(library_folder)
+
+    context = "Miners in Chile."
+
+    # the first run generates the personas and adds them to the library, saving the index once, atomically
+    index_saves = []
+    original_save_index = PersonaLibrary._save_index
+    monkeypatch.setattr(PersonaLibrary, "_save_index", lambda self: index_saves.append(1) or original_save_index(self))
+    people = TinyPersonFactory(context, persona_library=PersonaLibrary(library_folder)).generate_people(3, parallelism=1)
+    assert fake_client.n_calls == 3
+    assert len(index_saves) == 1
+    assert sorted(PersonaLibrary(library_folder).names(context)) == sorted(person.name for person in people)
+    assert not [file_name for file_name in os.listdir(library_folder) if file_name.endswith(".tmp")]
+    monkeypatch.setattr(PersonaLibrary, "_save_index", original_save_index)
+
+    # later runs draw them from the library, without calling the model, until it is exhausted
+    names = [person.name for person in people]
+    TinyPerson.clear_agents()
+
+    library = PersonaLibrary(library_folder)
+    factory = TinyPersonFactory(context, persona_library=library)
+    drawn = factory.generate_people(2)
+    assert fake_client.n_calls == 3
+    assert [person.name for person in drawn] == names[:2]
+    assert drawn[0]._configuration["occupation"] == "Miner of type 1"
+
+    person = factory.generate_person()
+    assert person.name == names[2]
+    assert fake_client.n_calls == 3
+
+    person = factory.generate_person()
+    assert fake_client.n_calls == 4, "The library is exhausted, so the model must be called."
+    assert len(library) == 4
+
+    # other contexts have their own personas
+    assert PersonaLibrary(library_folder).names("Miners in Peru.") == []
+
+    # libraries sharing the folder keep each other's personas
+    other_library = PersonaLibrary(library_folder)
+    other_library.add(TinyPerson("Library Person Peru"), "Miners in Peru.")
+    library.add(TinyPerson("Library Person Chile"), context)
+    final_library = PersonaLibrary(library_folder)
+    assert final_library.names("Miners in Peru.") == ["Library Person Peru"]
+    assert "Library Person Chile" in final_library.names(context)
+    assert len(final_library) == 6
+
+    shutil.rmtree(library_folder)
+
+def test_generate_population(setup, monkeypatch):
+    from tinytroupe import openai_utils
+
+    class FakeClient:
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.n_people = 0
+            self.max_concurrent_calls = 0
+            self.concurrent_calls = 0
+
+        def send_message(self, messages, **kwargs):
+            if "person descriptions based on the following broad context" in messages[-1]["content"]:
+                return {"role": "assistant", "content": json.dumps([f"Population context {i}." for i in range(3)])}
+            
+            with self.lock:
+                self.n_people += 1
+                number = self.n_people
+                self.concurrent_calls += 1
+                self.max_concurrent_calls = max(self.max_concurrent_calls, self.concurrent_calls)
+            
+            time.sleep(0.01 if "Population context 0." in messages[-1]["content"] else 0.2) # model latency, lower for the first factory
+            
+            with self.lock:
+                self.concurrent_calls -= 1
+            
+            spec = {"name": f"Population Person {number}", 
+                    "_configuration": {"age": 20 + number, "nationality": "Irish", "country_of_residence": "Ireland", "occupation": f"Job {number}"}}
+            return {"role": "assistant", "content": json.dumps(spec)}
+
+    fake_client = FakeClient()
+    monkeypatch.setattr(openai_utils, "client", lambda: fake_client)
+
+    people = list(TinyPersonFactory.generate_population(3, "People in Ireland.", people_per_factory=2, parallelism=1, max_concurrent_factories=3))
+    
+    assert len(people) == 6
+    assert len({person.name for person in people}) == 6
+    assert fake_client.max_concurrent_calls > 1, "Factories should generate people concurrently."
+
+    # consumers can stop early, and generation then stops as well, including factories already running: the slower ones
+    # are still generating people when the first factory yields its first person
+    fake_client.n_people = 0
+    population = TinyPersonFactory.generate_population(3, "People in Ireland.", people_per_factory=4, parallelism=1, max_buffered_people=1)
+    first_person = next(population)
+    population.close() # waits for the calls in flight, so the producer cannot outlive the fake client
+    assert first_person is not None
+    
+    n_calls_at_close = fake_client.n_people
+    assert n_calls_at_close < 12, "Running factories should have stopped early."
+    time.sleep(0.2)
+    assert fake_client.n_people == n_calls_at_close, "No model calls should be made after closing."
+    assert not any(thread.name == "population-producer" for thread in threading.enumerate()), "The producer should have finished."
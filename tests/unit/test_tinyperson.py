@@ -11,7 +11,10 @@ sys.path.insert(0, '..') # ensures that the package is imported from the parent
 #sys.path.append('../../')
 #sys.path.append('..')
 
+import copy
+
 from tinytroupe.examples import create_oscar_the_architect, create_lisa_the_data_scientist
+from tinytroupe.agent import TinyPerson, EpisodicMemory, EpisodicMemoryEntry
 
 from testing_utils import *
 
@@ -63,6 +66,43 @@ def test_define_several(setup):
         assert "Machine learning" in agent._configuration["skills"], f"{agent.name} should have Machine learning as a skill."
         assert "GPT-3" in agent._configuration["skills"], f"{agent.name} should have GPT-3 as a skill."
 
+def test_define_many(setup, monkeypatch):
+    configuration = {"age": 41, 
+                     "occupation": "Chef",
+                     "occupation_description": """
+                        You run a small restaurant.
+                        """,
+                     "skills": [{"skill": "Cooking."}, {"skill": "Managing a kitchen."}],
+                     "relationships": [{"name": "Rita", "description": "your sous-chef."}]}
+
+    agent_1 = TinyPerson("Chef Defined One by One")
+    for key, value in configuration.items():
+        if isinstance(value, list):
+            agent_1.define_several(key, value)
+        else:
+            agent_1.define(key, value)
+
+    # all values are defined with a single prompt rendering
+    n_renderings = [0]
+    generate_agent_prompt = TinyPerson.generate_agent_prompt
+    def aux_counting_generate_agent_prompt(self):
+        n_renderings[0] += 1
+        return generate_agent_prompt(self)
+    monkeypatch.setattr(TinyPerson, "generate_agent_prompt", aux_counting_generate_agent_prompt)
+
+    agent_2 = TinyPerson("Chef Defined at Once")
+    n_renderings[0] = 0
+    agent_2.define_many(configuration)
+    assert n_renderings[0] == 1
+
+    agent_3 = TinyPerson.from_configuration("Chef From Configuration", configuration)
+
+    for agent in [agent_2, agent_3]:
+        for key in configuration.keys():
+            assert agent._configuration[key] == agent_1._configuration[key], f"{agent.name} should have the same {key} as {agent_1.name}."
+        assert agent._configuration["occupation_description"] == "\nYou run a small restaurant.\n"
+        assert "Managing a kitchen." in agent.current_messages[0]['content']
+
 def test_socialize(setup):
     # Test that socializing with another agent works as expected
     an_oscar = create_oscar_the_architect()
@@ -76,6 +116,33 @@ def test_socialize(setup):
         assert contains_action_type(actions, "TALK"), f"{agent.name} should have at least one TALK action to perform, since we started a conversation."
         assert contains_action_content(actions, other.name), f"{agent.name} should mention {other.name} in the TALK action, since they are friends."
 
+def test_accessibility(setup):
+    agent = TinyPerson("Accessibility Agent")
+    friend, colleague = TinyPerson("Accessibility Friend"), TinyPerson("Accessibility Colleague")
+
+    agent.make_agent_accessible(friend, relation_description="My friend")
+    agent.make_agent_accessible(friend, relation_description="My friend")
+    agent.make_agents_accessible([agent, friend, colleague], relation_description="My colleague")
+
+    # agents are accessible only once, and never to themselves
+    assert agent.accessible_agents == [friend, colleague]
+    assert agent.is_agent_accessible(colleague) and not agent.is_agent_accessible(agent)
+    assert agent._configuration["currently_accessible_agents"] == [{"name": friend.name, "relation_description": "My friend"},
+                                                                   {"name": colleague.name, "relation_description": "My colleague"}]
+
+    # and inaccessible agents are no longer offered to the agent either
+    agent.make_agent_inaccessible(friend)
+    assert agent.accessible_agents == [colleague]
+    assert [record["name"] for record in agent._configuration["currently_accessible_agents"]] == [colleague.name]
+
+    # accessibility survives a round trip through the complete state
+    state = agent.encode_complete_state()
+    assert state["_accessible_agents"] == [colleague.name]
+    agent.make_all_agents_inaccessible()
+    assert agent.accessible_agents == []
+    agent.decode_complete_state(state)
+    assert agent.accessible_agents == [colleague]
+
 def test_see(setup):
     # Test that seeing a visual stimulus works as expected
     for agent in [create_oscar_the_architect(), create_lisa_the_data_scientist()]:
@@ -140,3 +207,52 @@ def test_save_spec(setup):
               
     
     
+
+def test_encode_decode_complete_state(setup):
+    agent = create_oscar_the_architect()
+    agent.listen("Hello, how are you?")
+    agent.listen("What are you working on?")
+
+    state = agent.encode_complete_state()
+    state_copy = copy.deepcopy(state)
+
+    # memory values already encoded are reused by subsequent states, and new ones are appended
+    agent.listen("Any plans for the weekend?")
+    new_state = agent.encode_complete_state()
+    assert len(new_state['episodic_memory']['memory']) == len(state['episodic_memory']['memory']) + 1
+    assert new_state['episodic_memory']['memory'][0] is state['episodic_memory']['memory'][0], "Encoded memory values should be shared across states."
+
+    # decoding restores the earlier state without modifying nor aliasing it
+    agent.decode_complete_state(state)
+    assert state == state_copy, "Decoding should not modify the given state."
+    assert agent.episodic_memory.retrieve_all() == state['episodic_memory']['memory']
+    assert agent.episodic_memory.retrieve_all()[0] is not state['episodic_memory']['memory'][0], "Decoded memory should not alias the given state."
+
+    agent.define('age', 99)
+    agent.listen("Another message.")
+    assert state == state_copy, "Changing the agent after decoding should not affect the decoded state."
+
+def test_episodic_memory_entries(setup):
+    memory = EpisodicMemory()
+    message = {'role': 'user', 'content': {'stimuli': [{'type': 'CONVERSATION', 'content': "Hi!", 'source': "Lisa"}]}, 'simulation_timestamp': "2024-01-01T10:00:00"}
+    memory.store(message)
+    memory.store("not a message")
+
+    entry = memory.retrieve_all()[0]
+    assert isinstance(entry, EpisodicMemoryEntry), "Messages should be stored as compact entries."
+    assert memory.retrieve_all()[1] == "not a message", "Other values should be stored as they are."
+
+    # entries can be read just like the original dicts
+    assert entry == message
+    assert entry['role'] == 'user' and entry.get('simulation_timestamp') == "2024-01-01T10:00:00"
+    assert entry['content']['stimuli'][0]['source'] == "Lisa"
+    assert dict(entry) == message and 'content' in entry and 'other' not in entry
+
+    # but are serialized as plain dicts, and deserialized as entries again
+    json_dict = memory.to_json()
+    assert type(json_dict['memory'][0]) is dict and json_dict['memory'][0] == message
+
+    loaded = EpisodicMemory.from_json(json_dict)
+    assert isinstance(loaded.retrieve_all()[0], EpisodicMemoryEntry)
+    assert loaded.retrieve_all() == memory.retrieve_all()
+    assert loaded.retrieve_all()[0]['content'] is not json_dict['memory'][0]['content'], "Loaded entries should not alias the given JSON."
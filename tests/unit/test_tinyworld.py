@@ -76,3 +76,208 @@ def test_decode_complete_state(setup, focus_group_world):
     assert len(world_2.agents) == n_agents_1, "The world should have the same number of agents."
 
 
+
+def test_interaction_log(setup):
+    lisa = create_lisa_the_data_scientist()
+    oscar = create_oscar_the_architect()
+    world = TinyWorld("Logged world", [lisa, oscar], interaction_log=True)
+
+    world.broadcast("Please introduce yourselves.")
+    lisa._store_in_memory({'role': 'assistant', 
+                           'content': {'action': {'type': 'TALK', 'content': "Hi, I'm Lisa.", 'target': oscar.name}},
+                           'simulation_timestamp': lisa.iso_datetime()})
+
+    log = world.interaction_log
+    assert len(log) == 3, "Each stimulus and action should be recorded once."
+    assert len(log.view(lisa.name)) == 2
+    assert len(log.view(oscar.name)) == 1
+
+    df = log.view(lisa.name).to_dataframe()
+    assert list(df["kind"]) == ["stimulus", "action"]
+    assert df["target"].iloc[1] == oscar.name
+    assert df["content"].iloc[1] == "Hi, I'm Lisa."
+
+    # vectorized scans over the codes
+    talk_code = log.code_of("type", "TALK")
+    assert (log.codes("type") == talk_code).sum() == 1
+
+    # the log survives a round trip through the world's complete state
+    state = world.encode_complete_state()
+    world.interaction_log = None
+    world.decode_complete_state(state)
+    assert world.interaction_log.to_dataframe().equals(log.to_dataframe())
+    assert len(world.interaction_log.view(lisa.name)) == 2
+    assert lisa.interaction_log_view() is not None, "The log should still cover Lisa's whole memory."
+
+    # rows already encoded are reused by subsequent states, and only new ones are encoded
+    lisa.listen("Welcome!")
+    new_state = world.encode_complete_state()
+    assert len(new_state["interaction_log"]["rows"]) == len(state["interaction_log"]["rows"]) + 1
+    assert new_state["interaction_log"]["rows"][0] is state["interaction_log"]["rows"][0], "Encoded rows should be shared across states."
+
+    # worlds without a log record nothing
+    unlogged_world = TinyWorld("Unlogged world", [])
+    assert unlogged_world.interaction_log is None
+
+    # and decoding a state without a log drops the current one
+    unlogged_state = unlogged_world.encode_complete_state()
+    world.decode_complete_state(unlogged_state | {"name": world.name, "agents": [lisa.name, oscar.name]})
+    assert world.interaction_log is None
+
+def test_agent_membership(setup):
+    lisa = create_lisa_the_data_scientist()
+    oscar = create_oscar_the_architect()
+    marcos = create_marcos_the_physician()
+    world = TinyWorld("Membership world", [lisa, oscar, marcos])
+
+    assert world.has_agent(oscar)
+    assert [agent.name for agent in world.agents] == [lisa.name, oscar.name, marcos.name]
+
+    # removals preserve the order of the remaining agents
+    world.remove_agent(oscar)
+    assert not world.has_agent(oscar)
+    assert [agent.name for agent in world.agents] == [lisa.name, marcos.name]
+    assert world.get_agent_by_name(oscar.name) is None
+
+    with pytest.raises(ValueError):
+        world.remove_agent(oscar)
+
+    # adding an agent twice has no effect
+    world.add_agent(oscar)
+    world.add_agent(oscar)
+    assert [agent.name for agent in world.agents] == [lisa.name, marcos.name, oscar.name]
+
+def test_registry_scopes_and_weak_references(setup):
+    import gc
+    import tinytroupe.control as control
+    from tinytroupe.agent import TinyPerson
+    from tinytroupe.utils import ObjectRegistry
+
+    lisa = create_lisa_the_data_scientist()
+
+    # agents and environments created within a scope are dropped from the registries upon exit
+    with control.registry_scope():
+        oscar = create_oscar_the_architect()
+        world = TinyWorld("Scoped world", [oscar, lisa])
+        assert TinyPerson.get_agent_by_name(oscar.name) is oscar
+        assert TinyWorld.get_environment_by_name(world.name) is world
+
+    assert TinyPerson.get_agent_by_name(oscar.name) is None
+    assert TinyWorld.get_environment_by_name(world.name) is None
+    assert TinyPerson.get_agent_by_name(lisa.name) is lisa, "Agents created before the scope should be kept."
+
+    # names can then be reused
+    TinyWorld("Scoped world", [])
+
+    # weak registries drop objects as soon as they are no longer referenced elsewhere
+    class Named:
+        def __init__(self, name):
+            self.name = name
+
+    registry = ObjectRegistry(weak=True)
+    kept, dropped = Named("kept"), Named("dropped")
+    assert registry.register(kept.name, kept) and registry.register(dropped.name, dropped)
+    assert not registry.register(kept.name, Named("kept")), "Names should be unique."
+
+    del dropped
+    gc.collect()
+    assert list(registry) == ["kept"]
+    assert registry.register("dropped", Named("dropped")), "Names of dropped objects should be reusable."
+
+    # and registries can switch between strong and weak references
+    registry.weak = False
+    registry.register("strong", Named("strong"))
+    gc.collect()
+    assert "strong" in registry
+
+def test_make_everyone_accessible(setup):
+    lisa = create_lisa_the_data_scientist()
+    oscar = create_oscar_the_architect()
+    marcos = create_marcos_the_physician()
+    world = TinyWorld("Accessible world", [lisa, oscar, marcos])
+
+    # repeated calls do not duplicate accessible agents
+    world.make_everyone_accessible()
+    world.make_everyone_accessible()
+
+    for agent in world.agents:
+        others = [other for other in world.agents if other is not agent]
+        assert agent.accessible_agents == others
+        assert [record["name"] for record in agent._configuration["currently_accessible_agents"]] == [other.name for other in others]
+
+def test_social_network_relations(setup):
+    lisa = create_lisa_the_data_scientist()
+    oscar = create_oscar_the_architect()
+    marcos = create_marcos_the_physician()
+    network = TinySocialNetwork("Relations network")
+    network.add_relation(lisa, oscar, "friends").add_relation(lisa, marcos, "work").add_relation(lisa, oscar, "work")
+
+    assert [agent.name for agent in network.agents] == [lisa.name, oscar.name, marcos.name]
+    assert network.is_in_relation_with(oscar, lisa) and network.is_in_relation_with(oscar, lisa, "work")
+    assert not network.is_in_relation_with(oscar, marcos) and not network.is_in_relation_with(marcos, lisa, "friends")
+    assert network.relation_edges("work") == [(lisa.name, marcos.name), (lisa.name, oscar.name)]
+
+    network._update_agents_contexts()
+    assert lisa.accessible_agents == [oscar, marcos]
+    assert oscar.accessible_agents == [lisa] and marcos.accessible_agents == [lisa]
+
+    # removing one of two relations between agents keeps them accessible to each other, removing the last one does not
+    network.remove_relation(lisa, oscar, "work")
+    network._update_agents_contexts()
+    assert oscar.accessible_agents == [lisa]
+    network.remove_relation(lisa, oscar)
+    network._update_agents_contexts()
+    assert oscar.accessible_agents == [] and lisa.accessible_agents == [marcos]
+
+    # agents whose relations did not change are not updated again
+    marcos.make_agent_accessible(oscar)
+    network._update_agents_contexts()
+    assert marcos.accessible_agents == [lisa, oscar]
+
+    # relations survive a round trip through the complete state
+    state = network.encode_complete_state()
+    assert state["relations"] == {"work": [[lisa.name, marcos.name]]}
+    network.add_relation(oscar, marcos, "neighbors")
+    network.decode_complete_state(state)
+    assert list(network.relations.keys()) == ["work"]
+    assert not network.is_in_relation_with(oscar, marcos)
+    assert network.is_in_relation_with(marcos, lisa, "work")
+
+def test_broadcast_shares_stimulus(setup):
+    lisa = create_lisa_the_data_scientist()
+    oscar = create_oscar_the_architect()
+    marcos = create_marcos_the_physician()
+    world = TinyWorld("Broadcasting world", [lisa, oscar, marcos])
+    world.clear_communications_buffer()
+
+    n_memories = {agent.name: agent.episodic_memory.count() for agent in world.agents}
+    world.broadcast("Lunch is ready.", source=lisa)
+
+    # the source does not hear its own message, and the others refer to the very same memory entry
+    assert lisa.episodic_memory.count() == n_memories[lisa.name]
+    oscar_entry = oscar.episodic_memory.retrieve_all()[-1]
+    assert oscar_entry is marcos.episodic_memory.retrieve_all()[-1]
+    assert oscar_entry == {'role': 'user', 
+                           'content': {'stimuli': [{'type': 'CONVERSATION', 'content': "Lunch is ready.", 'source': lisa.name}]},
+                           'simulation_timestamp': world.current_datetime.isoformat()}
+
+    # so shared entries can't be modified by any of them
+    with pytest.raises(TypeError):
+        oscar_entry["content"]["stimuli"][0]["content"] = "Tampered."
+    with pytest.raises(TypeError):
+        oscar_entry["content"]["stimuli"].append({"type": "CONVERSATION", "content": "Tampered."})
+    with pytest.raises(AttributeError):
+        oscar_entry.role = "assistant"
+    assert marcos.episodic_memory.retrieve_all()[-1]["content"]["stimuli"][0]["content"] == "Lunch is ready."
+    assert marcos.episodic_memory.retrieve_all()[-1]["role"] == "user"
+
+    # the message is displayed only once
+    if TinyPerson.communication_display:
+        assert len(world._displayed_communications_buffer) == 1
+        assert "Lunch is ready." in world._displayed_communications_buffer[0]
+
+    # agents encode and decode their own copies of shared entries
+    state = oscar.encode_complete_state()
+    oscar.decode_complete_state(state)
+    assert oscar.episodic_memory.retrieve_all()[-1] == oscar_entry
+    assert oscar.episodic_memory.retrieve_all()[-1] is not oscar_entry
@@ -2,12 +2,18 @@ import pytest
 from unittest.mock import MagicMock
 
 import sys
+import json
+import copy
+import hashlib
+from datetime import datetime
 sys.path.append('../../tinytroupe/')
 sys.path.append('../../')
 sys.path.append('..')
 
 
-from tinytroupe.utils import name_or_empty, extract_json, repeat_on_error
+from tinytroupe.utils import name_or_empty, extract_json, repeat_on_error, write_serialized_file, read_serialized_file, serialization_format_for
+from tinytroupe.utils import JsonSerializableRegistry
+import tinytroupe.utils as utils
 from testing_utils import *
 
 def test_extract_json():
@@ -87,4 +93,98 @@ def test_repeat_on_error():
 
 # TODO
 #def test_json_serializer():
-    
\ No newline at end of file
+    
+@pytest.mark.parametrize("file_name", ["serialization_test.json", "serialization_test.msgpack", "serialization_test.msgpack.zst"])
+def test_serialized_file_round_trip(file_name):
+    if serialization_format_for(file_name) != "json":
+        pytest.importorskip("msgpack")
+        if utils.zstd is None and file_name.endswith(".zst"):
+            pytest.skip("No zstd implementation available.")
+
+    obj = {"name": "Oscar", "age": 30, "ratio": 0.5, "flag": True, "nothing": None, 
+           "memory": [{"role": "user", "content": {"stimuli": ["Olá!"]}}], 
+           "node": ("prev_hash", "event_hash", None)}
+    
+    file_path = get_relative_to_test_path(f"test_exports/{file_name}")
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    write_serialized_file(obj, file_path)
+    loaded = read_serialized_file(file_path)
+
+    # tuples come back as lists, as with JSON
+    obj["node"] = list(obj["node"])
+    assert loaded == obj
+
+    remove_file_if_exists(file_path)
+
+def test_serialized_json_large_integers_and_layout():
+    # integers beyond 64 bits are written and read back exactly, whichever JSON library is used
+    obj = {"big": 2**70, "negative": -2**64, "small": [1, 2.5, "Olá"]}
+    for indent in [True, False]:
+        assert utils.deserialize(utils.serialize(obj, indent=indent)) == obj
+
+    # long digit runs within strings, such as hex digests, are not taken for integers
+    digest = "0123456789012345678901234567890123456789abcdef"
+    assert not utils._has_large_json_integer(utils.serialize({"hash": digest, "escaped": 'a "quoted" 12345678901234567890'}))
+    assert utils._has_large_json_integer(utils.serialize({"hash": digest, "big": 2**70}))
+    digests = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(100000)]
+    assert not utils._has_large_json_integer(utils.serialize(digests))
+
+    # and the output does not depend on the data, nor on which library wrote it
+    assert utils.serialize({"n": 2**70, "items": [1]}, indent=True) == b'{\n    "n": 1180591620717411303424,\n    "items": [\n        1\n    ]\n}'
+    assert utils.serialize({"n": 1, "items": [1]}, indent=True) == b'{\n    "n": 1,\n    "items": [\n        1\n    ]\n}'
+    
+    for value in [{"x": float("nan"), "y": 1.5}, [float("inf"), -float("inf")], {1: "a", None: "b", True: "c"}, ("a", "é")]:
+        assert utils.serialize(value) == json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    with pytest.raises(TypeError):
+        utils.serialize({"when": datetime.now()})
+
+def test_freeze_json_structure():
+    original = {"stimuli": [{"type": "CONVERSATION", "content": "Hi."}], "pair": ("a", "b")}
+    frozen = utils.freeze_json_structure(original)
+
+    # still dicts and lists for readers, but read-only, and independent of the original
+    assert frozen == original and isinstance(frozen, dict) and isinstance(frozen["stimuli"], list)
+    with pytest.raises(TypeError):
+        frozen["stimuli"][0]["content"] = "Tampered."
+    with pytest.raises(TypeError):
+        frozen["stimuli"].append({})
+    original["stimuli"][0]["content"] = "Changed."
+    assert frozen["stimuli"][0]["content"] == "Hi."
+
+    # copies are regular, modifiable structures
+    for copied in [utils.copy_json_structure(frozen), copy.deepcopy(frozen)]:
+        copied["stimuli"][0]["content"] = "Changed."
+        assert type(copied) is dict and type(copied["stimuli"]) is list
+
+class SerializationTestBase(JsonSerializableRegistry):
+    serializable_attributes = ["name", "items"]
+    suppress_attributes_from_serialization = ["secret"]
+
+class SerializationTestDerived(SerializationTestBase):
+    serializable_attributes = ["extra", "secret"]
+    custom_serialization_initializers = {"extra": lambda value: set(value)}
+
+def test_json_serializable_registry_plan():
+    # the plan is computed once per class, including inherited attributes
+    serializable_attrs, suppress_attrs, initializers = SerializationTestDerived._serialization_plan()
+    assert set(serializable_attrs) == {"name", "items", "extra", "secret"}
+    assert suppress_attrs == {"secret"}
+    assert "extra" in initializers
+
+    obj = SerializationTestDerived()
+    obj.name = "Tester"
+    obj.items = [{"a": [1, 2]}, "b"]
+    obj.extra = ["x"]
+    obj.secret = "do not serialize"
+    obj.other = "not serializable"
+
+    json_dict = obj.to_json()
+    assert json_dict == {"json_serializable_class_name": "SerializationTestDerived", "name": "Tester", "items": [{"a": [1, 2]}, "b"], "extra": ["x"]}
+    assert json_dict["items"][0] is not obj.items[0], "Containers should be copied."
+
+    loaded = SerializationTestBase.from_json(json_dict)
+    assert isinstance(loaded, SerializationTestDerived), "The registered subclass should be instantiated."
+    assert loaded.items == obj.items and loaded.items[0] is not json_dict["items"][0]
+    assert loaded.extra == {"x"}, "Custom initializers should be used."
+    assert not hasattr(loaded, "secret")
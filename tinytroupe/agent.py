@@ -14,6 +14,7 @@ to understand how agents interact with the environment and other agents.
 """
 
 import os
+import sys
 import csv
 import json
 import ast
@@ -30,6 +31,7 @@ from rich import print
 import copy
 from tinytroupe.utils import JsonSerializableRegistry
 
+from collections.abc import Mapping
 from typing import Any, TypeVar, Union
 
 Self = TypeVar("Self", bound="TinyPerson")
@@ -44,6 +46,7 @@ config = utils.read_config_file()
 default = {}
 default["embedding_model"] = config["OpenAI"].get("EMBEDDING_MODEL", "text-embedding-3-small")
 default["max_content_display_length"] = config["OpenAI"].getint("MAX_CONTENT_DISPLAY_LENGTH", 1024)
+default["weak_registries"] = config["Simulation"].getboolean("WEAK_REGISTRIES", False)
 
 
 ## LLaMa-Index configs ########################################################
@@ -83,8 +86,13 @@ class TinyPerson(JsonSerializableRegistry):
 
     serializable_attributes = ["name", "episodic_memory", "semantic_memory", "_mental_faculties", "_configuration"]
 
-    # A dict of all agents instantiated so far.
-    all_agents = {}  # name -> agent
+    # Attributes that are not plain data, and therefore are either encoded by their own means in complete states or not at all.
+    _COMPLETE_STATE_SEPARATELY_ENCODED_ATTRIBUTES = {"environment", "_accessible_agents", "episodic_memory", "semantic_memory", "_mental_faculties"}
+
+    # A registry of all agents instantiated so far, which can be used just like a dict. If registries are weak, 
+    # agents are dropped from it as soon as they are no longer referenced elsewhere. In any case, agents created within
+    # `TinyPerson.all_agents.scope()` are dropped from it upon exiting the scope.
+    all_agents = utils.ObjectRegistry(weak=default["weak_registries"])  # name -> agent
 
     # The communication style for all agents: "simplified" or "full".
     communication_style:str="simplified"
@@ -146,9 +154,9 @@ class TinyPerson(JsonSerializableRegistry):
         # consumed by the environment yet.
         self._actions_buffer = []
 
-        # The list of agents that this agent can currently interact with.
+        # The agents that this agent can currently interact with, by name and in the order they were made accessible.
         # This can change over time, as agents move around the world.
-        self._accessible_agents = []
+        self._accessible_agents = {}
 
         # the buffer of communications that have been displayed so far, used for
         # saving these communications to another output form later (e.g., caching)
@@ -290,6 +298,51 @@ class TinyPerson(JsonSerializableRegistry):
         Otherwise, the value is added to the specified group.
         """
 
+        self._define_without_prompt_reset(key, value, group=group)
+
+        # must reset prompt after adding to configuration
+        self.reset_prompt()
+
+    def define_several(self, group, records):
+        """
+        Define several values to the TinyPerson's configuration, all belonging to the same group.
+        """
+        for record in records:
+            self.define(key=None, value=record, group=group)
+    
+    @transactional
+    def define_many(self, configuration:dict):
+        """
+        Define several values to the TinyPerson's configuration at once, in a single transaction and rendering the prompt
+        only once. Lists are added to the corresponding groups (as in `define_several`), while any other value is defined 
+        at the top level (as in `define`).
+
+        Args:
+            configuration (dict): The values to define, e.g., {"age": 30, "skills": [{"skill": "..."}, ...]}.
+        """
+        for key, value in configuration.items():
+            if isinstance(value, list):
+                if not isinstance(self._configuration.get(key), list):
+                    self._configuration[key] = []
+                
+                for record in value:
+                    self._define_without_prompt_reset(key=None, value=record, group=key)
+            else:
+                self._define_without_prompt_reset(key, value)
+
+        # must reset prompt after adding to configuration
+        self.reset_prompt()
+
+    @staticmethod
+    def from_configuration(name:str, configuration:dict) -> "TinyPerson":
+        """
+        Creates a TinyPerson with the specified name and configuration (see `define_many`).
+        """
+        agent = TinyPerson(name)
+        agent.define_many(configuration)
+        return agent
+
+    def _define_without_prompt_reset(self, key, value, group=None):
         # dedent value if it is a string
         if isinstance(value, str):
             value = textwrap.dedent(value)
@@ -304,16 +357,6 @@ class TinyPerson(JsonSerializableRegistry):
             else:
                 # logger.debug(f"[{self.name}] Adding definition to {group} += [ {value} ] in the person.")
                 self._configuration[group].append(value)
-
-        # must reset prompt after adding to configuration
-        self.reset_prompt()
-
-    def define_several(self, group, records):
-        """
-        Define several values to the TinyPerson's configuration, all belonging to the same group.
-        """
-        for record in records:
-            self.define(key=None, value=record, group=group)
     
     @transactional
     def define_relationships(self, relationships, replace=True):
@@ -475,8 +518,6 @@ class TinyPerson(JsonSerializableRegistry):
                     "content": "I'm considering what to do next."
                 }
             
-            self.episodic_memory.store({'role': role, 'content': content, 'simulation_timestamp': self.iso_datetime()})
-            
             cognitive_state = content["cognitive_state"]
             
             # Ensure cognitive_state has required fields
@@ -487,6 +528,9 @@ class TinyPerson(JsonSerializableRegistry):
             if "emotions" not in cognitive_state:
                 cognitive_state["emotions"] = ["neutral"]
             
+            # memory keeps a read-only copy, so the content must be complete by now
+            self._store_in_memory({'role': role, 'content': content, 'simulation_timestamp': self.iso_datetime()})
+            
             action = content['action']
             
             self._actions_buffer.append(action)
@@ -644,7 +688,7 @@ class TinyPerson(JsonSerializableRegistry):
         # whatever comes from the outside will be interpreted as coming from 'user', simply because
         # this is the counterpart of 'assistant'
 
-        self.episodic_memory.store({'role': 'user', 'content': content, 'simulation_timestamp': self.iso_datetime()})
+        self._store_in_memory({'role': 'user', 'content': content, 'simulation_timestamp': self.iso_datetime()})
 
         if TinyPerson.communication_display:
             self._display_communication(
@@ -657,6 +701,23 @@ class TinyPerson(JsonSerializableRegistry):
 
         return self  # allows easier chaining of methods
 
+    @staticmethod
+    def _observe_shared(agents: list, stimulus: dict, simulation_timestamp: str=None) -> "EpisodicMemoryEntry":
+        """
+        Makes several agents observe the same stimulus at once. The corresponding message is built only once, as a 
+        read-only memory entry that all their memories refer to. Contrary to `_observe`, nothing is displayed, and no
+        transaction is started, so this is meant to be used within a transaction of the caller (e.g., an environment).
+
+        Returns:
+            EpisodicMemoryEntry: The shared entry.
+        """
+        entry = EpisodicMemoryEntry("user", {"stimuli": [stimulus]}, simulation_timestamp)
+
+        for agent in agents:
+            agent._store_in_memory(entry)
+        
+        return entry
+
     @transactional
     def listen_and_act(
         self,
@@ -782,23 +843,42 @@ class TinyPerson(JsonSerializableRegistry):
         """
         Makes an agent accessible to this agent.
         """
-        if agent not in self._accessible_agents:
-            self._accessible_agents.append(agent)
-            self._configuration["currently_accessible_agents"].append(
-                {"name": agent.name, "relation_description": relation_description}
-            )
+        if agent.name not in self._accessible_agents:
+            self._add_accessible_agent(agent, relation_description)
         else:
             logger.warning(
                 f"[{self.name}] Agent {agent.name} is already accessible to {self.name}."
             )
 
+    @transactional
+    def make_agents_accessible(
+        self,
+        agents: list,
+        relation_description: str = "An agent I can currently interact with.",
+    ):
+        """
+        Makes several agents accessible to this agent at once. Agents that are already accessible, as well as this agent
+        itself, are skipped.
+        """
+        for agent in agents:
+            if agent is not self and agent.name not in self._accessible_agents:
+                self._add_accessible_agent(agent, relation_description)
+
+    def _add_accessible_agent(self, agent: Self, relation_description: str):
+        self._accessible_agents[agent.name] = agent
+        self._configuration["currently_accessible_agents"].append(
+            {"name": agent.name, "relation_description": relation_description}
+        )
+
     @transactional
     def make_agent_inaccessible(self, agent: Self):
         """
         Makes an agent inaccessible to this agent.
         """
-        if agent in self._accessible_agents:
-            self._accessible_agents.remove(agent)
+        if agent.name in self._accessible_agents:
+            del self._accessible_agents[agent.name]
+            self._configuration["currently_accessible_agents"] = \
+                [record for record in self._configuration["currently_accessible_agents"] if record["name"] != agent.name]
         else:
             logger.warning(
                 f"[{self.name}] Agent {agent.name} is already inaccessible to {self.name}."
@@ -809,9 +889,22 @@ class TinyPerson(JsonSerializableRegistry):
         """
         Makes all agents inaccessible to this agent.
         """
-        self._accessible_agents = []
+        self._accessible_agents = {}
         self._configuration["currently_accessible_agents"] = []
 
+    def is_agent_accessible(self, agent: Self) -> bool:
+        """
+        Checks whether the specified agent is currently accessible to this agent, in O(1) time.
+        """
+        return self._accessible_agents.get(agent.name) is agent
+
+    @property
+    def accessible_agents(self) -> list:
+        """
+        The agents currently accessible to this agent, in the order they were made accessible.
+        """
+        return list(self._accessible_agents.values())
+
     # @transactional
     # def _produce_message(self):
     #     # logger.debug(f"Current messages: {self.current_messages}")
@@ -903,6 +996,30 @@ class TinyPerson(JsonSerializableRegistry):
         except Exception as e:
             raise ValueError(f"Unexpected response format: {raw_response}") from e
 
+    def _store_in_memory(self, message:dict):
+        """
+        Stores a message in the episodic memory and, if the environment keeps an interaction log, records it there too.
+        Both refer to the same read-only entry.
+        """
+        entry = EpisodicMemoryEntry.from_value(message)
+        self.episodic_memory.store(entry)
+
+        interaction_log = getattr(self.environment, "interaction_log", None)
+        if interaction_log is not None:
+            interaction_log.record_message(self.name, entry)
+
+    def interaction_log_view(self):
+        """
+        Returns a view of this agent's interactions in the interaction log of its environment (see `InteractionLog`), 
+        if there is one and it covers the whole episodic memory of the agent. Otherwise, returns None, and the memory
+        itself must be read instead.
+        """
+        interaction_log = getattr(self.environment, "interaction_log", None)
+        if interaction_log is not None and interaction_log.message_count(self.name) == self.episodic_memory.count():
+            return interaction_log.view(self.name)
+        
+        return None
+
     ###########################################################
     # Internal cognitive state changes
     ###########################################################
@@ -1124,10 +1241,12 @@ class TinyPerson(JsonSerializableRegistry):
         content,
         simplified=True,
         max_content_length=default["max_content_display_length"],
+        target_name:str=None,
     ) -> list:
         """
-        Pretty prints stimuli.
+        Pretty prints stimuli, as received by the specified target (by default, this agent).
         """
+        target_name = self.name if target_name is None else target_name
 
         lines = []
         msg_simplified_actor = "USER"
@@ -1163,7 +1282,7 @@ class TinyPerson(JsonSerializableRegistry):
                     rich_style = "italic"
 
                 lines.append(
-                    f"[{rich_style}][underline]{msg_simplified_actor}[/] --> [{rich_style}][underline]{self.name}[/]: [{msg_simplified_type}] \n{msg_simplified_content}[/]"
+                    f"[{rich_style}][underline]{msg_simplified_actor}[/] --> [{rich_style}][underline]{target_name}[/]: [{msg_simplified_type}] \n{msg_simplified_content}[/]"
                 )
             else:
                 lines.append(f"{role}: {content}")
@@ -1294,18 +1413,18 @@ class TinyPerson(JsonSerializableRegistry):
         Encodes the complete state of the TinyPerson, including the current messages, accessible agents, etc.
         This is meant for serialization and caching purposes, not for exporting the state to the user.
         """
-        to_copy = copy.copy(self.__dict__)
-
-        # delete the logger and other attributes that cannot be serialized
-        del to_copy["environment"]
-        del to_copy["_mental_faculties"]
+        # Everything is copied exactly once: plain fields here, and the other components by their own encoders,
+        # which already return fresh structures.
+        state = {}
+        for key, value in self.__dict__.items():
+            # skip the environment and other attributes that cannot be serialized, as well as the ones encoded below
+            if key not in TinyPerson._COMPLETE_STATE_SEPARATELY_ENCODED_ATTRIBUTES:
+                state[key] = utils.copy_json_structure(value)
 
-        to_copy["_accessible_agents"] = [agent.name for agent in self._accessible_agents]
-        to_copy['episodic_memory'] = self.episodic_memory.to_json()
-        to_copy['semantic_memory'] = self.semantic_memory.to_json()
-        to_copy["_mental_faculties"] = [faculty.to_json() for faculty in self._mental_faculties]
-
-        state = copy.deepcopy(to_copy)
+        state["_accessible_agents"] = list(self._accessible_agents.keys())
+        state['episodic_memory'] = self.episodic_memory.encode_complete_state()
+        state['semantic_memory'] = self.semantic_memory.to_json()
+        state["_mental_faculties"] = [faculty.to_json() for faculty in self._mental_faculties]
 
         return state
 
@@ -1314,23 +1433,19 @@ class TinyPerson(JsonSerializableRegistry):
         Loads the complete state of the TinyPerson, including the current messages,
         and produces a new TinyPerson instance.
         """
-        state = copy.deepcopy(state)
-        
-        self._accessible_agents = [TinyPerson.get_agent_by_name(name) for name in state["_accessible_agents"]]
-        self.episodic_memory = EpisodicMemory.from_json(state['episodic_memory'])
+        # The given state is never modified nor aliased, since it might be a snapshot kept in the simulation cache.
+        # Each component copies what it takes from it exactly once.
+        self._accessible_agents = {name: TinyPerson.get_agent_by_name(name) for name in state["_accessible_agents"]}
+        self.episodic_memory.decode_complete_state(state['episodic_memory'])
         self.semantic_memory = SemanticMemory.from_json(state['semantic_memory'])
-        
+
         for i, faculty in enumerate(self._mental_faculties):
             faculty = faculty.from_json(state['_mental_faculties'][i])
 
-        # delete fields already present in the state
-        del state["_accessible_agents"]
-        del state['episodic_memory']
-        del state['semantic_memory']
-        del state['_mental_faculties']
-
         # restore other fields
-        self.__dict__.update(state)
+        for key, value in state.items():
+            if key not in TinyPerson._COMPLETE_STATE_SEPARATELY_ENCODED_ATTRIBUTES:
+                self.__dict__[key] = utils.copy_json_structure(value)
 
 
         return self
@@ -1359,10 +1474,8 @@ class TinyPerson(JsonSerializableRegistry):
         Adds an agent to the global list of agents. Agent names must be unique,
         so this method will raise an exception if the name is already in use.
         """
-        if agent.name in TinyPerson.all_agents:
+        if not TinyPerson.all_agents.register(agent.name, agent):
             raise ValueError(f"Agent name {agent.name} is already in use.")
-        else:
-            TinyPerson.all_agents[agent.name] = agent
 
     @staticmethod
     def has_agent(agent_name: str):
@@ -1386,17 +1499,14 @@ class TinyPerson(JsonSerializableRegistry):
         """
         Gets an agent by name.
         """
-        if name in TinyPerson.all_agents:
-            return TinyPerson.all_agents[name]
-        else:
-            return None
+        return TinyPerson.all_agents.get(name)
 
     @staticmethod
     def clear_agents():
         """
         Clears the global list of agents.
         """
-        TinyPerson.all_agents = {}        
+        TinyPerson.all_agents.clear()
 
 
 
@@ -1698,6 +1808,97 @@ class TinyMemory(TinyMentalFaculty):
 
 
 
+class EpisodicMemoryEntry(Mapping):
+    """
+    A compact, read-only record of a single episodic memory value, that is, of a message such as
+    `{'role': ..., 'content': ..., 'simulation_timestamp': ...}`. It behaves like that dict when read, but takes
+    a fraction of its space, and the small, highly repetitive strings it refers to (role, timestamp, and the types, 
+    sources and targets of stimuli and actions) are interned, so that they are shared by all entries.
+
+    Entries can't be modified, neither their attributes nor their content, which is a read-only copy of the given one
+    (see `utils.freeze_json_structure`). So they can be shared (e.g., by all the agents that observed the same 
+    broadcast), and their encodings reused (see `EpisodicMemory.encode_complete_state`).
+    """
+
+    __slots__ = ["role", "content", "simulation_timestamp"]
+
+    KEYS = ("role", "content", "simulation_timestamp")
+
+    def __init__(self, role: str, content: Any, simulation_timestamp: str=None):
+        # intern repetitive strings within the content as well
+        if isinstance(content, dict):
+            for stimulus in content.get("stimuli", []) if isinstance(content.get("stimuli"), list) else []:
+                EpisodicMemoryEntry._intern_fields(stimulus, ["type", "source"])
+            EpisodicMemoryEntry._intern_fields(content.get("action"), ["type", "target"])
+
+        object.__setattr__(self, "role", EpisodicMemoryEntry._intern(role))
+        object.__setattr__(self, "content", utils.freeze_json_structure(content))
+        object.__setattr__(self, "simulation_timestamp", EpisodicMemoryEntry._intern(simulation_timestamp))
+
+    @staticmethod
+    def from_value(value: Any, copy_content: bool=False) -> Any:
+        """
+        Converts a memory value to an entry, if it has the form of a message. Other values are returned as they are.
+
+        Args:
+            value (Any): The value to convert.
+            copy_content (bool): Whether values other than messages must be copied, so that they do not alias the given 
+                value. Entries never do, since they keep a read-only copy of the content.
+        """
+        if type(value) is EpisodicMemoryEntry:
+            # entries are read-only, so they can be shared (e.g., by all the agents that observed the same broadcast)
+            return value
+        elif isinstance(value, Mapping) and len(value) == len(EpisodicMemoryEntry.KEYS) and all(key in value for key in EpisodicMemoryEntry.KEYS):
+            # the content is always copied by the entry
+            return EpisodicMemoryEntry(value["role"], value["content"], value["simulation_timestamp"])
+        else:
+            return utils.copy_json_structure(value) if copy_content else value
+
+    def to_dict(self) -> dict:
+        return {"role": self.role, "content": self.content, "simulation_timestamp": self.simulation_timestamp}
+
+    def __getitem__(self, key):
+        if key in EpisodicMemoryEntry.KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def __iter__(self):
+        return iter(EpisodicMemoryEntry.KEYS)
+    
+    def __len__(self):
+        return len(EpisodicMemoryEntry.KEYS)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"'{type(self).__name__}' object is read-only.")
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (EpisodicMemoryEntry, (self.role, self.content, self.simulation_timestamp))
+
+    @staticmethod
+    def _intern(value):
+        return sys.intern(value) if type(value) is str else value
+
+    @staticmethod
+    def _intern_fields(d, keys: list):
+        # read-only dicts come from other entries, so they were interned already
+        if isinstance(d, dict) and type(d) is not utils.ReadOnlyDict:
+            for key in keys:
+                if type(d.get(key)) is str:
+                    d[key] = sys.intern(d[key])
+
+
 class EpisodicMemory(TinyMemory):
     """
     Provides episodic memory capabilities to an agent. Cognitively, episodic memory is the ability to remember specific events,
@@ -1709,6 +1910,11 @@ class EpisodicMemory(TinyMemory):
 
     MEMORY_BLOCK_OMISSION_INFO = {'role': 'assistant', 'content': "Info: there were other messages here, but they were omitted for brevity.", 'simulation_timestamp': None}
 
+    suppress_attributes_from_serialization = ["_encoded_memory_cache"]
+
+    # values are kept as compact entries in memory, but serialized as plain dicts
+    custom_serialization_initializers = {"memory": lambda values: [EpisodicMemoryEntry.from_value(value, copy_content=True) for value in values]}
+
     def __init__(
         self, fixed_prefix_length: int = 100, lookback_length: int = 100
     ) -> None:
@@ -1726,9 +1932,9 @@ class EpisodicMemory(TinyMemory):
 
     def store(self, value: Any) -> None:
         """
-        Stores a value in memory.
+        Stores a value in memory. Messages are stored as compact entries (see `EpisodicMemoryEntry`).
         """
-        self.memory.append(value)
+        self.memory.append(EpisodicMemoryEntry.from_value(value))
 
     def count(self) -> int:
         """
@@ -1811,6 +2017,58 @@ class EpisodicMemory(TinyMemory):
 
         return omisssion_info + self.memory[-n:]
 
+    ###########################################################
+    # Simulation state encoding
+    ###########################################################
+
+    def encode_complete_state(self) -> dict:
+        """
+        Encodes the complete state of the memory. Since the memory is append-only, each stored value is copied only
+        the first time it is encoded, and that copy is then shared by all subsequent encoded states. 
+        So encoded states must be treated as immutable.
+        """
+        encoded_memory = self._encoded_memory_prefix()
+        encoded_memory += [utils.copy_json_structure(value) for value in self.memory[len(encoded_memory):]]
+
+        if len(self.memory) > 0:
+            self._encoded_memory_cache = (self.memory, self.memory[-1], encoded_memory)
+
+        state = self.to_json(suppress=["memory"])
+        state["memory"] = list(encoded_memory)
+        return state
+
+    def decode_complete_state(self, state: dict) -> Self:
+        """
+        Loads the complete state of the memory in-place. The given state is not modified nor aliased.
+        """
+        for key, value in state.items():
+            if key not in ["json_serializable_class_name", "memory"]:
+                self.__dict__[key] = utils.copy_json_structure(value)
+
+        self.memory = [EpisodicMemoryEntry.from_value(value, copy_content=True) for value in state["memory"]]
+
+        # the values in the state are themselves immutable encodings of the memory, so they can be reused later
+        if len(self.memory) > 0:
+            self._encoded_memory_cache = (self.memory, self.memory[-1], list(state["memory"]))
+        else:
+            self._encoded_memory_cache = None
+
+        return self
+
+    def _encoded_memory_prefix(self) -> list:
+        """
+        Returns the previously encoded values that are still valid, that is to say, that still are a prefix
+        of the memory.
+        """
+        cache = getattr(self, "_encoded_memory_cache", None)
+        if cache is not None:
+            cached_memory, cached_last_value, encoded_memory = cache
+            n = len(encoded_memory)
+            if cached_memory is self.memory and n <= len(self.memory) and self.memory[n - 1] is cached_last_value:
+                return list(encoded_memory)
+
+        return []
+
 
 class SemanticMemory(TinyMemory):
     """
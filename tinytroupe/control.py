@@ -3,7 +3,11 @@ Simulation controlling mechanisms.
 """
 import json
 import os
+import mmap
 import tempfile
+import functools
+import contextlib
+from collections import OrderedDict
 
 import tinytroupe
 import tinytroupe.utils as utils
@@ -16,7 +20,10 @@ class Simulation:
     STATUS_STOPPED = "stopped"
     STATUS_STARTED = "started"
 
-    def __init__(self, id="default", cached_trace:list=None):
+    # Cache files with this extension use an indexed layout, so that simulation states are only parsed when needed.
+    INDEXED_TRACE_FILE_EXTENSION = ".trace"
+
+    def __init__(self, id="default", cached_trace:list=None, max_cached_nodes:int=None):
         self.id = id
 
         self.agents = []
@@ -42,16 +49,24 @@ class Simulation:
         # simulation caching later
         self._under_transaction = False
 
-        # Cache chain mechanism.
+        # Cache tree mechanism.
         # 
-        # stores a list of simulation states.
+        # stores the simulation states computed so far, possibly by several divergent executions.
         # Each state is a tuple (prev_node_hash, event_hash, event_output, state), where prev_node_hash is a hash of the previous node in this chain,
         # if any, event_hash is a hash of the event that triggered the transition to this state, if any, event_output is the output of the event,
-        # if any, and state is the actual complete state that resulted.
-        if cached_trace is None:
-            self.cached_trace = []
-        else:
-            self.cached_trace = cached_trace
+        # if any, and state is the actual complete state that resulted. Since each node refers to its previous node by hash, the nodes form a 
+        # tree of trace branches. They are stored by their own node hash, from the least to the most recently used.
+        self.cached_trace = OrderedDict() # {node_hash: node, ...}
+        self._cached_trace_children = {} # {prev_node_hash: {event_hash: node_hash, ...}, ...}
+
+        # the maximum number of cached nodes to keep, or None for no limit. Least recently used branches are evicted first.
+        self.max_cached_nodes = max_cached_nodes
+
+        # the indexed trace file from which cached states are lazily read, if any
+        self._trace_file = None
+
+        if cached_trace is not None:
+            self._set_cached_trace(cached_trace)
 
         # Execution chain mechanism.
         #
@@ -60,14 +75,20 @@ class Simulation:
         # event_output is the output of the event, if any, and state is the actual complete state that resulted.
         self.execution_trace = []
 
-    def begin(self, cache_path:str=None, auto_checkpoint:bool=False):
+        # (node, hash) of the last execution node whose hash was computed, since it is checked at every transaction
+        self._last_execution_node_hash_memo = (None, None)
+
+    def begin(self, cache_path:str=None, auto_checkpoint:bool=False, max_cached_nodes:int=None):
         """
         Marks the start of the simulation being controlled.
 
         Args:
             cache_path (str): The path to the cache file. If not specified, 
-                    defaults to the default cache path defined in the class.
+                    defaults to the default cache path defined in the class. Paths ending with `.trace` use an indexed
+                    layout, whose states are only parsed when needed, which makes large caches much faster to start from.
             auto_checkpoint (bool, optional): Whether to automatically checkpoint at the end of each transaction. Defaults to False.
+            max_cached_nodes (int, optional): The maximum number of cached states to keep across all cached branches. The least 
+                    recently used branches are evicted first. Defaults to None, i.e., no limit.
         """
         # local import to avoid circular dependencies
         from tinytroupe.agent import TinyPerson
@@ -85,6 +106,9 @@ class Simulation:
         # should we automatically checkpoint?
         self.auto_checkpoint = auto_checkpoint
 
+        if max_cached_nodes is not None:
+            self.max_cached_nodes = max_cached_nodes
+
         # clear the agents, environments and other simulated entities, we'll track them from now on
         TinyPerson.clear_agents()
         TinyWorld.clear_environments()
@@ -157,55 +181,97 @@ class Simulation:
         """
         return len(self.execution_trace) - 1
     
-    def _function_call_hash(self, function_name, *args, **kwargs) -> int:
+    def _function_call_hash(self, function_name, *args, **kwargs) -> str:
         """
-        Computes the hash of the given function call.
+        Computes a compact and stable fingerprint of the given function call. The arguments are first
+        canonicalized, so that agents, environments and factories are identified by their names only, 
+        and then hashed. Only the resulting digest is stored in the traces.
         """
-        event = str((function_name, args, kwargs))
-        return event
+        # local import to avoid circular dependencies
+        from tinytroupe.agent import TinyPerson
+        from tinytroupe.environment import TinyWorld
+        from tinytroupe.factory import TinyFactory
+
+        def aux_canonicalize(element):
+            if element is None or isinstance(element, (str, int, float, bool)):
+                return element
+            elif isinstance(element, TinyPerson):
+                return {"TinyPersonRef": element.name}
+            elif isinstance(element, TinyWorld):
+                return {"TinyWorldRef": element.name}
+            elif isinstance(element, TinyFactory):
+                return {"TinyFactoryRef": element.name}
+            elif isinstance(element, (list, tuple)):
+                return [aux_canonicalize(item) for item in element]
+            elif isinstance(element, dict):
+                return {str(key): aux_canonicalize(value) for key, value in element.items()}
+            elif isinstance(element, utils.JsonSerializableRegistry):
+                return element.to_json()
+            else:
+                return str(element)
+
+        event = json.dumps(aux_canonicalize([function_name, args, kwargs]), sort_keys=True, default=str)
+        return utils.custom_hash(event)
 
-    def _skip_execution_with_cache(self):
+    def _skip_execution_with_cache(self, event_hash):
         """
-        Skips the current execution, assuming there's a cached state at the same position.
+        Skips the current execution, assuming there's a cached state for the given event at the current position.
         """
-        assert len(self.cached_trace) > self._execution_trace_position() + 1, "There's no cached state at the current execution position."
+        node_hash = self._cached_continuation_hash(event_hash)
+        assert node_hash is not None, "There's no cached state for this event at the current execution position."
         
-        self.execution_trace.append(self.cached_trace[self._execution_trace_position() + 1])
+        # the node was just used, so it is now the most recently used one
+        self.cached_trace.move_to_end(node_hash)
+
+        self.execution_trace.append(self.cached_trace[node_hash])
     
     def _is_transaction_event_cached(self, event_hash) -> bool:
         """
-        Checks whether the given event hash matches the corresponding cached one, if any.
-        If there's no corresponding cached state, returns True.
-        """
-        # there's cache that could be used
-        if len(self.cached_trace) > self._execution_trace_position() + 1:
-            if self._execution_trace_position() >= -1:
-                # here's a graphical depiction of the logic:
-                #
-                # Cache:         c0:(c_prev_node_hash_0, c_event_hash_0, _,  c_state_0) ------------------> c1:(c_prev_node_hash_1, c_event_hash_1,  _,  c_state_1) -> ...
-                # Execution:     e0:(e_prev_node_hash_0, e_event_hash_0, _,  e_state_0) -<being computed>-> e1:(e_prev_node_hash_1, <being computed>, <being computed>, <being computed>)
-                #   position = 0 ^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
-                #
-                #   Must satisfy: 
-                #     - event_hash == c_event_hash_1
-                #     - hash(e0) == c_prev_node_hash_1
-                event_hash_match = event_hash == self.cached_trace[self._execution_trace_position() + 1][1]
-                prev_node_match = True 
-
-                return event_hash_match and prev_node_match
-            
-            else: 
-                raise ValueError("Execution trace position is invalid, must be >= -1, but is ", self._execution_trace_position())
-        
-        else: # no cache to use
-            return False
+        Checks whether there is a cached state resulting from the given event at the current execution position.
+        If there's no corresponding cached state, returns False.
+        """
+        # here's a graphical depiction of the logic:
+        #
+        # Cache:         c0:(c_prev_node_hash_0, c_event_hash_0, _,  c_state_0) -+----------------> c1:(c_prev_node_hash_1, c_event_hash_1,  _,  c_state_1) -> ...
+        #                                                                        +----------------> c1':(c_prev_node_hash_1', c_event_hash_1',  _,  c_state_1') -> ...
+        # Execution:     e0:(e_prev_node_hash_0, e_event_hash_0, _,  e_state_0) -<being computed>-> e1:(e_prev_node_hash_1, <being computed>, <being computed>, <being computed>)
+        #
+        #   Must find a cached node c1 that satisfies: 
+        #     - event_hash == c_event_hash_1
+        #     - hash(e0) == c_prev_node_hash_1
+        #
+        #   The children index maps (hash(e0), event_hash) to such a node directly, regardless of how many branches are cached.
+        return self._cached_continuation_hash(event_hash) is not None
+
+    def _cached_continuation_hash(self, event_hash) -> str:
+        """
+        Returns the hash of the cached node that follows the last execution node through the given event, or None if there's none.
+        """
+        return self._cached_trace_children.get(self._last_execution_node_hash(), {}).get(event_hash)
     
-    def _drop_cached_trace_suffix(self):
+    def _node_hash(self, node) -> str:
+        """
+        Computes the chained hash of the given trace node. Only the previous node hash, the event hash and a digest 
+        of the event output are considered, since these already determine the resulting state. Hence, the cost does not 
+        depend on the size of the (potentially very large) simulation state.
+        """
+        prev_node_hash, event_hash, event_output, _ = node
+        output_digest = utils.custom_hash(json.dumps(event_output, sort_keys=True, default=str))
+
+        return utils.custom_hash(f"{prev_node_hash}|{event_hash}|{output_digest}")
+
+    def _last_execution_node_hash(self) -> str:
         """
-        Drops the cached trace suffix starting at the current execution trace position. This effectively
-        refreshes the cache to the current execution state and starts building a new cache from there.
+        Returns the hash of the last node in the execution trace, or None if the execution trace is empty.
         """
-        self.cached_trace = self.cached_trace[:self._execution_trace_position()+1]
+        if not self.execution_trace:
+            return None
+
+        last_node = self.execution_trace[-1]
+        if self._last_execution_node_hash_memo[0] is not last_node:
+            self._last_execution_node_hash_memo = (last_node, self._node_hash(last_node))
+
+        return self._last_execution_node_hash_memo[1]
         
     def _add_to_execution_trace(self, state: dict, event_hash: int, event_output):
         """
@@ -216,52 +282,160 @@ class Simulation:
         is aborted.
         """
         
-        # Compute the hash of the previous execution pair, if any
-        previous_hash = None
+        # Compute the hash of the previous execution node, if any
+        previous_hash = self._last_execution_node_hash()
 
         # Create a tuple of (hash, state) and append it to the execution_trace list
         self.execution_trace.append((previous_hash, event_hash, event_output, state))
 
     def _add_to_cache_trace(self, state: dict, event_hash: int, event_output):
         """
-        Adds a state to the cached_trace list and computes the appropriate hash.
+        Adds a state to the cache tree, as a continuation of the last execution node. Other cached
+        continuations of that node, if any, are kept as alternative branches.
         """
-        # Compute the hash of the previous cached pair, if any
-        previous_hash = None
-        if self.cached_trace:
-            previous_hash = utils.custom_hash(self.cached_trace[-1])
+        # The new node follows the current execution, which might have diverged from previously cached branches
+        previous_hash = self._last_execution_node_hash()
         
-        # Create a tuple of (hash, state) and append it to the cached_trace list
-        self.cached_trace.append((previous_hash, event_hash, event_output, state))
+        node_hash = self._insert_cached_node((previous_hash, event_hash, event_output, state))
+        self._evict_cached_nodes_if_needed(protected_node_hash=node_hash)
 
         self.has_unsaved_cache_changes = True
-    
+
+    def _set_cached_trace(self, nodes: list):
+        """
+        Replaces the cache tree with the given nodes, ordered from the least to the most recently used.
+        """
+        self.cached_trace = OrderedDict()
+        self._cached_trace_children = {}
+        for node in nodes:
+            self._insert_cached_node(tuple(node))
+
+    def _insert_cached_node(self, node) -> str:
+        """
+        Inserts a node in the cache tree as the most recently used one, and returns its hash.
+        """
+        node_hash = self._node_hash(node)
+        
+        self.cached_trace[node_hash] = node
+        self.cached_trace.move_to_end(node_hash)
+        self._cached_trace_children.setdefault(node[0], {})[node[1]] = node_hash
+
+        return node_hash
+
+    def _remove_cached_node(self, node_hash:str):
+        """
+        Removes a node from the cache tree.
+        """
+        prev_node_hash, event_hash, _, _ = self.cached_trace.pop(node_hash)
+
+        siblings = self._cached_trace_children.get(prev_node_hash, {})
+        if siblings.get(event_hash) == node_hash:
+            del siblings[event_hash]
+            if not siblings:
+                del self._cached_trace_children[prev_node_hash]
+
+    def _evict_cached_nodes_if_needed(self, protected_node_hash:str):
+        """
+        Evicts the least recently used leaves of the cache tree until the maximum number of cached nodes is respected.
+        The branch leading to the protected node (i.e., the current execution) is never evicted.
+        """
+        if self.max_cached_nodes is None or len(self.cached_trace) <= self.max_cached_nodes:
+            return
+        
+        protected = set()
+        node_hash = protected_node_hash
+        while node_hash is not None and node_hash in self.cached_trace:
+            protected.add(node_hash)
+            node_hash = self.cached_trace[node_hash][0]
+
+        evicted_any = True
+        while len(self.cached_trace) > self.max_cached_nodes and evicted_any:
+            evicted_any = False
+            # iterate from the least to the most recently used node
+            for node_hash in list(self.cached_trace.keys()):
+                if len(self.cached_trace) <= self.max_cached_nodes:
+                    break
+
+                if node_hash not in protected and node_hash not in self._cached_trace_children:
+                    self._remove_cached_node(node_hash)
+                    evicted_any = True
+        
+        if len(self.cached_trace) > self.max_cached_nodes:
+            logger.warning(f"The current execution alone requires {len(self.cached_trace)} cached nodes, more than the maximum of {self.max_cached_nodes}.")
+
     def _load_cache_file(self, cache_path:str):
         """
-        Loads the cache file from the given path.
+        Loads the cache file from the given path. For indexed trace files, only the node headers are read,
+        and states are parsed later, on demand.
         """
+        self._close_trace_file()
         try:
-            self.cached_trace = json.load(open(cache_path, "r"))
+            if cache_path.endswith(Simulation.INDEXED_TRACE_FILE_EXTENSION):
+                self._trace_file = IndexedTraceFile(cache_path)
+                self._set_cached_trace(self._trace_file.read_nodes())
+            else:
+                self._set_cached_trace(utils.read_serialized_file(cache_path))
         except FileNotFoundError:
             logger.info(f"Cache file not found on path: {cache_path}.")
-            self.cached_trace = []
+            self._set_cached_trace([])
         
     def _save_cache_file(self, cache_path:str):
         """
-        Saves the cache file to the given path. Always overwrites.
+        Saves the cache file to the given path. Always overwrites. The file format depends on the extension
+        of the path: either an indexed trace file (see `IndexedTraceFile`) or some format supported by
+        `utils.write_serialized_file`. JSON cache files are not indented, since they can get very large.
         """
         try:
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile('w', delete=False) as temp:
-                json.dump(self.cached_trace, temp, indent=4)
+            nodes = list(self.cached_trace.values())
+            indexed = cache_path.endswith(Simulation.INDEXED_TRACE_FILE_EXTENSION)
+
+            # Create a temporary file, in the same folder so that the replacement below is atomic
+            with tempfile.NamedTemporaryFile('wb', delete=False, dir=os.path.dirname(os.path.abspath(cache_path))) as temp:
+                if indexed:
+                    locations = IndexedTraceFile.write_nodes(temp, nodes)
+                else:
+                    temp.write(utils.serialize([Simulation._materialized_node(node) for node in nodes], 
+                                               utils.serialization_format_for(cache_path)))
+
+            # States not yet parsed have been copied from the currently open trace file, which must be closed before 
+            # being replaced, and then reopened.
+            self._close_trace_file()
 
             # Replace the original file with the temporary file
             os.replace(temp.name, cache_path)
+
+            if indexed:
+                self._trace_file = IndexedTraceFile(cache_path)
+                for node, (offset, length) in zip(nodes, locations):
+                    if isinstance(node[3], LazyTraceState):
+                        node[3].rebind(self._trace_file, offset, length)
+
         except Exception as e:
             print(f"An error occurred: {e}")
 
         self.has_unsaved_cache_changes = False
 
+    def _close_trace_file(self):
+        if self._trace_file is not None:
+            self._trace_file.close()
+            self._trace_file = None
+
+    @staticmethod
+    def _node_state(node) -> dict:
+        """
+        Returns the state of the given trace node, parsing it first if it was lazily loaded.
+        """
+        state = node[3]
+        if isinstance(state, LazyTraceState):
+            return state.load()
+        return state
+
+    @staticmethod
+    def _materialized_node(node) -> tuple:
+        if isinstance(node[3], LazyTraceState):
+            return (node[0], node[1], node[2], node[3].load())
+        return node
+
     
 
     ###################################################################################################
@@ -307,15 +481,23 @@ class Simulation:
         """
         state = {}
 
-        # Encode agents
+        # Encode agents. Each agent is encoded exactly once, including those that are only 
+        # reachable through some environment.
         state["agents"] = []
+        encoded_agent_names = set()
         for agent in self.agents:
             state["agents"].append(agent.encode_complete_state())
+            encoded_agent_names.add(agent.name)
         
-        # Encode environments
+        # Encode environments, which reference their agents by name
         state["environments"] = []
         for environment in self.environments:
-            state["environments"].append(environment.encode_complete_state())
+            state["environments"].append(environment.encode_complete_state(agents_by_name=True))
+
+            for agent in environment.agents:
+                if agent.name not in encoded_agent_names:
+                    state["agents"].append(agent.encode_complete_state())
+                    encoded_agent_names.add(agent.name)
         
         # Encode factories
         state["factories"] = []
@@ -358,11 +540,16 @@ class Simulation:
             except Exception as e:
                 raise ValueError(f"Environment {environment_state['name']} is not in the simulation, thus cannot be decoded there.") from e
 
-        # Decode agents (if they were not already decoded by the environment)
+        # Decode agents. Older snapshots also have agent states within environments, in which case they are
+        # decoded twice, harmlessly.
         ####self.agents = []
         for agent_state in state["agents"]:
             try:
-                agent = self.name_to_agent[agent_state["name"]]
+                if agent_state["name"] in self.name_to_agent:
+                    agent = self.name_to_agent[agent_state["name"]]
+                else:
+                    # agents might be reachable only through some environment of the simulation
+                    agent = TinyPerson.get_agent_by_name(agent_state["name"])
                 agent.decode_complete_state(agent_state)
                 
                 # The agent has not yet been decoded because it is not in any environment. So, decode it.
@@ -373,6 +560,95 @@ class Simulation:
                 raise ValueError(f"Agent {agent_state['name']} is not in the simulation, thus cannot be decoded there.") from e        
 
 
+class IndexedTraceFile:
+    """
+    A cache file layout that allows simulation states to be parsed only when needed. The file consists of
+    a magic line, followed by each serialized state, then by an index with the header of each node (i.e., previous 
+    node hash, event hash, event output, and the location of the state), and finally by a fixed-length footer 
+    with the offset of the index. The file is memory-mapped, so states are read directly from the OS page cache.
+    """
+
+    MAGIC = b"TINYTROUPE-INDEXED-TRACE 1\n"
+    FOOTER_LENGTH = 21 # 20 digits plus a newline
+
+    def __init__(self, path:str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(IndexedTraceFile.MAGIC)] != IndexedTraceFile.MAGIC:
+            self.close()
+            raise ValueError(f"File {path} is not an indexed trace file.")
+
+    def read_nodes(self) -> list:
+        """
+        Reads the headers of all nodes in the file, whose states are lazily loaded.
+        """
+        index_offset = int(self._mmap[-IndexedTraceFile.FOOTER_LENGTH:])
+        index = utils.deserialize(self._mmap[index_offset:-IndexedTraceFile.FOOTER_LENGTH])
+
+        return [(prev_node_hash, event_hash, event_output, LazyTraceState(self, offset, length)) 
+                for prev_node_hash, event_hash, event_output, offset, length in index]
+
+    def read(self, offset:int, length:int) -> bytes:
+        return self._mmap[offset:offset + length]
+
+    def close(self):
+        self._mmap.close()
+
+    @staticmethod
+    def write_nodes(f, nodes:list) -> list:
+        """
+        Writes the given nodes to the given binary file object. States not yet parsed are copied as they are.
+
+        Returns:
+            list: The (offset, length) of each state in the file.
+        """
+        f.write(IndexedTraceFile.MAGIC)
+        offset = len(IndexedTraceFile.MAGIC)
+
+        index = []
+        locations = []
+        for prev_node_hash, event_hash, event_output, state in nodes:
+            if isinstance(state, LazyTraceState):
+                data = state.raw()
+            else:
+                data = utils.serialize(state)
+            
+            f.write(data)
+            index.append((prev_node_hash, event_hash, event_output, offset, len(data)))
+            locations.append((offset, len(data)))
+            offset += len(data)
+
+        f.write(utils.serialize(index))
+        f.write(b"%020d\n" % offset)
+
+        return locations
+
+
+class LazyTraceState:
+    """
+    A simulation state stored in an indexed trace file, which is only parsed when loaded. Each load 
+    returns a freshly parsed state.
+    """
+
+    __slots__ = ["trace_file", "offset", "length"]
+
+    def __init__(self, trace_file:IndexedTraceFile, offset:int, length:int):
+        self.rebind(trace_file, offset, length)
+
+    def rebind(self, trace_file:IndexedTraceFile, offset:int, length:int):
+        self.trace_file = trace_file
+        self.offset = offset
+        self.length = length
+
+    def raw(self) -> bytes:
+        return self.trace_file.read(self.offset, self.length)
+    
+    def load(self) -> dict:
+        return utils.deserialize(self.raw())
+
+
 class Transaction:
 
     def __init__(self, obj_under_transaction, simulation, function, *args, **kwargs):
@@ -397,7 +673,8 @@ class Transaction:
                     raise ValueError(f"Object {obj_under_transaction} is already captured by a different simulation (id={obj_under_transaction.simulation_id}), \
                                     and cannot be captured by simulation id={simulation.id}.")
                 
-                logger.debug(f">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> Object {obj_under_transaction} is already captured by simulation {simulation.id}.")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f">>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>> Object {obj_under_transaction} is already captured by simulation {simulation.id}.")
             else:
                 # if is a TinyPerson, add the agent to the simulation
                 if isinstance(obj_under_transaction, TinyPerson):
@@ -426,6 +703,11 @@ class Transaction:
             # Compute the function and return it, no caching, since the simulation is not started
             output = self.function(*self.args, **self.kwargs)
         
+        elif self.simulation.status == Simulation.STATUS_STARTED and self.simulation.is_under_transaction():
+            # reentrant transactions are just run, but not cached, since what matters is the final result of
+            # the top-level transaction
+            output = self.function(*self.args, **self.kwargs)
+
         elif self.simulation.status == Simulation.STATUS_STARTED:
             # Compute the event hash
             event_hash = self.simulation._function_call_hash(self.function_name, *self.args, **self.kwargs)
@@ -433,28 +715,22 @@ class Transaction:
             # Check if the event hash is in the cache
             if self.simulation._is_transaction_event_cached(event_hash):
                 # Restore the full state and return the cached output
-                logger.info(f"Skipping execution of {self.function_name} with args {self.args} and kwargs {self.kwargs} because it is already cached.")
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info(f"Skipping execution of {self.function_name} with args {self.args} and kwargs {self.kwargs} because it is already cached.")
 
-                self.simulation._skip_execution_with_cache()
-                state = self.simulation.cached_trace[self.simulation._execution_trace_position()][3] # state
+                self.simulation._skip_execution_with_cache(event_hash)
+                state = Simulation._node_state(self.simulation.execution_trace[-1])
                 self.simulation._decode_simulation_state(state)
                 
                 # Output encoding/decoding is used to preserve references to TinyPerson and TinyWorld instances
                 # mainly. Scalar values (int, float, str, bool) and composite values (list, dict) are 
                 # encoded/decoded as is.
-                encoded_output = self.simulation.cached_trace[self.simulation._execution_trace_position()][2] # output
+                encoded_output = self.simulation.execution_trace[-1][2] # output
                 output = self._decode_function_output(encoded_output)
 
             else: # not cached
-                
-                # reentrant transactions are not cached, since what matters is the final result of
-                # the top-level transaction
-                if not self.simulation.is_under_transaction():
-                    self.simulation.begin_transaction()
-
-                    # immediately drop the cached trace suffix, since we are starting a new execution from this point on
-                    self.simulation._drop_cached_trace_suffix()
-                    
+                self.simulation.begin_transaction()
+                try:
                     # Compute the function, cache the result and return it
                     output = self.function(*self.args, **self.kwargs)
 
@@ -463,11 +739,9 @@ class Transaction:
                                   
                     self.simulation._add_to_cache_trace(state, event_hash, encoded_output)
                     self.simulation._add_to_execution_trace(state, event_hash, encoded_output)
-
+                finally:
+                    # otherwise, a failed transaction would make all subsequent ones look reentrant
                     self.simulation.end_transaction()
-                
-                else: # reentrant transactions are just run, but not cached
-                    output = self.function(*self.args, **self.kwargs)
         else:
             raise ValueError(f"Simulation status is invalid at this point: {self.simulation.status}")
 
@@ -531,12 +805,23 @@ def transactional(func):
     """
     A helper decorator that makes a function simulation-transactional.
     """
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
         obj_under_transaction = args[0]
         simulation = current_simulation()
-        obj_sim_id = obj_under_transaction.simulation_id if hasattr(obj_under_transaction, 'simulation_id') else None
 
-        logger.debug(f"-----------------------------------------> Transaction: {func.__name__} with args {args[1:]} and kwargs {kwargs} under simulation {obj_sim_id}.")
+        # Fast path: without a started simulation, there's nothing to capture or cache.
+        if simulation is None:
+            return func(*args, **kwargs)
+
+        # Fast path: reentrant transactions are just run, but not cached, since what matters is the final 
+        # result of the top-level transaction. Objects not yet captured by the simulation take the full path below.
+        if simulation.is_under_transaction() and getattr(obj_under_transaction, 'simulation_id', None) == simulation.id:
+            return func(*args, **kwargs)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            obj_sim_id = obj_under_transaction.simulation_id if hasattr(obj_under_transaction, 'simulation_id') else None
+            logger.debug(f"-----------------------------------------> Transaction: {func.__name__} with args {args[1:]} and kwargs {kwargs} under simulation {obj_sim_id}.")
         
         transaction = Transaction(obj_under_transaction, simulation, func, *args, **kwargs)
         result = transaction.execute()
@@ -583,13 +868,13 @@ def _simulation(id="default"):
     
     return _current_simulations[id]
 
-def begin(cache_path=None, id="default", auto_checkpoint=False):
+def begin(cache_path=None, id="default", auto_checkpoint=False, max_cached_nodes=None):
     """
     Marks the start of the simulation being controlled.
     """
     global _current_simulation_id
     if _current_simulation_id is None:
-        _simulation(id).begin(cache_path, auto_checkpoint)
+        _simulation(id).begin(cache_path, auto_checkpoint, max_cached_nodes)
         _current_simulation_id = id
     else:
         raise ValueError(f"Simulation is already started under id {_current_simulation_id}. Currently only one simulation can be started at a time.")   
@@ -617,5 +902,18 @@ def current_simulation():
         return _simulation(_current_simulation_id)
     else:
         return None
+
+@contextlib.contextmanager
+def registry_scope():
+    """
+    A context manager that drops all agents and environments created within it from the global registries upon exit,
+    so that they can be garbage collected and their names reused. This is useful in long-running processes 
+    (e.g., servers), where each request can build and run its own world within a scope.
+    """
+    from tinytroupe.agent import TinyPerson
+    from tinytroupe.environment import TinyWorld
+
+    with TinyPerson.all_agents.scope(), TinyWorld.all_environments.scope():
+        yield
     
 reset() # initialize the control state
\ No newline at end of file
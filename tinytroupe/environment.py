@@ -6,32 +6,251 @@ agents interact with each other as well as external entities (e.g., search engin
 import logging
 logger = logging.getLogger("tinytroupe")
 import copy
+from collections.abc import Mapping
 from datetime import datetime, timedelta
 
 from tinytroupe.agent import *
+import tinytroupe.utils as utils
 from tinytroupe.utils import name_or_empty, pretty_datetime
 import tinytroupe.control as control
 from tinytroupe.control import transactional
  
 from rich.console import Console
 
+import numpy as np
+import pandas as pd
+
 from typing import Any, TypeVar, Union
 AgentOrWorld = Union["TinyPerson", "TinyWorld"]
 
+class InteractionLog:
+    """
+    An append-only, columnar log of all stimuli and actions of the agents in a world, each recorded once, 
+    with the agent, kind ("stimulus" or "action"), type, source, target, content and simulation timestamp. 
+    Categorical columns are dictionary-encoded in NumPy arrays, so that they are compact and can be scanned
+    in a vectorized way, and each agent's rows are indexed, so that per-agent views need no scans at all. Contents
+    are not copied, but refer to the very same objects as the agents' memories.
+
+    The log also counts the memory messages recorded for each agent, so that one can tell whether it covers an 
+    agent's whole memory (see `TinyPerson.interaction_log_view`). If so, analytics (e.g., 
+    `ResultsReducer.reduce_population`) read the log instead of walking the memory.
+    """
+
+    CATEGORICAL_COLUMNS = ["agent", "kind", "type", "source", "target", "simulation_timestamp"]
+    COLUMNS = CATEGORICAL_COLUMNS[:-1] + ["content", "simulation_timestamp"]
+
+    def __init__(self, initial_capacity:int=1024):
+        self._size = 0
+        self._capacity = initial_capacity
+
+        # categorical columns hold codes into their categories, with -1 for missing values
+        self._codes = {column: np.empty(initial_capacity, dtype=np.int32) for column in InteractionLog.CATEGORICAL_COLUMNS}
+        self._categories = {column: [] for column in InteractionLog.CATEGORICAL_COLUMNS} # {column: [value, ...]}
+        self._category_codes = {column: {} for column in InteractionLog.CATEGORICAL_COLUMNS} # {column: {value: code, ...}}
+        self._content = np.empty(initial_capacity, dtype=object)
+
+        self._agent_rows = {} # {agent_name: [row, ...]}
+        self._agent_message_counts = {} # {agent_name: number of memory messages recorded}
+
+        # the rows encoded so far, reused by subsequent encodings
+        self._encoded_rows = []
+
+    def __len__(self):
+        return self._size
+
+    def append(self, agent:str, kind:str, type:str, source:str, target:str, content:Any, simulation_timestamp:str):
+        """
+        Appends a single interaction to the log.
+        """
+        if self._size == self._capacity:
+            self._grow()
+
+        row = self._size
+        for column, value in zip(InteractionLog.CATEGORICAL_COLUMNS, [agent, kind, type, source, target, simulation_timestamp]):
+            self._codes[column][row] = self._code_for(column, value)
+        self._content[row] = content
+
+        self._agent_rows.setdefault(agent, []).append(row)
+        self._size += 1
+
+    def record_message(self, agent_name:str, message:dict):
+        """
+        Records the stimuli or the action of an episodic memory message of the specified agent.
+        """
+        self._agent_message_counts[agent_name] = self._agent_message_counts.get(agent_name, 0) + 1
+
+        content = message.get("content") if isinstance(message, Mapping) else None
+        if not isinstance(content, dict):
+            return
+
+        if message["role"] == "user":
+            for stimulus in content.get("stimuli", []):
+                self.append(agent_name, "stimulus", stimulus.get("type"), stimulus.get("source"), agent_name, 
+                            stimulus.get("content"), message["simulation_timestamp"])
+                
+        elif message["role"] == "assistant" and isinstance(content.get("action"), dict):
+            action = content["action"]
+            self.append(agent_name, "action", action.get("type"), agent_name, action.get("target"), 
+                        action.get("content"), message["simulation_timestamp"])
+
+    def record_messages(self, agent_name:str, messages:list):
+        """
+        Records several episodic memory messages of the specified agent, in order (e.g., its memory so far).
+        """
+        for message in messages:
+            self.record_message(agent_name, message)
+
+    def message_count(self, agent_name:str) -> int:
+        """
+        Returns the number of memory messages recorded for the specified agent.
+        """
+        return self._agent_message_counts.get(agent_name, 0)
+
+    def view(self, agent_name:str) -> "InteractionLogView":
+        """
+        Returns a view of the interactions of the specified agent.
+        """
+        return InteractionLogView(self, agent_name)
+
+    def rows_of(self, agent_name:str) -> np.ndarray:
+        """
+        Returns the indices of the rows of the specified agent.
+        """
+        return np.array(self._agent_rows.get(agent_name, []), dtype=np.int64)
+
+    def codes(self, column:str) -> np.ndarray:
+        """
+        Returns the codes of the specified categorical column, which is a view of the underlying array, not a copy.
+        """
+        return self._codes[column][:self._size]
+
+    def code_of(self, column:str, value:str) -> int:
+        """
+        Returns the code of the specified value in the specified categorical column, or -1 if the value never occurred.
+        """
+        return self._category_codes[column].get(value, -1)
+
+    def to_dataframe(self, rows:np.ndarray=None) -> pd.DataFrame:
+        """
+        Returns the log (or the specified rows of it) as a DataFrame with categorical columns, built over the 
+        underlying arrays.
+        """
+        data = {}
+        for column in InteractionLog.COLUMNS:
+            if column == "content":
+                values = self._content[:self._size]
+                data[column] = values if rows is None else values[rows]
+            else:
+                codes = self.codes(column)
+                data[column] = pd.Categorical.from_codes(codes if rows is None else codes[rows], 
+                                                         categories=pd.Index(self._categories[column], dtype=object))
+
+        return pd.DataFrame(data, copy=False)
+
+    def encode_complete_state(self) -> dict:
+        """
+        Encodes the complete state of the log as plain data, with a [codes..., content] list per row. Since the log is 
+        append-only, each row is encoded only the first time, and that encoding is then shared by all subsequent 
+        encoded states (just like `EpisodicMemory` does). So encoded states must be treated as immutable.
+        """
+        encoded_rows = self._encoded_rows
+        codes = [self._codes[column] for column in InteractionLog.CATEGORICAL_COLUMNS]
+        for row in range(len(encoded_rows), self._size):
+            encoded_rows.append([int(column_codes[row]) for column_codes in codes] + [utils.copy_json_structure(self._content[row])])
+
+        # categories are append-only lists of strings, so shallow copies suffice
+        return {"categories": {column: list(values) for column, values in self._categories.items()},
+                "rows": list(encoded_rows),
+                "message_counts": dict(self._agent_message_counts)}
+
+    def decode_complete_state(self, state:dict) -> "InteractionLog":
+        """
+        Loads the complete state of the log in-place. The given state is not modified nor aliased.
+        """
+        rows = state["rows"]
+        size = len(rows)
+        self.__init__(initial_capacity=max(size, 1024))
+
+        for column in InteractionLog.CATEGORICAL_COLUMNS:
+            self._categories[column] = utils.copy_json_structure(state["categories"][column])
+            self._category_codes[column] = {value: code for code, value in enumerate(self._categories[column])}
+        
+        n_categorical_columns = len(InteractionLog.CATEGORICAL_COLUMNS)
+        if size > 0:
+            codes = np.array([encoded_row[:n_categorical_columns] for encoded_row in rows], dtype=np.int32)
+            for i, column in enumerate(InteractionLog.CATEGORICAL_COLUMNS):
+                self._codes[column][:size] = codes[:, i]
+        
+        for row, encoded_row in enumerate(rows):
+            self._content[row] = utils.copy_json_structure(encoded_row[n_categorical_columns])
+        self._size = size
+
+        agent_categories = self._categories["agent"]
+        for row, code in enumerate(self.codes("agent")):
+            self._agent_rows.setdefault(agent_categories[code], []).append(row)
+        self._agent_message_counts = dict(state.get("message_counts", {}))
+
+        # the rows in the state are themselves immutable encodings of the log, so they can be reused later
+        self._encoded_rows = list(rows)
+
+        return self
+
+    def _code_for(self, column:str, value) -> int:
+        if value is None:
+            return -1
+        
+        codes = self._category_codes[column]
+        code = codes.get(value)
+        if code is None:
+            code = len(self._categories[column])
+            codes[value] = code
+            self._categories[column].append(value)
+        return code
+
+    def _grow(self):
+        self._capacity *= 2
+        for column in InteractionLog.CATEGORICAL_COLUMNS:
+            self._codes[column] = np.resize(self._codes[column], self._capacity)
+        self._content = np.resize(self._content, self._capacity)
+
+
+class InteractionLogView:
+    """
+    A view of the interactions of a single agent in an interaction log. It stays up-to-date as the log grows.
+    """
+
+    def __init__(self, log:InteractionLog, agent_name:str):
+        self.log = log
+        self.agent_name = agent_name
+
+    def rows(self) -> np.ndarray:
+        return self.log.rows_of(self.agent_name)
+
+    def __len__(self):
+        return len(self.log._agent_rows.get(self.agent_name, []))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return self.log.to_dataframe(rows=self.rows())
+
+
 class TinyWorld:
     """
     Base class for environments.
     """
 
-    # A dict of all environments created so far.
-    all_environments = {} # name -> environment
+    # A registry of all environments created so far, which can be used just like a dict (see `TinyPerson.all_agents`).
+    all_environments = utils.ObjectRegistry(weak=default["weak_registries"]) # name -> environment
 
     # Whether to display environments communications or not, for all environments. 
     communication_display = True
 
+    # Attributes that are either encoded by their own means in complete states or not at all.
+    _COMPLETE_STATE_SEPARATELY_ENCODED_ATTRIBUTES = {"console", "agents", "name_to_agent", "_agents_view", "current_datetime", "interaction_log"}
+
     def __init__(self, name: str="A TinyWorld", agents=[], 
                  initial_datetime=datetime.datetime.now(),
-                 broadcast_if_no_target=True):
+                 broadcast_if_no_target=True,
+                 interaction_log:bool=False):
         """
         Initializes an environment.
 
@@ -41,6 +260,8 @@ class TinyWorld:
             initial_datetime (datetime): The initial datetime of the environment, or None (i.e., explicit time is optional). 
                 Defaults to the current datetime in the real world.
             broadcast_if_no_target (bool): If True, broadcast actions if the target of an action is not found.
+            interaction_log (bool): If True, all stimuli and actions of the agents while in this environment are also 
+                recorded in a columnar `InteractionLog`, for efficient analytics and exports. Defaults to False.
         """
 
         self.name = name
@@ -49,13 +270,17 @@ class TinyWorld:
         self.simulation_id = None # will be reset later if the agent is used within a specific simulation scope
         
         
-        self.agents = []
+        # the agents in the environment, in the order they were added. The dict also serves for O(1) membership checks 
+        # and removals, while `agents` gives a list view over it.
         self.name_to_agent = {} # {agent_name: agent, agent_name_2: agent_2, ...}
+        self._agents_view = None
 
         # the buffer of communications that have been displayed so far, used for
         # saving these communications to another output form later (e.g., caching)
         self._displayed_communications_buffer = []
 
+        self.interaction_log = InteractionLog() if interaction_log else None
+
         self.console = Console()
 
         # add the environment to the list of all environments
@@ -252,6 +477,27 @@ class TinyWorld:
     #######################################################################
     # Agent management methods
     #######################################################################
+    @property
+    def agents(self) -> list:
+        """
+        The agents in the environment, in the order they were added. This is a read-only view, which is only
+        rebuilt when agents are added or removed, so use `add_agent` and `remove_agent` to change it.
+        """
+        if self._agents_view is None:
+            self._agents_view = list(self.name_to_agent.values())
+        return self._agents_view
+
+    @agents.setter
+    def agents(self, agents: list):
+        self.name_to_agent = {agent.name: agent for agent in agents}
+        self._agents_view = None
+
+    def has_agent(self, agent: TinyPerson) -> bool:
+        """
+        Checks whether the specified agent is in the environment, in O(1) time.
+        """
+        return self.name_to_agent.get(agent.name) is agent
+
     def add_agents(self, agents: list):
         """
         Adds a list of agents to the environment.
@@ -276,15 +522,19 @@ class TinyWorld:
         """
 
         # check if the agent is not already in the environment
-        if agent not in self.agents:
+        if not self.has_agent(agent):
             logger.debug(f"Adding agent {agent.name} to the environment.")
             
             # Agent names must be unique in the environment. 
             # Check if the agent name is already there.
             if agent.name not in self.name_to_agent:
                 agent.environment = self
-                self.agents.append(agent)
                 self.name_to_agent[agent.name] = agent
+                self._agents_view = None
+
+                # the log starts with what the agent remembers so far, so that it covers its whole memory
+                if self.interaction_log is not None and self.interaction_log.message_count(agent.name) == 0:
+                    self.interaction_log.record_messages(agent.name, agent.episodic_memory.memory)
             else:
                 raise ValueError(f"Agent names must be unique, but '{agent.name}' is already in the environment.")
         else:
@@ -300,8 +550,11 @@ class TinyWorld:
             agent (TinyPerson): The agent to remove from the environment.
         """
         logger.debug(f"Removing agent {agent.name} from the environment.")
-        self.agents.remove(agent)
+        if not self.has_agent(agent):
+            raise ValueError(f"Agent {agent.name} is not in the environment.")
+        
         del self.name_to_agent[agent.name]
+        self._agents_view = None
 
         return self # for chaining
     
@@ -310,8 +563,8 @@ class TinyWorld:
         Removes all agents from the environment.
         """
         logger.debug(f"Removing all agents from the environment.")
-        self.agents = []
         self.name_to_agent = {}
+        self._agents_view = None
 
         return self # for chaining
 
@@ -408,7 +661,8 @@ class TinyWorld:
     @transactional
     def broadcast(self, speech: str, source: AgentOrWorld=None):
         """
-        Delivers a speech to all agents in the environment.
+        Delivers a speech to all agents in the environment. This is equivalent to having each agent listen to it, 
+        but the stimulus is built, stored and displayed only once, regardless of the number of agents. 
 
         Args:
             speech (str): The content of the message.
@@ -416,10 +670,19 @@ class TinyWorld:
         """
         logger.debug(f"[{self.name}] Broadcasting message: '{speech}'.")
 
-        for agent in self.agents:
-            # do not deliver the message to the source
-            if agent != source:
-                agent.listen(speech, source=source)
+        # do not deliver the message to the source
+        recipients = [agent for agent in self.agents if agent is not source]
+        if len(recipients) == 0:
+            return
+
+        stimulus = {"type": "CONVERSATION", "content": speech, "source": name_or_empty(source)}
+        simulation_timestamp = self.current_datetime.isoformat() if self.current_datetime is not None else None
+        entry = TinyPerson._observe_shared(recipients, stimulus, simulation_timestamp)
+
+        if TinyPerson.communication_display:
+            rendering = recipients[0]._pretty_stimuli(role="user", content=entry.content, simplified=True,
+                                                      target_name=recipients[0].name if len(recipients) == 1 else "everyone")
+            self._push_and_display_latest_communication(rendering)
     
     @transactional
     def broadcast_thought(self, thought: str, source: AgentOrWorld=None):
@@ -460,14 +723,14 @@ class TinyWorld:
         for agent in self.agents:
             agent.change_context(context)
 
-    def make_everyone_accessible(self):
+    @transactional
+    def make_everyone_accessible(self, relation_description: str = "An agent I can currently interact with."):
         """
-        Makes all agents in the environment accessible to each other.
+        Makes all agents in the environment accessible to each other, in a single transaction and O(n^2) time overall.
         """
-        for agent_1 in self.agents:
-            for agent_2 in self.agents:
-                if agent_1 != agent_2:
-                    agent_1.make_agent_accessible(agent_2)
+        agents = self.agents
+        for agent in agents:
+            agent.make_agents_accessible(agents, relation_description)
             
 
     ###########################################################
@@ -546,6 +809,13 @@ class TinyWorld:
       """
       Returns a pretty, readable, string with the current messages of agents in this environment.
       """
+      return "\n".join(self.pretty_current_interactions_per_agent(simplified=simplified, skip_system=skip_system, max_content_length=max_content_length, 
+                                                                  first_n=first_n, last_n=last_n, include_omission_info=include_omission_info))
+
+    def pretty_current_interactions_per_agent(self, simplified=True, skip_system=True, max_content_length=default["max_content_display_length"], first_n=None, last_n=None, include_omission_info:bool=True) -> list:
+      """
+      Returns a list with the pretty, readable, current messages of each agent in this environment.
+      """
       agent_contents = []
 
       for agent in self.agents:
@@ -555,35 +825,41 @@ class TinyWorld:
           agent_content += f"**FINISHED AGENT {agent.name} HISTORY.**\n\n"
           agent_contents.append(agent_content)      
           
-      return "\n".join(agent_contents)
+      return agent_contents
     
     #######################################################################
     # IO
     #######################################################################
 
-    def encode_complete_state(self) -> dict:
+    def encode_complete_state(self, agents_by_name:bool=False) -> dict:
         """
         Encodes the complete state of the environment in a dictionary.
 
+        Args:
+            agents_by_name (bool): If True, agents are referenced by their names only, instead of having their complete 
+                states encoded as well. This is useful when agent states are encoded elsewhere, as in simulation snapshots.
+
         Returns:
             dict: A dictionary encoding the complete state of the environment.
         """
-        to_copy = copy.copy(self.__dict__)
-
-        # remove the logger and other fields
-        del to_copy['console']
-        del to_copy['agents']
-        del to_copy['name_to_agent']
-        del to_copy['current_datetime']
-
-        state = copy.deepcopy(to_copy)
+        # remaining fields are copied exactly once, skipping the console and other fields encoded separately
+        state = {}
+        for key, value in self.__dict__.items():
+            if key not in self._COMPLETE_STATE_SEPARATELY_ENCODED_ATTRIBUTES:
+                state[key] = utils.copy_json_structure(value)
 
         # agents are encoded separately
-        state["agents"] = [agent.encode_complete_state() for agent in self.agents]
+        if agents_by_name:
+            state["agents"] = [agent.name for agent in self.agents]
+        else:
+            state["agents"] = [agent.encode_complete_state() for agent in self.agents]
 
         # datetime also has to be encoded separately
         state["current_datetime"] = self.current_datetime.isoformat()
 
+        if self.interaction_log is not None:
+            state["interaction_log"] = self.interaction_log.encode_complete_state()
+
         return state
     
     def decode_complete_state(self, state:dict) -> Self:
@@ -591,18 +867,27 @@ class TinyWorld:
         Decodes the complete state of the environment from a dictionary.
 
         Args:
-            state (dict): A dictionary encoding the complete state of the environment.
+            state (dict): A dictionary encoding the complete state of the environment. Agents referenced by name only 
+                are just put back in the environment, as their states are expected to be decoded elsewhere.
 
         Returns:
             Self: The environment decoded from the dictionary.
         """
-        state = copy.deepcopy(state)
+        # The given state is never modified nor aliased, since it might be a snapshot kept in the simulation cache.
 
         #################################
         # restore agents in-place
         #################################
         self.remove_all_agents()
         for agent_state in state["agents"]:
+            if isinstance(agent_state, str):
+                agent = TinyPerson.get_agent_by_name(agent_state)
+                if agent is None:
+                    raise ValueError(f"Could not find agent {agent_state} for environment {self.name}.")
+                
+                self.add_agent(agent)
+                continue
+
             try:
                 try:
                     agent = TinyPerson.get_agent_by_name(agent_state["name"])
@@ -615,14 +900,18 @@ class TinyWorld:
             except Exception as e:
                 raise ValueError(f"Could not decode agent {agent_state['name']} for environment {self.name}.") from e
         
-        # remove the agent states to update the rest of the environment
-        del state["agents"]
-
         # restore datetime
-        state["current_datetime"] = datetime.datetime.fromisoformat(state["current_datetime"])
+        self.current_datetime = datetime.datetime.fromisoformat(state["current_datetime"])
+
+        if state.get("interaction_log") is not None:
+            self.interaction_log = InteractionLog().decode_complete_state(state["interaction_log"])
+        else:
+            self.interaction_log = None
 
         # restore other fields
-        self.__dict__.update(state)
+        for key, value in state.items():
+            if key not in self._COMPLETE_STATE_SEPARATELY_ENCODED_ATTRIBUTES:
+                self.__dict__[key] = utils.copy_json_structure(value)
 
         return self
 
@@ -632,10 +921,8 @@ class TinyWorld:
         Adds an environment to the list of all environments. Environment names must be unique,
         so if an environment with the same name already exists, an error is raised.
         """
-        if environment.name in TinyWorld.all_environments:
+        if not TinyWorld.all_environments.register(environment.name, environment):
             raise ValueError(f"Environment names must be unique, but '{environment.name}' is already defined.")
-        else:
-            TinyWorld.all_environments[environment.name] = environment
         
 
     @staticmethod
@@ -660,21 +947,22 @@ class TinyWorld:
         Returns:
             TinyWorld: The environment with the specified name.
         """
-        if name in TinyWorld.all_environments:
-            return TinyWorld.all_environments[name]
-        else:
-            return None
+        return TinyWorld.all_environments.get(name)
     
     @staticmethod
     def clear_environments():
         """
         Clears the list of all environments.
         """
-        TinyWorld.all_environments = {}
+        TinyWorld.all_environments.clear()
 
 class TinySocialNetwork(TinyWorld):
 
-    def __init__(self, name, broadcast_if_no_target=True):
+    # Relations are encoded as lists of name pairs, and the indexes derived from them are rebuilt on decoding.
+    _COMPLETE_STATE_SEPARATELY_ENCODED_ATTRIBUTES = TinyWorld._COMPLETE_STATE_SEPARATELY_ENCODED_ATTRIBUTES | \
+                                                    {"relations", "_related_agents", "_agents_with_stale_accessibility"}
+
+    def __init__(self, name, broadcast_if_no_target=True, interaction_log:bool=False):
         """
         Create a new TinySocialNetwork environment.
 
@@ -682,16 +970,38 @@ class TinySocialNetwork(TinyWorld):
             name (str): The name of the environment.
             broadcast_if_no_target (bool): If True, broadcast actions through an agent's available relations
               if the target of an action is not found.
+            interaction_log (bool): If True, all stimuli and actions are also recorded in a columnar `InteractionLog`. 
+              Defaults to False.
         """
         
-        super().__init__(name, broadcast_if_no_target=broadcast_if_no_target)
+        # the relations graph is kept before the agents are added, since adding agents uses it
+        self._init_relations()
+
+        super().__init__(name, broadcast_if_no_target=broadcast_if_no_target, interaction_log=interaction_log)
+
+    def _init_relations(self):
+        # An undirected multigraph, indexed by relation and by agent. Names are used throughout (agents being
+        # resolved through the environment), and dicts serve as insertion-ordered sets, so that updates are deterministic.
+        self.relations = {} # {relation_name: {agent_name: {other_agent_name: None, ...}, ...}, ...}
+        self._related_agents = {} # {agent_name: {other_agent_name: number_of_relations_between_them, ...}, ...}
+
+        # agents whose accessibility must be brought in line with the relations before the next step
+        self._agents_with_stale_accessibility = {} # {agent_name: None, ...}
 
-        self.relations = {}
+    def add_agent(self, agent: TinyPerson):
+        is_new_agent = not self.has_agent(agent)
+        super().add_agent(agent)
+
+        if is_new_agent:
+            # new agents get their accessibility from the relations, just like the others
+            self._agents_with_stale_accessibility[agent.name] = None
+        
+        return self # for chaining
     
     @transactional
     def add_relation(self, agent_1, agent_2, name="default"):
         """
-        Adds a relation between two agents.
+        Adds a relation between two agents. Relations are undirected, and adding one that already exists has no effect.
         
         Args:
             agent_1 (TinyPerson): The first agent.
@@ -702,34 +1012,91 @@ class TinySocialNetwork(TinyWorld):
         logger.debug(f"Adding relation {name} between {agent_1.name} and {agent_2.name}.")
 
         # agents must already be in the environment, if not they are first added
-        if agent_1 not in self.agents:
-            self.agents.append(agent_1)
-        if agent_2 not in self.agents:
-            self.agents.append(agent_2)
+        if not self.has_agent(agent_1):
+            self.add_agent(agent_1)
+        if not self.has_agent(agent_2):
+            self.add_agent(agent_2)
 
-        if name in self.relations:
-            self.relations[name].append((agent_1, agent_2))
-        else:
-            self.relations[name] = [(agent_1, agent_2)]
+        self._add_edge(agent_1.name, agent_2.name, name)
 
         return self # for chaining
     
+    @transactional
+    def remove_relation(self, agent_1, agent_2, name=None):
+        """
+        Removes a relation between two agents, if it exists. 
+        
+        Args:
+            agent_1 (TinyPerson): The first agent.
+            agent_2 (TinyPerson): The second agent.
+            name (str): The name of the relation, or None to remove all relations between the two agents.
+        """
+        logger.debug(f"Removing relation {name} between {agent_1.name} and {agent_2.name}.")
+
+        relation_names = list(self.relations.keys()) if name is None else [name]
+        for relation_name in relation_names:
+            self._remove_edge(agent_1.name, agent_2.name, relation_name)
+
+        return self # for chaining
+
+    def _add_edge(self, name_1: str, name_2: str, relation_name: str):
+        adjacency = self.relations.setdefault(relation_name, {})
+        if name_2 in adjacency.get(name_1, {}):
+            return
+
+        for source, target in self._edge_directions(name_1, name_2):
+            adjacency.setdefault(source, {})[target] = None
+
+            related = self._related_agents.setdefault(source, {})
+            related[target] = related.get(target, 0) + 1
+            if related[target] == 1:
+                # the first relation between the two agents makes them accessible to each other
+                self._agents_with_stale_accessibility[source] = None
+
+    def _remove_edge(self, name_1: str, name_2: str, relation_name: str):
+        adjacency = self.relations.get(relation_name, {})
+        if name_2 not in adjacency.get(name_1, {}):
+            return
+
+        for source, target in self._edge_directions(name_1, name_2):
+            del adjacency[source][target]
+            if not adjacency[source]:
+                del adjacency[source]
+
+            related = self._related_agents[source]
+            related[target] -= 1
+            if related[target] == 0:
+                # the last relation between the two agents is gone, so they are no longer accessible to each other
+                del related[target]
+                self._agents_with_stale_accessibility[source] = None
+
+        if not adjacency:
+            del self.relations[relation_name]
+
+    @staticmethod
+    def _edge_directions(name_1: str, name_2: str) -> list:
+        # undirected edges are stored in both directions, except for self-relations
+        return [(name_1, name_2)] if name_1 == name_2 else [(name_1, name_2), (name_2, name_1)]
+    
     @transactional
     def _update_agents_contexts(self):
         """
-        Updates the agents' observations based on the current state of the world.
+        Updates the agents' observations based on the current state of the world. Only agents whose relations changed
+        since the last update are touched, so that the cost of steps does not depend on the size of the network.
         """
+        for agent_name in self._agents_with_stale_accessibility:
+            agent = self.name_to_agent.get(agent_name)
+            if agent is None:
+                continue
 
-        # clear all accessibility first
-        for agent in self.agents:
+            related_agents = [self.name_to_agent[name] for name in self._related_agents.get(agent_name, {}) 
+                              if name in self.name_to_agent]
+            
+            logger.debug(f"Updating accessibility of {agent_name} based on relations.")
             agent.make_all_agents_inaccessible()
+            agent.make_agents_accessible(related_agents)
 
-        # now update accessibility based on relations
-        for relation_name, relation in self.relations.items():
-            logger.debug(f"Updating agents' observations for relation {relation_name}.")
-            for agent_1, agent_2 in relation:
-                agent_1.make_agent_accessible(agent_2)
-                agent_2.make_agent_accessible(agent_1)
+        self._agents_with_stale_accessibility = {}
 
     @transactional
     def _step(self):
@@ -778,14 +1145,52 @@ class TinySocialNetwork(TinyWorld):
         Returns:
             bool: True if the two agents are in the given relation, False otherwise.
         """
-        if relation_name is None:
-            for relation_name, relation in self.relations.items():
-                if (agent_1, agent_2) in relation or (agent_2, agent_1) in relation:
-                    return True
+        if agent_1 is None or agent_2 is None:
             return False
         
+        if relation_name is None:
+            related_agents = self._related_agents.get(agent_1.name, {})
         else:
-            if relation_name in self.relations:
-                return (agent_1, agent_2) in self.relations[relation_name] or (agent_2, agent_1) in self.relations[relation_name]
-            else:
-                return False
\ No newline at end of file
+            related_agents = self.relations.get(relation_name, {}).get(agent_1.name, {})
+        
+        return agent_2.name in related_agents
+
+    def relation_edges(self, relation_name: str) -> list:
+        """
+        Returns the pairs of agent names in the given relation, each pair only once.
+        """
+        edges = []
+        visited_names = set()
+        for name_1, related_names in self.relations.get(relation_name, {}).items():
+            for name_2 in related_names:
+                # each edge is stored from both ends, so only the first one visited reports it
+                if name_2 not in visited_names:
+                    edges.append((name_1, name_2))
+            visited_names.add(name_1)
+
+        return edges
+
+    #######################################################################
+    # Simulation state encoding
+    #######################################################################
+
+    def encode_complete_state(self, agents_by_name:bool=False) -> dict:
+        state = super().encode_complete_state(agents_by_name=agents_by_name)
+        state["relations"] = {relation_name: [list(edge) for edge in self.relation_edges(relation_name)] 
+                              for relation_name in self.relations}
+        state["_agents_with_stale_accessibility"] = list(self._agents_with_stale_accessibility)
+
+        return state
+
+    def decode_complete_state(self, state:dict) -> Self:
+        super().decode_complete_state(state)
+
+        self._init_relations()
+        for relation_name, edges in state.get("relations", {}).items():
+            for name_1, name_2 in edges:
+                self._add_edge(name_1, name_2, relation_name)
+
+        # the decoded agents already have the accessibility they had when the state was encoded
+        self._agents_with_stale_accessibility = dict.fromkeys(state.get("_agents_with_stale_accessibility", []))
+
+        return self
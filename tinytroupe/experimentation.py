@@ -1,6 +1,16 @@
+import os
+import time
 import random
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 from tinytroupe.agent import TinyPerson
+import tinytroupe.control as control
+from tinytroupe import openai_utils
+
+import logging
+logger = logging.getLogger("tinytroupe")
 
 class ABRandomizer():
 
@@ -184,3 +194,140 @@ class Intervention:
             effect (str): the effect function of the intervention
         """
         self.effect_func = effect_func
+
+
+class SimulationBatchRunner:
+
+    def __init__(self, scenario:callable, parameter_grid, max_workers:int=None, max_concurrent_llm_calls:int=None,
+                 cache_folder:str="./", cache_file_prefix:str="tinytroupe-cache-batch"):
+        """
+        Runs the same scenario over many independent variants (e.g., different personas or A/B options),
+        each one in its own worker process and under its own simulation, so that each run has its own cache file.
+
+        The scenario must be a picklable callable (i.e., defined at the top level of a module), taking the
+        parameters of a run as keyword arguments. It should create whatever agents and environments it needs and
+        return the run results, preferably as a dict of metrics, so that results can be merged later.
+
+        Args:
+            scenario (callable): the scenario to run, called as `scenario(**parameters)`.
+            parameter_grid (dict or list): either a dict mapping each parameter name to a list of values, in which
+                                           case all combinations are run, or an explicit list of parameter dicts.
+            max_workers (int): the maximum number of worker processes. Defaults to the number of CPUs.
+            max_concurrent_llm_calls (int): the maximum number of model calls in flight across all workers, 
+                                            to avoid overloading a shared backend. Defaults to no limit.
+            cache_folder (str): the folder where the cache file of each run is stored.
+            cache_file_prefix (str): the prefix of the cache file names. Run i uses `<prefix>-<i>.json`.
+        """
+        self.scenario = scenario
+        self.parameters = SimulationBatchRunner._expand_parameter_grid(parameter_grid)
+        self.max_workers = max_workers
+        self.max_concurrent_llm_calls = max_concurrent_llm_calls
+        self.cache_folder = cache_folder
+        self.cache_file_prefix = cache_file_prefix
+
+        # results of the runs performed so far, in completion order
+        self.results = []
+
+    def run(self):
+        """
+        Runs all variants, yielding each run result as soon as it is available (i.e., in completion order).
+        Each result is a dict with the keys: run_id, parameters, cache_path, status ("success" or "error"),
+        output, error and elapsed_time.
+        """
+        self.results = []
+
+        with multiprocessing.Manager() as manager:
+            limiter = None
+            if self.max_concurrent_llm_calls is not None:
+                limiter = manager.BoundedSemaphore(self.max_concurrent_llm_calls)
+
+            with ProcessPoolExecutor(max_workers=self.max_workers, 
+                                     initializer=_init_batch_worker, initargs=(limiter,)) as executor:
+                futures = []
+                for run_id, parameters in enumerate(self.parameters):
+                    futures.append(executor.submit(_run_scenario_in_worker, self.scenario, run_id, parameters, 
+                                                   self._cache_path_for(run_id)))
+
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result["status"] == "error":
+                        logger.error(f"Batch run {result['run_id']} with parameters {result['parameters']} failed: {result['error']}")
+                    
+                    self.results.append(result)
+                    yield result
+
+    def run_all(self) -> list:
+        """
+        Runs all variants and returns their results ordered by run id.
+        """
+        for _ in self.run():
+            pass
+
+        return sorted(self.results, key=lambda result: result["run_id"])
+
+    def merged_metrics(self) -> pd.DataFrame:
+        """
+        Merges the results of the runs performed so far into a single dataframe, with one row per run. 
+        Parameters and, if the scenario returned a dict, its metrics become columns.
+        """
+        rows = []
+        for result in sorted(self.results, key=lambda result: result["run_id"]):
+            row = {"run_id": result["run_id"], "status": result["status"], "elapsed_time": result["elapsed_time"]}
+            row.update(result["parameters"])
+
+            if isinstance(result["output"], dict):
+                row.update(result["output"])
+            else:
+                row["output"] = result["output"]
+
+            rows.append(row)
+
+        return pd.DataFrame(rows)
+
+    def _cache_path_for(self, run_id:int) -> str:
+        return os.path.join(self.cache_folder, f"{self.cache_file_prefix}-{run_id}.json")
+
+    @staticmethod
+    def _expand_parameter_grid(parameter_grid) -> list:
+        """
+        Expands a parameter grid into the list of parameter dicts to run.
+        """
+        if isinstance(parameter_grid, dict):
+            names = list(parameter_grid.keys())
+            return [dict(zip(names, values)) for values in itertools.product(*[parameter_grid[name] for name in names])]
+        elif isinstance(parameter_grid, list):
+            return [dict(parameters) for parameters in parameter_grid]
+        else:
+            raise ValueError(f"The parameter grid must be a dict or a list of dicts, but is {type(parameter_grid)}.")
+
+
+def _init_batch_worker(limiter):
+    """
+    Initializes a batch worker process, sharing the model calls limiter with the other workers.
+    """
+    openai_utils.set_concurrency_limiter(limiter)
+
+def _run_scenario_in_worker(scenario:callable, run_id:int, parameters:dict, cache_path:str) -> dict:
+    """
+    Runs a single scenario variant under its own simulation. Must be at the top level to be picklable.
+    """
+    result = {"run_id": run_id, "parameters": parameters, "cache_path": cache_path, 
+              "status": None, "output": None, "error": None, "elapsed_time": None}
+
+    start_time = time.monotonic()
+
+    # worker processes may be reused, so we make sure no previous simulation is still around
+    control.reset()
+    control.begin(cache_path=cache_path)
+    try:
+        result["output"] = scenario(**parameters)
+        result["status"] = "success"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["status"] = "error"
+    finally:
+        control.end()
+
+    result["elapsed_time"] = time.monotonic() - start_time
+
+    return result
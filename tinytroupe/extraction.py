@@ -13,10 +13,12 @@ import os
 import json
 import chevron
 import logging
+import numpy as np
 import pandas as pd
 import pypandoc
 import markdown 
 from typing import Union, List
+from concurrent.futures import ThreadPoolExecutor
 import logging
 logger = logging.getLogger("tinytroupe")
 
@@ -31,14 +33,31 @@ import tinytroupe.utils as utils
 
 class ResultsExtractor:
 
+    # statuses of the extractions made by `extract_results_from_agents`
+    STATUS_EXTRACTED = "extracted"
+    STATUS_DEDUPLICATED = "deduplicated" # same agent and history as an earlier entry in the same call, which was extracted
+    STATUS_CACHED = "cached" # same history and request as an earlier extraction
+    STATUS_FAILED = "failed"
+
+    # the maximum number of tokens of interaction history sent at once by `extract_results_from_world`
+    DEFAULT_MAX_TOKENS_PER_CHUNK = 6000
+
+    # the key under which `extract_results_from_world` returns partial results that could not be merged
+    UNMERGED_PARTIAL_RESULTS_KEY = "unmerged_partial_results"
+
     def __init__(self):
         self._extraction_prompt_template_path = os.path.join(os.path.dirname(__file__), 'prompts/interaction_results_extractor.mustache')
+        self._extraction_prompt_template = None
 
         # we'll cache the last extraction results for each type of extraction, so that we can use them to
         # generate reports or other additional outputs.
         self.agent_extraction = {}
         self.world_extraction = {}
 
+        # results of population extractions, keyed by a hash of the interaction history and of the extraction request,
+        # and of the chunk and merge steps of world extractions, keyed by a hash of their messages
+        self._extraction_cache = {}
+
     def extract_results_from_agent(self, 
                         tinyperson:TinyPerson, 
                         extraction_objective:str="The main points present in the agent's interactions history.", 
@@ -58,59 +77,99 @@ class ResultsExtractor:
             verbose (bool, optional): Whether to print debug messages. Defaults to False.
         """
 
-        messages = []
-
-        rendering_configs = {}
-        if fields is not None:
-            rendering_configs["fields"] = ", ".join(fields)
-        
-        if fields_hints is not None:
-            rendering_configs["fields_hints"] = list(fields_hints.items())
-        
-        messages.append({"role": "system", 
-                         "content": chevron.render(
-                             open(self._extraction_prompt_template_path).read(), 
-                             rendering_configs)})
-
-
         interaction_history = tinyperson.pretty_current_interactions(max_content_length=None)
+        messages = self._agent_extraction_messages(tinyperson.name, interaction_history, extraction_objective, situation, fields, fields_hints)
 
-        extraction_request_prompt = \
-f"""
-## Extraction objective
-
-{extraction_objective}
-
-## Situation
-You are considering a single agent, named {tinyperson.name}. Your objective thus refers to this agent specifically.
-{situation}
+        result = self._request_extraction(messages, verbose=verbose)
+        
+        # cache the result
+        self.agent_extraction[tinyperson.name] = result
 
-## Agent Interactions History
+        return result
+    
+    def extract_results_from_agents(self, 
+                                    agents:list, 
+                                    extraction_objective:str="The main points present in the agent's interactions history.", 
+                                    situation:str="", 
+                                    fields:list=None,
+                                    fields_hints:dict=None,
+                                    max_workers:int=None,
+                                    verbose:bool=False) -> pd.DataFrame:
+        """
+        Extracts results from many TinyPerson instances, with concurrent model calls (bounded by the shared 
+        limit set through `openai_utils.force_max_concurrent_calls`, if any). Results are cached by agent, interaction 
+        history and extraction request, so that repeating an extraction only calls the model for the agents whose histories 
+        changed, and an agent given more than once is extracted only once. Each agent gets its own copy of its result.
 
-You will consider an agent's history of interactions, which include stimuli it received as well as actions it 
-performed.
+        Args:
+            agents (list): The TinyPerson instances to extract results from.
+            extraction_objective (str): The extraction objective.
+            situation (str): The situation to consider.
+            fields (list, optional): The fields to extract. If None, the extractor will decide what names to use. 
+                Defaults to None.
+            fields_hints (dict, optional): Hints for the fields to extract.
+            max_workers (int, optional): The maximum number of concurrent extractions. Defaults to the 
+                `ThreadPoolExecutor` default.
+            verbose (bool, optional): Whether to print debug messages. Defaults to False.
 
-{interaction_history}
-"""
-        messages.append({"role": "user", "content": extraction_request_prompt})
+        Returns:
+            pd.DataFrame: One row per agent, with the agent name, the extraction status (see the `STATUS_*` constants), 
+                the result and, if `fields` is given, one column per field.
+        """
+        histories = [agent.pretty_current_interactions(max_content_length=None) for agent in agents]
 
-        next_message = openai_utils.client().send_message(messages, temperature=0.0)
+        # results describe a specific agent, so they are only reused for that same agent
+        keys = [utils.custom_hash(json.dumps([agent.name, history, extraction_objective, situation, fields, fields_hints], default=str)) 
+                for agent, history in zip(agents, histories)]
         
-        debug_msg = f"Extraction raw result message: {next_message}"
-        logger.debug(debug_msg)
-        if verbose:
-            print(debug_msg)
+        # the first occurrence of each new key is the one actually extracted
+        pending = {}
+        for i, key in enumerate(keys):
+            if key not in self._extraction_cache and key not in pending:
+                pending[key] = i
+
+        def aux_extract(i):
+            messages = self._agent_extraction_messages(agents[i].name, histories[i], extraction_objective, situation, fields, fields_hints)
+            return self._request_extraction(messages, verbose=verbose)
+
+        failed = set()
+        if len(pending) > 0:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {key: executor.submit(aux_extract, i) for key, i in pending.items()}
+            
+            for key, future in futures.items():
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Extraction from agent {agents[pending[key]].name} failed: {e}")
+                    result = None
+                
+                if result is None:
+                    failed.add(key)
+                else:
+                    self._extraction_cache[key] = result
+
+        rows = []
+        for i, (agent, key) in enumerate(zip(agents, keys)):
+            if key in failed:
+                status = ResultsExtractor.STATUS_FAILED
+            elif key not in pending:
+                status = ResultsExtractor.STATUS_CACHED
+            elif pending[key] == i:
+                status = ResultsExtractor.STATUS_EXTRACTED
+            else:
+                status = ResultsExtractor.STATUS_DEDUPLICATED
+            
+            # copied, so that changes to one result affect neither the cache nor other rows
+            result = utils.copy_json_structure(self._extraction_cache.get(key))
+            self.agent_extraction[agent.name] = result
 
-        if next_message is not None:
-            result = utils.extract_json(next_message["content"])
-        else:
-            result = None
-        
-        # cache the result
-        self.agent_extraction[tinyperson.name] = result
+            row = {"agent": agent.name, "status": status, "result": result}
+            for field in (fields or []):
+                row[field] = result.get(field) if isinstance(result, dict) else None
+            rows.append(row)
 
-        return result
-    
+        return pd.DataFrame(rows, columns=["agent", "status", "result"] + list(fields or []))
 
     def extract_results_from_world(self, 
                                    tinyworld:TinyWorld, 
@@ -118,9 +177,14 @@ performed.
                                    situation:str="", 
                                    fields:list=None,
                                    fields_hints:dict=None,
+                                   max_tokens_per_chunk:int=None,
+                                   max_workers:int=None,
                                    verbose:bool=False):
         """
-        Extracts results from a TinyWorld instance.
+        Extracts results from a TinyWorld instance. If the interaction history of the world is longer than 
+        `max_tokens_per_chunk`, it is split into chunks from which partial results are extracted concurrently, 
+        and these are then merged by the model into the final result. Partial and merged results are cached, 
+        so that repeating the extraction over a longer run of the same simulation only processes what changed.
 
         Args:
             tinyworld (TinyWorld): The TinyWorld instance to extract results from.
@@ -128,10 +192,189 @@ performed.
             situation (str): The situation to consider.
             fields (list, optional): The fields to extract. If None, the extractor will decide what names to use. 
                 Defaults to None.
+            max_tokens_per_chunk (int, optional): The maximum number of tokens of interaction history to send at once.
+                Defaults to `DEFAULT_MAX_TOKENS_PER_CHUNK`.
+            max_workers (int, optional): The maximum number of chunks to extract concurrently.
             verbose (bool, optional): Whether to print debug messages. Defaults to False.
         """
+        if max_tokens_per_chunk is None:
+            max_tokens_per_chunk = ResultsExtractor.DEFAULT_MAX_TOKENS_PER_CHUNK
+
+        agent_histories = tinyworld.pretty_current_interactions_per_agent(max_content_length=None)
+        chunks = ResultsExtractor._pack_into_chunks(agent_histories, max_tokens_per_chunk, split_oversized=True)
+
+        if len(chunks) <= 1:
+            messages = self._world_extraction_messages(tinyworld.name, "\n".join(agent_histories), extraction_objective, situation, fields, fields_hints)
+            result = self._request_extraction(messages, verbose=verbose, cached=True)
+        
+        else:
+            logger.info(f"The interaction history of {tinyworld.name} is too long, extracting results from {len(chunks)} chunks.")
+
+            # map: partial results per chunk
+            def aux_extract(i):
+                messages = self._world_extraction_messages(tinyworld.name, chunks[i], extraction_objective, situation, fields, fields_hints, 
+                                                           part=i + 1, n_parts=len(chunks))
+                return self._request_extraction(messages, verbose=verbose, cached=True)
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                partial_results = list(executor.map(aux_extract, range(len(chunks))))
+            
+            failed_parts = [i + 1 for i, partial_result in enumerate(partial_results) if partial_result is None]
+            if len(failed_parts) > 0:
+                logger.error(f"Could not extract results from parts {failed_parts} of {len(chunks)} of the interaction history of {tinyworld.name}, "\
+                             "so the final result does not cover them.")
+
+            # reduce: merge partial results
+            result = self._merge_partial_results(partial_results, extraction_objective, situation, fields, fields_hints, 
+                                                 max_tokens_per_chunk, max_workers=max_workers, verbose=verbose)
+        
+        # cache the result, as a copy of the one kept in the extraction cache
+        result = utils.copy_json_structure(result)
+        self.world_extraction[tinyworld.name] = result
+
+        return result
+    
+    def _world_extraction_messages(self, world_name:str, interaction_history:str, extraction_objective:str, situation:str, 
+                                   fields:list=None, fields_hints:dict=None, part:int=None, n_parts:int=None) -> list:
+        
+        if part is not None:
+            part_note = f"This is only part {part} of {n_parts} of the interactions history, so extract results from this part alone. "\
+                        "The results of all parts will be merged later.\n"
+        else:
+            part_note = ""
+
+        extraction_request_prompt = \
+f"""
+## Extraction objective
+
+{extraction_objective}
+
+## Situation
+You are considering various agents.
+{situation}
+
+## Agents Interactions History
+
+You will consider the history of interactions from various agents that exist in an environment called {world_name}. 
+Each interaction history includes stimuli the corresponding agent received as well as actions it performed.
+{part_note}
+{interaction_history}
+"""
+        return [self._extraction_system_message(fields, fields_hints), 
+                {"role": "user", "content": extraction_request_prompt}]
+
+    def _merge_partial_results(self, partial_results:list, extraction_objective:str, situation:str, fields:list, fields_hints:dict,
+                               max_tokens_per_merge:int, max_workers:int=None, verbose:bool=False):
+        """
+        Merges the partial results extracted from chunks of an interaction history. If they do not fit in a single 
+        merge request, they are merged in groups first, repeatedly. If some merge fails, the results obtained so far are
+        returned unmerged instead, under the `UNMERGED_PARTIAL_RESULTS_KEY` key.
+        """
+        partial_results = [result for result in partial_results if result is not None]
+        if len(partial_results) == 0:
+            return None
+        elif len(partial_results) == 1:
+            return partial_results[0]
+        
+        rendered_results = [json.dumps(result, indent=2, ensure_ascii=False) for result in partial_results]
+        groups = ResultsExtractor._pack_into_groups(rendered_results, max_tokens_per_merge)
+        if len(groups) == len(rendered_results):
+            # too large to group within the budget, so we at least merge them in pairs
+            groups = [rendered_results[i:i + 2] for i in range(0, len(rendered_results), 2)]
+
+        def aux_merge(group):
+            if len(group) == 1:
+                return json.loads(group[0])
+            
+            partial_results_text = "\n\n".join(f"### Partial result {i + 1}\n\n```json\n{result}\n```" for i, result in enumerate(group))
+            merge_request_prompt = \
+f"""
+## Extraction objective
+
+{extraction_objective}
+
+## Situation
+{situation}
+
+## Partial Extraction Results
+
+The interactions history was too long to be considered at once, so it was split into consecutive parts, from which 
+the following results were extracted separately. You must merge them into a single result for the whole history, 
+according to the extraction objective: combine complementary information, remove duplicates and, in case of conflicts, 
+prefer later parts.
+
+{partial_results_text}
+"""
+            messages = [self._extraction_system_message(fields, fields_hints), 
+                        {"role": "user", "content": merge_request_prompt}]
+            return self._request_extraction(messages, verbose=verbose, cached=True)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            merged_results = list(executor.map(aux_merge, groups))
+        
+        if any(merged_result is None for merged_result in merged_results):
+            # the partial results of failed merges are kept as they are, so that nothing extracted so far is lost
+            n_failed = sum(1 for merged_result in merged_results if merged_result is None)
+            logger.error(f"{n_failed} of {len(groups)} merges of partial extraction results failed, so the partial results are returned unmerged.")
+
+            unmerged_results = []
+            for group, merged_result in zip(groups, merged_results):
+                unmerged_results += [json.loads(result) for result in group] if merged_result is None else [merged_result]
+            return {ResultsExtractor.UNMERGED_PARTIAL_RESULTS_KEY: unmerged_results}
+
+        return self._merge_partial_results(merged_results, extraction_objective, situation, fields, fields_hints, 
+                                           max_tokens_per_merge, max_workers=max_workers, verbose=verbose)
+
+    @staticmethod
+    def _pack_into_groups(texts:list, max_tokens:int, split_oversized:bool=False) -> list:
+        """
+        Packs consecutive texts into groups whose total number of tokens is within the specified maximum. 
+        Texts that are larger than that on their own are either split by lines (if `split_oversized` is True) 
+        or put in a group of their own.
+        """
+        groups = []
+        current_group = []
+        current_tokens = 0
+
+        for text in texts:
+            n_tokens = openai_utils.count_tokens(text)
+            
+            if n_tokens > max_tokens and split_oversized and "\n" in text:
+                pieces = ResultsExtractor._pack_into_chunks(text.split("\n"), max_tokens, separator="\n")
+                
+                # the first line (e.g., the header of an agent's history) gives context to the remaining pieces
+                header = text.split("\n", 1)[0]
+                pieces = pieces[:1] + [f"{header} (continued)\n{piece}" for piece in pieces[1:]]
+            else:
+                pieces = [text]
+            
+            for piece in pieces:
+                n_tokens = openai_utils.count_tokens(piece) if len(pieces) > 1 else n_tokens
+                if len(current_group) > 0 and current_tokens + n_tokens > max_tokens:
+                    groups.append(current_group)
+                    current_group = []
+                    current_tokens = 0
+                
+                current_group.append(piece)
+                current_tokens += n_tokens
+        
+        if len(current_group) > 0:
+            groups.append(current_group)
+        
+        return groups
+
+    @staticmethod
+    def _pack_into_chunks(texts:list, max_tokens:int, split_oversized:bool=False, separator:str="\n") -> list:
+        """
+        Packs consecutive texts into chunks (i.e., joined groups, see `_pack_into_groups`).
+        """
+        return [separator.join(group) for group in ResultsExtractor._pack_into_groups(texts, max_tokens, split_oversized=split_oversized)]
 
-        messages = []
+    def _extraction_system_message(self, fields:list=None, fields_hints:dict=None) -> dict:
+        # the template is read only once
+        if self._extraction_prompt_template is None:
+            with open(self._extraction_prompt_template_path) as f:
+                self._extraction_prompt_template = f.read()
 
         rendering_configs = {}
         if fields is not None:
@@ -140,14 +383,10 @@ performed.
         if fields_hints is not None:
             rendering_configs["fields_hints"] = list(fields_hints.items())
         
-        messages.append({"role": "system", 
-                         "content": chevron.render(
-                             open(self._extraction_prompt_template_path).read(), 
-                             rendering_configs)})
-
-        # TODO: either summarize first or break up into multiple tasks
-        interaction_history = tinyworld.pretty_current_interactions(max_content_length=None)
+        return {"role": "system", "content": chevron.render(self._extraction_prompt_template, rendering_configs)}
 
+    def _agent_extraction_messages(self, agent_name:str, interaction_history:str, extraction_objective:str, situation:str, 
+                                   fields:list=None, fields_hints:dict=None) -> list:
         extraction_request_prompt = \
 f"""
 ## Extraction objective
@@ -155,17 +394,24 @@ f"""
 {extraction_objective}
 
 ## Situation
-You are considering various agents.
+You are considering a single agent, named {agent_name}. Your objective thus refers to this agent specifically.
 {situation}
 
-## Agents Interactions History
+## Agent Interactions History
 
-You will consider the history of interactions from various agents that exist in an environment called {tinyworld.name}. 
-Each interaction history includes stimuli the corresponding agent received as well as actions it performed.
+You will consider an agent's history of interactions, which include stimuli it received as well as actions it 
+performed.
 
 {interaction_history}
 """
-        messages.append({"role": "user", "content": extraction_request_prompt})
+        return [self._extraction_system_message(fields, fields_hints), 
+                {"role": "user", "content": extraction_request_prompt}]
+
+    def _request_extraction(self, messages:list, verbose:bool=False, cached:bool=False):
+        if cached:
+            cache_key = utils.custom_hash(json.dumps(messages))
+            if cache_key in self._extraction_cache:
+                return self._extraction_cache[cache_key]
 
         next_message = openai_utils.client().send_message(messages, temperature=0.0)
         
@@ -179,8 +425,8 @@ Each interaction history includes stimuli the corresponding agent received as we
         else:
             result = None
         
-        # cache the result
-        self.world_extraction[tinyworld.name] = result
+        if cached and result is not None:
+            self._extraction_cache[cache_key] = result
 
         return result
     
@@ -192,9 +438,8 @@ Each interaction history includes stimuli the corresponding agent received as we
             filename (str): The filename to save the JSON to.
             verbose (bool, optional): Whether to print debug messages. Defaults to False.
         """
-        with open(filename, 'w') as f:
-            json.dump({"agent_extractions": self.agent_extraction, 
-                       "world_extraction": self.world_extraction}, f, indent=4)
+        utils.write_serialized_file({"agent_extractions": self.agent_extraction, 
+                                     "world_extraction": self.world_extraction}, filename)
         
         if verbose:
             print(f"Saved extraction results to {filename}")
@@ -203,53 +448,203 @@ Each interaction history includes stimuli the corresponding agent received as we
 
 class ResultsReducer:
 
+    # the columns of the interactions DataFrame, as returned by `interactions_dataframe`
+    INTERACTION_COLUMNS = ["focus_agent", "kind", "event", "source", "target", "content", "timestamp"]
+    CATEGORICAL_INTERACTION_COLUMNS = ["focus_agent", "kind", "event", "source", "target"]
+
     def __init__(self):
         self.results = {}
 
         self.rules = {}
+        self.vectorized_rules = {}
     
     def add_reduction_rule(self, trigger: str, func: callable):
-        if trigger in self.rules:
+        if trigger in self.rules or trigger in self.vectorized_rules:
             raise Exception(f"Rule for {trigger} already exists.")
         
         self.rules[trigger] = func
     
+    def add_vectorized_reduction_rule(self, trigger: str, func: callable):
+        """
+        Adds a rule that is applied, in `reduce_population`, to all the interactions of the specified event type at once.
+
+        Args:
+            trigger (str): The event type (e.g., TALK, CONVERSATION) that triggers the rule.
+            func (callable): A function taking a DataFrame with the matching interactions (see `interactions_dataframe`) 
+                and returning the extracted results, as a DataFrame, or anything that can be turned into one.
+        """
+        if trigger in self.rules or trigger in self.vectorized_rules:
+            raise Exception(f"Rule for {trigger} already exists.")
+        
+        self.vectorized_rules[trigger] = func
+    
     def reduce_agent(self, agent: TinyPerson) -> list:
-        reduction = []
-        for message in agent.episodic_memory.retrieve_all():
-            if message['role'] == 'system':
-                continue # doing nothing for `system` role yet at least
+        return self._reduce_interactions(agent, ResultsReducer._agent_interactions(agent), agents_by_name={})
 
-            elif message['role'] == 'user':
-                # User role is related to stimuli only
-                stimulus_type = message['content']['stimuli'][0]['type']
-                stimulus_content = message['content']['stimuli'][0]['content']
-                stimulus_source = message['content']['stimuli'][0]['source']
-                stimulus_timestamp = message['simulation_timestamp']
+    def reduce_agent_to_dataframe(self, agent: TinyPerson, column_names: list=None) -> pd.DataFrame:
+        reduction = self.reduce_agent(agent)
+        return pd.DataFrame(reduction, columns=column_names)
 
-                if stimulus_type in self.rules:
-                    extracted = self.rules[stimulus_type](focus_agent=agent, source_agent=TinyPerson.get_agent_by_name(stimulus_source), target_agent=agent, kind='stimulus', event=stimulus_type, content=stimulus_content, timestamp=stimulus_timestamp)
-                    if extracted is not None:
-                        reduction.append(extracted)
+    def reduce_population(self, agents: list, column_names: list=None, parallel: bool=False, max_workers: int=None) -> pd.DataFrame:
+        """
+        Reduces the interactions of many agents at once. All memories are flattened into a single DataFrame 
+        (see `interactions_dataframe`), which is filtered by event type for each rule: vectorized rules get all 
+        their matching interactions in one call, while regular rules are called once per matching interaction, 
+        as in `reduce_agent`.
+
+        Args:
+            agents (list): The agents to reduce.
+            column_names (list, optional): The names of the columns of the results of regular rules.
+            parallel (bool): Whether to apply regular rules to the agents concurrently, in a thread pool. This pays 
+                off when the rules themselves wait on I/O (e.g., model calls). Defaults to False.
+            max_workers (int, optional): The maximum number of threads, if `parallel` is True.
+
+        Returns:
+            pd.DataFrame: The results of regular rules, in agent order, followed by those of vectorized rules.
+        """
+        interactions = self.interactions_dataframe(agents)
+        agents_by_name = {agent.name: agent for agent in agents}
+
+        reductions = []
+
+        # regular rules, per interaction
+        if self.rules:
+            matching = interactions[interactions["event"].isin(list(self.rules.keys()))]
+            rows_by_agent = {name: group for name, group in matching.groupby("focus_agent", observed=True, sort=False)}
+            
+            def aux_reduce(agent):
+                rows = rows_by_agent.get(agent.name)
+                if rows is None:
+                    return []
+                return self._reduce_interactions(agent, rows.itertuples(index=False, name=None), agents_by_name)
+
+            if parallel:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    per_agent_reductions = list(executor.map(aux_reduce, agents))
+            else:
+                per_agent_reductions = [aux_reduce(agent) for agent in agents]
+
+            reduction = [extracted for agent_reduction in per_agent_reductions for extracted in agent_reduction]
+            reductions.append(pd.DataFrame(reduction, columns=column_names))
+
+        # vectorized rules, per event type
+        for trigger, func in self.vectorized_rules.items():
+            extracted = func(interactions[interactions["event"] == trigger])
+            if extracted is not None:
+                reductions.append(extracted if isinstance(extracted, pd.DataFrame) else pd.DataFrame(extracted))
 
-            elif message['role'] == 'assistant':
+        if len(reductions) == 0:
+            return pd.DataFrame(columns=column_names)
+        
+        return pd.concat(reductions, ignore_index=True)
+
+    def interactions_dataframe(self, agents: list) -> pd.DataFrame:
+        """
+        Flattens the episodic memories of the specified agents into a single DataFrame, with one row per stimulus or 
+        action, in agent order. Agent names, kinds and event types are categorical columns.
+
+        The interactions of agents in a world that keeps an interaction log covering their whole memories (see 
+        `TinyPerson.interaction_log_view`) are taken from that log, which is already columnar, rather than from 
+        their memories.
+        """
+        # consecutive agents with the same source of interactions (a log, or None for their memories) are read together
+        segments = [] # [(log, [rows, ...]) or (None, [interaction, ...]), ...]
+        for agent in agents:
+            view = agent.interaction_log_view()
+            log = view.log if view is not None else None
+            if len(segments) == 0 or segments[-1][0] is not log:
+                segments.append((log, []))
+            
+            if log is not None:
+                segments[-1][1].append(view.rows())
+            else:
+                segments[-1][1].extend(ResultsReducer._agent_interactions(agent))
+        
+        frames = [ResultsReducer._log_interactions_dataframe(log, np.concatenate(items)) if log is not None 
+                  else ResultsReducer._memory_interactions_dataframe(items) for log, items in segments]
+        if len(frames) == 0:
+            df = ResultsReducer._memory_interactions_dataframe([])
+        elif len(frames) == 1:
+            df = frames[0]
+        else:
+            df = pd.concat([frame.astype(object) for frame in frames], ignore_index=True)
+        
+        for column in ResultsReducer.CATEGORICAL_INTERACTION_COLUMNS:
+            df[column] = df[column].astype("category")
+            # categories are sorted, whatever the source of the interactions
+            categories = df[column].cat.categories
+            try:
+                df[column] = df[column].cat.reorder_categories(sorted(categories))
+            except TypeError:
+                pass
+        
+        return df
+
+    @staticmethod
+    def _memory_interactions_dataframe(interactions: list) -> pd.DataFrame:
+        columns = zip(*interactions) if len(interactions) > 0 else [[] for _ in ResultsReducer.INTERACTION_COLUMNS]
+        return pd.DataFrame({name: pd.Series(column, dtype=object) for name, column in zip(ResultsReducer.INTERACTION_COLUMNS, columns)}, 
+                            columns=ResultsReducer.INTERACTION_COLUMNS)
+
+    @staticmethod
+    def _log_interactions_dataframe(log, rows) -> pd.DataFrame:
+        df = log.to_dataframe(rows=rows).rename(columns={"agent": "focus_agent", "type": "event", "simulation_timestamp": "timestamp"})
+        df = df[ResultsReducer.INTERACTION_COLUMNS]
+        
+        # only the categorical columns of the interactions DataFrame stay categorical, without the unused categories
+        df["content"] = pd.Series(df["content"].to_numpy(dtype=object), dtype=object)
+        df["timestamp"] = df["timestamp"].astype(object).where(df["timestamp"].notna(), None)
+        for column in ResultsReducer.CATEGORICAL_INTERACTION_COLUMNS:
+            df[column] = df[column].cat.remove_unused_categories()
+        
+        return df.reset_index(drop=True)
+
+    @staticmethod
+    def _agent_interactions(agent: TinyPerson):
+        """
+        Yields the interactions of the agent as (focus_agent, kind, event, source, target, content, timestamp) tuples,
+        reading its memory directly rather than a copy of it.
+        """
+        for message in agent.episodic_memory.memory:
+            role = message['role']
+
+            if role == 'user':
+                # User role is related to stimuli only
+                for stimulus in message['content']['stimuli']:
+                    yield (agent.name, 'stimulus', stimulus['type'], stimulus['source'], agent.name, 
+                           stimulus['content'], message['simulation_timestamp'])
+
+            elif role == 'assistant':
                 # Assistant role is related to actions only
-                if 'action' in message['content']: 
-                    action_type = message['content']['action']['type']
-                    action_content = message['content']['action']['content']
-                    action_target = message['content']['action']['target']
-                    action_timestamp = message['simulation_timestamp']
-                    
-                    if action_type in self.rules:
-                        extracted = self.rules[action_type](focus_agent=agent, source_agent=agent, target_agent=TinyPerson.get_agent_by_name(action_target), kind='action', event=action_type, content=action_content, timestamp=action_timestamp)
-                        if extracted is not None:
-                            reduction.append(extracted)
+                action = message['content'].get('action') if isinstance(message['content'], dict) else None
+                if action is not None:
+                    yield (agent.name, 'action', action['type'], agent.name, action.get('target'),
+                           action['content'], message['simulation_timestamp'])
             
-        return reduction
+            # doing nothing for `system` role yet at least
 
-    def reduce_agent_to_dataframe(self, agent: TinyPerson, column_names: list=None) -> pd.DataFrame:
-        reduction = self.reduce_agent(agent)
-        return pd.DataFrame(reduction, columns=column_names)
+    def _reduce_interactions(self, agent: TinyPerson, interactions, agents_by_name: dict) -> list:
+        def aux_agent(name):
+            # agents are looked up only once per name
+            if name not in agents_by_name:
+                agents_by_name[name] = TinyPerson.get_agent_by_name(name)
+            return agents_by_name[name]
+
+        reduction = []
+        for _, kind, event, source, target, content, timestamp in interactions:
+            rule = self.rules.get(event)
+            if rule is None:
+                continue
+
+            if kind == 'stimulus':
+                extracted = rule(focus_agent=agent, source_agent=aux_agent(source), target_agent=agent, kind=kind, event=event, content=content, timestamp=timestamp)
+            else:
+                extracted = rule(focus_agent=agent, source_agent=agent, target_agent=aux_agent(target), kind=kind, event=event, content=content, timestamp=timestamp)
+            
+            if extracted is not None:
+                reduction.append(extracted)
+            
+        return reduction
 
 
 class ArtifactExporter(JsonSerializableRegistry):
@@ -323,11 +718,10 @@ class ArtifactExporter(JsonSerializableRegistry):
         Exports the specified artifact data to a JSON file.
         """
 
-        with open(artifact_file_path, 'w', encoding="utf-8") as f:
-            if isinstance(artifact_data, dict):
-                json.dump(artifact_data, f, indent=4)                
-            else:
-                raise ValueError("The artifact data must be a dictionary to export to JSON.")
+        if isinstance(artifact_data, dict):
+            utils.write_serialized_file(artifact_data, artifact_file_path)
+        else:
+            raise ValueError("The artifact data must be a dictionary to export to JSON.")
     
     def _export_as_docx(self, artifact_file_path:str, artifact_data:Union[dict, str], content_original_format:str, verbose:bool=False):
         """
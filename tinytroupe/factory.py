@@ -3,11 +3,23 @@ import json
 import chevron
 import logging
 import copy
+import re
+import zlib
+import math
+import random
+import queue
+import threading
+import functools
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 logger = logging.getLogger("tinytroupe")
 
 from tinytroupe import openai_utils
 from tinytroupe.agent import TinyPerson
 import tinytroupe.utils as utils
+import tinytroupe.control as control
 from tinytroupe.control import transactional
 
 class TinyFactory:
@@ -88,21 +100,391 @@ class TinyFactory:
         return self
  
 
+class PersonaIndex:
+    """
+    A local index of generated personas, used to reject near-duplicates before agents are created and to measure
+    the diversity of a population. Each persona is indexed by:
+      - its profile, i.e., its mini-biography without the name, which must be unique;
+      - a MinHash signature of its description (profile and occupation description), with locality-sensitive hashing (LSH) 
+        buckets, so that similar personas are found without comparing against all others;
+      - its attributes (age, occupation, nationality), which must also be close for personas to be near-duplicates.
+    """
+
+    # a prime larger than 2**32, for the universal hash functions of MinHash. Products of 32-bit values fit in 64 bits.
+    _MINHASH_PRIME = 4294967311
+
+    def __init__(self, num_permutations:int=64, bands:int=16, similarity_threshold:float=0.8, max_age_difference:int=3, seed:int=42):
+        """
+        Initializes an empty index.
+
+        Args:
+            num_permutations (int): The number of hash functions of the MinHash signatures.
+            bands (int): The number of LSH bands. Must divide `num_permutations`. More bands find less similar candidates.
+            similarity_threshold (float): The minimum estimated Jaccard similarity of descriptions for near-duplicates.
+            max_age_difference (int): The maximum age difference for near-duplicates.
+            seed (int): The seed of the hash functions.
+        """
+        if num_permutations % bands != 0:
+            raise ValueError(f"The number of bands ({bands}) must divide the number of permutations ({num_permutations}).")
+        
+        self.num_permutations = num_permutations
+        self.bands = bands
+        self.similarity_threshold = similarity_threshold
+        self.max_age_difference = max_age_difference
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        self._hash_a = rng.integers(1, 2**32, size=num_permutations, dtype=np.uint64)
+        self._hash_b = rng.integers(0, 2**32, size=num_permutations, dtype=np.uint64)
+
+        self._profiles = set()
+        self._signatures = [] # one np.ndarray per persona
+        self._attributes = [] # one (age, occupation, nationality) tuple per persona
+        self._buckets = {} # (band, band signature) -> [persona index, ...]
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def is_near_duplicate(self, name:str, configuration:dict) -> bool:
+        """
+        Checks whether the specified persona is a near-duplicate of an indexed one.
+        """
+        if PersonaIndex.profile(name, configuration) in self._profiles:
+            return True
+        
+        signature = self._signature(PersonaIndex._description(name, configuration))
+        attributes = PersonaIndex._attributes_of(configuration)
+
+        for i in self._candidates(signature):
+            if self._attributes_are_close(attributes, self._attributes[i]) and \
+               np.mean(signature == self._signatures[i]) >= self.similarity_threshold:
+                return True
+        
+        return False
+
+    def add(self, name:str, configuration:dict):
+        """
+        Adds the specified persona to the index.
+        """
+        signature = self._signature(PersonaIndex._description(name, configuration))
+        i = len(self._signatures)
+
+        self._profiles.add(PersonaIndex.profile(name, configuration))
+        self._signatures.append(signature)
+        self._attributes.append(PersonaIndex._attributes_of(configuration))
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(i)
+
+    def diversity_metrics(self, max_pairs:int=100000) -> dict:
+        """
+        Computes diversity metrics of the indexed personas:
+          - the numbers of personas, of distinct occupations and of distinct nationalities;
+          - the normalized entropies (between 0 and 1) of occupations and nationalities;
+          - the mean and standard deviation of ages;
+          - the mean estimated Jaccard similarity of descriptions over pairs of personas (at most `max_pairs` of them, 
+            sampled at random), which is lower for more diverse populations.
+        """
+        n = len(self._signatures)
+        occupations = Counter(attributes[1] for attributes in self._attributes)
+        nationalities = Counter(attributes[2] for attributes in self._attributes)
+        ages = np.array([attributes[0] for attributes in self._attributes if attributes[0] is not None], dtype=float)
+
+        mean_similarity = None
+        if n >= 2:
+            signatures = np.array(self._signatures)
+            n_pairs = n * (n - 1) // 2
+            if n_pairs <= max_pairs:
+                left, right = np.triu_indices(n, k=1)
+            else:
+                rng = np.random.default_rng(self.seed)
+                left = rng.integers(0, n, size=max_pairs)
+                right = (left + rng.integers(1, n, size=max_pairs)) % n # never the same persona
+            mean_similarity = float(np.mean(signatures[left] == signatures[right]))
+
+        return {"personas": n,
+                "distinct_occupations": len(occupations),
+                "distinct_nationalities": len(nationalities),
+                "occupation_entropy": PersonaIndex._normalized_entropy(occupations),
+                "nationality_entropy": PersonaIndex._normalized_entropy(nationalities),
+                "age_mean": float(ages.mean()) if len(ages) > 0 else None,
+                "age_std": float(ages.std()) if len(ages) > 0 else None,
+                "mean_similarity": mean_similarity}
+
+    @staticmethod
+    def profile(name:str, configuration:dict) -> str:
+        """
+        Returns the normalized mini-biography of the persona, without its name.
+        """
+        return PersonaIndex.normalized_text(f"{configuration.get('age')} year old {configuration.get('occupation')}, "
+                                            f"{configuration.get('nationality')}, currently living in {configuration.get('country_of_residence')}.")
+
+    @staticmethod
+    def normalized_text(text:str) -> str:
+        return " ".join(str(text).lower().split())
+
+    def encode_complete_state(self) -> dict:
+        return {"num_permutations": self.num_permutations, "bands": self.bands, "similarity_threshold": self.similarity_threshold,
+                "max_age_difference": self.max_age_difference, "seed": self.seed,
+                "profiles": sorted(self._profiles),
+                "signatures": np.array(self._signatures).tolist(),
+                "attributes": [list(attributes) for attributes in self._attributes]}
+
+    def decode_complete_state(self, state:dict) -> "PersonaIndex":
+        self.__init__(num_permutations=state["num_permutations"], bands=state["bands"], similarity_threshold=state["similarity_threshold"],
+                      max_age_difference=state["max_age_difference"], seed=state["seed"])
+        
+        self._profiles = set(state["profiles"])
+        for signature, attributes in zip(state["signatures"], state["attributes"]):
+            signature = np.array(signature, dtype=np.uint64)
+            for key in self._band_keys(signature):
+                self._buckets.setdefault(key, []).append(len(self._signatures))
+            self._signatures.append(signature)
+            self._attributes.append(tuple(attributes))
+        
+        return self
+
+    def _signature(self, text:str) -> np.ndarray:
+        words = re.findall(r"\w+", text.lower())
+        shingles = {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+        hashes = np.array([zlib.crc32(shingle.encode("utf-8")) for shingle in shingles], dtype=np.uint64)
+
+        # (a * h + b) mod p, for each hash function (rows) and shingle (columns)
+        permuted = (self._hash_a[:, None] * hashes[None, :] + self._hash_b[:, None]) % PersonaIndex._MINHASH_PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature:np.ndarray) -> list:
+        rows = self.num_permutations // self.bands
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def _candidates(self, signature:np.ndarray) -> set:
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, []))
+        return candidates
+
+    def _attributes_are_close(self, attributes:tuple, other_attributes:tuple) -> bool:
+        age, occupation, nationality = attributes
+        other_age, other_occupation, other_nationality = other_attributes
+
+        if occupation != other_occupation or nationality != other_nationality:
+            return False
+        
+        if age is None or other_age is None:
+            return age == other_age
+        return abs(age - other_age) <= self.max_age_difference
+
+    @staticmethod
+    def _description(name:str, configuration:dict) -> str:
+        return f"{PersonaIndex.profile(name, configuration)} {configuration.get('occupation_description', '')}"
+
+    @staticmethod
+    def _attributes_of(configuration:dict) -> tuple:
+        try:
+            age = float(configuration.get("age"))
+        except (TypeError, ValueError):
+            age = None
+        
+        return (age, PersonaIndex.normalized_text(configuration.get("occupation")), PersonaIndex.normalized_text(configuration.get("nationality")))
+
+    @staticmethod
+    def _normalized_entropy(counts:Counter) -> float:
+        total = sum(counts.values())
+        if len(counts) <= 1:
+            return 0.0
+        
+        entropy = -sum((count / total) * math.log(count / total) for count in counts.values())
+        return entropy / math.log(len(counts))
+
+
+class PersonaLibrary:
+    """
+    A persistent library of generated persona specifications (in the `TinyPerson.save_spec` format), kept in a folder 
+    and indexed by the context text and particularities they were generated for. Factories using a library draw 
+    personas from it before calling the LLM, and add the ones they generate, so that populations are available 
+    instantly in later runs and experiments.
+    """
+
+    INDEX_FILE_NAME = "index.json"
+
+    def __init__(self, folder:str, sample_without_replacement:bool=True, seed:int=None):
+        """
+        Opens (or creates) a library in the specified folder.
+
+        Args:
+            folder (str): The folder where the specifications and the index are kept.
+            sample_without_replacement (bool): If True, each specification is drawn at most once by this library instance 
+                (see `reset_draws`). Defaults to True.
+            seed (int, optional): The seed of the random order in which specifications are drawn. If None, they are drawn
+                in the order they were added.
+        """
+        self.folder = folder
+        self.sample_without_replacement = sample_without_replacement
+        self._random = random.Random(seed) if seed is not None else None
+
+        os.makedirs(folder, exist_ok=True)
+        index_path = os.path.join(folder, PersonaLibrary.INDEX_FILE_NAME)
+        self._index = utils.read_serialized_file(index_path) if os.path.exists(index_path) else {} # key -> entry
+
+        self._drawn = set() # spec files already drawn, when sampling without replacement
+
+        # factories might add personas concurrently
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(context_text:str, agent_particularities:str=None) -> str:
+        """
+        Returns the key under which the specifications for the given context and particularities are kept.
+        """
+        return utils.custom_hash(json.dumps([utils.dedent(context_text), agent_particularities]))
+
+    def __len__(self):
+        return sum(len(entry["specs"]) for entry in self._index.values())
+
+    def names(self, context_text:str, agent_particularities:str=None) -> list:
+        """
+        Returns the names of the personas in the library for the given context and particularities.
+        """
+        entry = self._index.get(PersonaLibrary.key(context_text, agent_particularities), {"specs": []})
+        return [spec["name"] for spec in entry["specs"]]
+
+    def add(self, agent:TinyPerson, context_text:str, agent_particularities:str=None):
+        """
+        Adds the specification of the agent to the library, under the given context and particularities. 
+        Personas whose names are already there are not added again.
+        """
+        self.add_many([agent], context_text, agent_particularities)
+
+    def add_many(self, agents:list, context_text:str, agent_particularities:str=None):
+        """
+        Adds the specifications of several agents to the library, under the given context and particularities, saving
+        the index only once. Personas whose names are already there are not added again.
+        """
+        key = PersonaLibrary.key(context_text, agent_particularities)
+        with self._lock:
+            entry = self._index.setdefault(key, {"context_text": utils.dedent(context_text), 
+                                                 "agent_particularities": agent_particularities, 
+                                                 "specs": []})
+            names = {spec["name"] for spec in entry["specs"]}
+
+            n_added = 0
+            for agent in agents:
+                if agent.name in names:
+                    continue
+
+                spec_file = os.path.join(key, f"{utils.custom_hash(agent.name)}.agent.json")
+                os.makedirs(os.path.join(self.folder, key), exist_ok=True)
+                agent.save_spec(os.path.join(self.folder, spec_file), include_memory=False)
+
+                entry["specs"].append({"name": agent.name, "file": spec_file, "minibio": agent.minibio()})
+                names.add(agent.name)
+                n_added += 1
+            
+            if n_added > 0:
+                self._save_index()
+
+    def draw(self, context_text:str, agent_particularities:str=None, accept:callable=None) -> TinyPerson:
+        """
+        Draws a persona from the library for the given context and particularities, creating the agent.
+
+        Args:
+            context_text (str): The context text of the persona.
+            agent_particularities (str, optional): The particularities of the persona.
+            accept (callable, optional): A function taking the name and configuration of a candidate persona, and returning 
+                whether it is acceptable (e.g., not a duplicate of existing agents). Rejected candidates remain available.
+
+        Returns:
+            TinyPerson: The agent, or None if no suitable persona is available.
+        """
+        entry = self._index.get(PersonaLibrary.key(context_text, agent_particularities))
+        if entry is None:
+            return None
+        
+        specs = list(entry["specs"])
+        if self._random is not None:
+            self._random.shuffle(specs)
+
+        for spec in specs:
+            if self.sample_without_replacement and spec["file"] in self._drawn:
+                continue
+            
+            path = os.path.join(self.folder, spec["file"])
+            if not os.path.exists(path):
+                logger.warning(f"Persona specification {path} is listed in the library index, but could not be found.")
+                continue
+
+            agent_spec = utils.read_serialized_file(path)
+            if TinyPerson.has_agent(agent_spec["name"]) or \
+               (accept is not None and not accept(agent_spec["name"], agent_spec["_configuration"])):
+                continue
+            
+            self._drawn.add(spec["file"])
+            return TinyPerson.load_spec(path)
+        
+        return None
+
+    def reset_draws(self):
+        """
+        Makes all specifications available again, when sampling without replacement.
+        """
+        self._drawn = set()
+
+    def _save_index(self):
+        """
+        Saves the index atomically, through a temporary file in the same folder, so that it is never left half-written
+        (e.g., by a crash). Personas added meanwhile by other libraries sharing the folder (e.g., in other processes)
+        are merged in first, so that they are kept.
+        """
+        index_path = os.path.join(self.folder, PersonaLibrary.INDEX_FILE_NAME)
+        if os.path.exists(index_path):
+            self._merge_index(utils.read_serialized_file(index_path))
+
+        with tempfile.NamedTemporaryFile('wb', delete=False, dir=self.folder, suffix=".tmp") as temp:
+            try:
+                temp.write(utils.serialize(self._index, utils.serialization_format_for(index_path), indent=True))
+            except Exception:
+                temp.close()
+                os.remove(temp.name)
+                raise
+
+        os.replace(temp.name, index_path)
+
+    def _merge_index(self, other_index:dict):
+        for key, other_entry in other_index.items():
+            entry = self._index.setdefault(key, other_entry)
+            if entry is not other_entry:
+                names = {spec["name"] for spec in entry["specs"]}
+                entry["specs"] += [spec for spec in other_entry["specs"] if spec["name"] not in names]
+
+
 class TinyPersonFactory(TinyFactory):
 
-    def __init__(self, context_text, simulation_id:str=None):
+    # the maximum number of previously generated agents mentioned in generation prompts, so that prompts do not grow
+    # with the number of agents. Uniqueness is enforced locally in any case.
+    MAX_ALREADY_GENERATED_IN_PROMPT = 20
+
+    # the default number of concurrent model calls in `generate_people`
+    DEFAULT_PARALLELISM = 8
+
+    # agents are created under this lock, since factories might be generating people concurrently
+    _agent_creation_lock = threading.Lock()
+
+    def __init__(self, context_text, simulation_id:str=None, persona_library:PersonaLibrary=None):
         """
         Initialize a TinyPersonFactory instance.
 
         Args:
             context_text (str): The context text used to generate the TinyPerson instances.
             simulation_id (str, optional): The ID of the simulation. Defaults to None.
+            persona_library (PersonaLibrary, optional): A library of persona specifications to draw from before calling 
+                the LLM, and to which newly generated personas are added. Defaults to None.
         """
         super().__init__(simulation_id)
         self.person_prompt_template_path = os.path.join(os.path.dirname(__file__), 'prompts/generate_person.mustache')
         self.context_text = context_text
         self.generated_minibios = [] # keep track of the generated persons. We keep the minibio to avoid generating the same person twice.
-        self.generated_names = []
+        self.generated_names = set()
+        self.persona_index = PersonaIndex() # to reject near-duplicates of the generated persons
+        self.persona_library = persona_library
 
     @staticmethod
     def generate_person_factories(number_of_factories, generic_context_text):
@@ -117,6 +499,22 @@ class TinyPersonFactory(TinyFactory):
             list: A list of TinyPersonFactory instances.
         """
         
+        factories = list(TinyPersonFactory.generate_person_factories_iter(number_of_factories, generic_context_text))
+        return factories if len(factories) > 0 else None
+
+    @staticmethod
+    def generate_person_factories_iter(number_of_factories, generic_context_text):
+        """
+        Generate TinyPersonFactory instances using OpenAI's LLM, yielding each one as soon as it is available.
+
+        Args:
+            number_of_factories (int): The number of TinyPersonFactory instances to generate.
+            generic_context_text (str): The generic context text used to generate the TinyPersonFactory instances.
+
+        Returns:
+            iterator: An iterator of TinyPersonFactory instances.
+        """
+        
         logger.info(f"Starting the generation of the {number_of_factories} person factories based on that context: {generic_context_text}")
         
         system_prompt = open(os.path.join(os.path.dirname(__file__), 'prompts/generate_person_factory.md')).read()
@@ -136,14 +534,96 @@ class TinyPersonFactory(TinyFactory):
         if response is not None:
             result = utils.extract_json(response["content"])
 
-            factories = []
             for i in range(number_of_factories):
                 logger.debug(f"Generating person factory with description: {result[i]}")
-                factories.append(TinyPersonFactory(result[i]))
+                yield TinyPersonFactory(result[i])
 
-            return factories
+    @staticmethod
+    def generate_population(number_of_factories:int, generic_context_text:str, people_per_factory:int=1, 
+                            max_concurrent_factories:int=4, max_buffered_people:int=16, **generation_args):
+        """
+        Generates people from several person factories, themselves generated from a generic context (see 
+        `generate_person_factories`), as a pipeline: each factory starts generating people as soon as it is available, 
+        concurrently with the others, and people are yielded as soon as they are created. Generation pauses while 
+        `max_buffered_people` people are waiting to be consumed, so a slow consumer is not flooded. When the consumer closes 
+        the iterator, no further factories are generated nor model calls started, and closing waits for the calls in flight.
 
-        return None
+        Within a simulation, the generation is sequential instead, so that it can be cached and replayed consistently.
+
+        Args:
+            number_of_factories (int): The number of person factories to generate.
+            generic_context_text (str): The generic context text used to generate the person factories.
+            people_per_factory (int): The number of people to generate with each factory.
+            max_concurrent_factories (int): The maximum number of factories generating people at the same time.
+            max_buffered_people (int): The maximum number of people generated but not consumed yet.
+            generation_args: Further arguments for `generate_people`.
+
+        Returns:
+            iterator: An iterator of TinyPerson instances.
+        """
+
+        if control.current_simulation() is not None:
+            for factory in TinyPersonFactory.generate_person_factories_iter(number_of_factories, generic_context_text):
+                yield from factory.generate_people(people_per_factory, **generation_args)
+            return
+
+        buffer = queue.Queue(maxsize=max_buffered_people)
+        stopped = threading.Event()
+        done = object() # marks the end of the generation
+
+        def aux_put(item):
+            # blocks while the buffer is full, unless the consumer stops
+            while not stopped.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def aux_generate_people(factory):
+            if stopped.is_set():
+                return
+            
+            for person in factory.generate_people(people_per_factory, stop_check=stopped.is_set, **generation_args):
+                if not aux_put(person):
+                    return
+
+        def aux_produce():
+            try:
+                with ThreadPoolExecutor(max_workers=max_concurrent_factories) as executor:
+                    futures = []
+                    for factory in TinyPersonFactory.generate_person_factories_iter(number_of_factories, generic_context_text):
+                        if stopped.is_set():
+                            break
+                        futures.append(executor.submit(aux_generate_people, factory))
+                    
+                    for future in futures:
+                        try:
+                            future.result()
+                        except Exception as e:
+                            logger.error(f"Error while generating people: {e}")
+                
+                aux_put(done)
+            
+            except Exception as e:
+                aux_put(e)
+
+        producer = threading.Thread(target=aux_produce, name="population-producer", daemon=True)
+        producer.start()
+
+        try:
+            while True:
+                item = buffer.get()
+                if item is done:
+                    break
+                elif isinstance(item, Exception):
+                    raise item
+                
+                yield item
+        finally:
+            stopped.set()
+            producer.join()
 
     def generate_person(self, agent_particularities:str=None, temperature:float=1.5, attepmpts:int=5):
         """
@@ -159,11 +639,12 @@ class TinyPersonFactory(TinyFactory):
 
         logger.info(f"Starting the person generation based on that context: {self.context_text}")
 
-        prompt = chevron.render(open(self.person_prompt_template_path).read(), {
-            "context": self.context_text,
-            "agent_particularities": agent_particularities,
-            "already_generated": [minibio for minibio in self.generated_minibios]
-        })
+        # personas generated before for the same context are reused, if available
+        person = self._draw_from_library(agent_particularities)
+        if person is not None:
+            return person
+
+        prompt = self._person_prompt(agent_particularities)
 
         def aux_generate():
 
@@ -179,8 +660,9 @@ class TinyPersonFactory(TinyFactory):
 
                 logger.debug(f"Generated person parameters:\n{json.dumps(result, indent=4, sort_keys=True)}")
 
-                # only accept the generated spec if the name is not already in the generated names, because they must be unique.
-                if result["name"].lower() not in self.generated_names:
+                # only accept the generated spec if the name is not already in the generated names, because they must be unique,
+                # and if it is not a near-duplicate of an already generated person.
+                if TinyPersonFactory._is_valid_agent_spec(result) and self._is_new_agent_spec(result):
                     return result
 
             return None # no suitable agent was generated
@@ -196,16 +678,265 @@ class TinyPersonFactory(TinyFactory):
         
         # create the fresh agent
         if agent_spec is not None:
-            # the agent is created here. This is why the present method cannot be cached. Instead, an auxiliary method is used
-            # for the actual model call, so that it gets cached properly without skipping the agent creation.
-            person = TinyPerson(agent_spec["name"])
-            self._setup_agent(person, agent_spec["_configuration"])
-            self.generated_minibios.append(person.minibio())
-            self.generated_names.append(person.get("name").lower())
-            return person
+            return self._create_agent(agent_spec, agent_particularities)
         else:
             logger.error(f"Could not generate an agent after {attepmpts} attempts.")
             return None
+    
+    def generate_people(self, number_of_people:int, agent_particularities:str=None, temperature:float=1.5, attempts:int=5, 
+                        parallelism:int=None, people_per_call:int=1, stop_check=None) -> list:
+        """
+        Generate several TinyPerson instances using OpenAI's LLM. Candidate specifications are requested in concurrent 
+        batches, and only those whose names and mini-biographies are new are accepted, so that prompts need not list 
+        all the agents generated so far.
+
+        Args:
+            number_of_people (int): The number of TinyPerson instances to generate.
+            agent_particularities (str): The particularities of the agents.
+            temperature (float): The temperature to use when sampling from the LLM.
+            attempts (int): The maximum number of candidates requested per agent, on average.
+            parallelism (int, optional): The maximum number of model calls made concurrently. 
+                Defaults to `DEFAULT_PARALLELISM`.
+            people_per_call (int): The number of candidates requested in each model call, as a JSON array. Asking for 
+                several at once saves calls and prompt tokens, since the prompt is the same for all of them. Only the 
+                candidates that are rejected are requested again. Defaults to 1.
+            stop_check (callable, optional): A function returning True if the generation must stop early. It is checked
+                before each batch of model calls.
+
+        Returns:
+            list: The generated TinyPerson instances, which might be fewer than requested if too many candidates were rejected.
+        """
+
+        logger.info(f"Starting the generation of {number_of_people} people based on that context: {self.context_text}")
+
+        if parallelism is None:
+            parallelism = TinyPersonFactory.DEFAULT_PARALLELISM
+        people_per_call = max(1, people_per_call)
+
+        # personas generated before for the same context are reused, if available
+        people = []
+        while len(people) < number_of_people:
+            person = self._draw_from_library(agent_particularities)
+            if person is None:
+                break
+            people.append(person)
+
+        # the new people are added to the library all at once, at the end
+        created = []
+        try:
+            self._generate_people_batches(people, created, number_of_people, agent_particularities, temperature, attempts, 
+                                          parallelism, people_per_call, stop_check)
+        finally:
+            if self.persona_library is not None:
+                self.persona_library.add_many(created, self.context_text, agent_particularities)
+
+        return people
+
+    def _generate_people_batches(self, people:list, created:list, number_of_people:int, agent_particularities:str, 
+                                 temperature:float, attempts:int, parallelism:int, people_per_call:int, stop_check):
+        """
+        Generates people in batches of concurrent model calls, until there are `number_of_people` in `people`. The people 
+        created are appended both to `people` and to `created`.
+        """
+        n_requested = 0
+        while len(people) < number_of_people and n_requested < attempts * number_of_people:
+            if stop_check is not None and stop_check():
+                logger.info(f"Stopped the generation after {len(people)} out of {number_of_people} agents.")
+                return
+            
+            prompt = self._person_prompt(agent_particularities)
+
+            # spread the missing candidates over the calls of this batch
+            n_missing = min(number_of_people - len(people), attempts * number_of_people - n_requested)
+            messages_batch = []
+            candidates_per_call = []
+            while n_missing > 0 and len(messages_batch) < parallelism:
+                n_candidates = min(people_per_call, n_missing)
+                messages_batch.append(TinyPersonFactory._person_generation_messages(prompt, n_requested + 1, n_candidates))
+                candidates_per_call.append(n_candidates)
+                n_requested += n_candidates
+                n_missing -= n_candidates
+
+            messages = self._aux_model_calls(messages_batch=messages_batch, temperature=temperature, max_workers=parallelism)
+
+            # uniqueness is enforced locally, against everything generated so far, including earlier candidates of this batch
+            accepted_specs = []
+            batch_index = PersonaIndex()
+            for message, n_candidates in zip(messages, candidates_per_call):
+                for agent_spec in TinyPersonFactory._parse_agent_specs(message, n_candidates):
+                    if not TinyPersonFactory._is_valid_agent_spec(agent_spec):
+                        logger.debug(f"Rejected invalid agent specification: {agent_spec}")
+                        continue
+
+                    name, configuration = agent_spec["name"], agent_spec["_configuration"]
+                    if not self._is_new_agent_spec(agent_spec) or \
+                       any(spec["name"].lower() == name.lower() for spec in accepted_specs) or \
+                       batch_index.is_near_duplicate(name, configuration):
+                        logger.debug(f"Rejected repeated agent specification: {name}")
+                        continue
+
+                    batch_index.add(name, configuration)
+                    accepted_specs.append(agent_spec)
+            
+            new_people = self._create_agents(accepted_specs[:number_of_people - len(people)], agent_particularities)
+            people += new_people
+            created += new_people
+        
+        if len(people) < number_of_people:
+            logger.error(f"Could only generate {len(people)} out of {number_of_people} agents after requesting {n_requested} candidates.")
+
+    @staticmethod
+    def _person_generation_messages(prompt:str, first_candidate_number:int, n_candidates:int) -> list:
+        if n_candidates == 1:
+            # identical prompts might get identical (e.g., cached) completions, so each candidate is numbered
+            request = f"{prompt}\n\nThis is candidate number {first_candidate_number}."
+        else:
+            request = f"{prompt}\n\n"\
+                      f"However, instead of a single agent, you must now generate {n_candidates} agents at once, following the same "\
+                      f"directions. They must all be different from each other, with different names. Your response must be a JSON array "\
+                      f"with exactly {n_candidates} elements, each one in the format above, and nothing else.\n\n"\
+                      f"These are candidates number {first_candidate_number} to {first_candidate_number + n_candidates - 1}."
+        
+        return [{"role": "system", "content": "You are a system that generates specifications of artificial entities."},
+                {"role": "user", "content": request}]
+
+    @staticmethod
+    def _parse_agent_specs(message:dict, n_candidates:int) -> list:
+        """
+        Parses the agent specifications in a model response, which might be a single specification or an array of them.
+        At most `n_candidates` specifications are returned.
+        """
+        if message is None:
+            return []
+        
+        result = utils.extract_json(message["content"])
+        if isinstance(result, dict):
+            result = [result]
+        elif not isinstance(result, list):
+            return []
+        
+        if len(result) != n_candidates:
+            logger.debug(f"Expected {n_candidates} agent specifications, but got {len(result)}.")
+
+        return result[:n_candidates]
+
+    @staticmethod
+    def _is_valid_agent_spec(agent_spec) -> bool:
+        """
+        Checks whether an agent specification has everything needed to create the agent, that is, a name and a configuration.
+        The same rule applies to all generation methods.
+        """
+        if not isinstance(agent_spec, dict) or not isinstance(agent_spec.get("name"), str) or len(agent_spec["name"].strip()) == 0:
+            return False
+        
+        return isinstance(agent_spec.get("_configuration"), dict)
+
+    def _is_new_agent_spec(self, agent_spec:dict) -> bool:
+        """
+        Checks whether a valid agent specification is neither named after an existing agent nor a near-duplicate of 
+        an agent generated before by this factory.
+        """
+        name = agent_spec["name"]
+        return name.lower() not in self.generated_names and not TinyPerson.has_agent(name) and \
+               not self.persona_index.is_near_duplicate(name, agent_spec["_configuration"])
+
+    def _person_prompt(self, agent_particularities:str=None) -> str:
+        """
+        Renders the person generation prompt, mentioning only the most recently generated agents.
+        """
+        recently_generated = self.generated_minibios[-TinyPersonFactory.MAX_ALREADY_GENERATED_IN_PROMPT:]
+
+        return chevron.render(TinyPersonFactory._read_template(self.person_prompt_template_path), {
+            "context": self.context_text,
+            "agent_particularities": agent_particularities,
+            "already_generated": recently_generated
+        })
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _read_template(path:str) -> str:
+        # templates are read only once
+        with open(path) as f:
+            return f.read()
+
+    def _create_agents(self, agent_specs:list, agent_particularities:str=None) -> list:
+        # the caller adds them to the library, all at once
+        people = [self._create_agent(agent_spec, agent_particularities, add_to_library=False) for agent_spec in agent_specs]
+        return [person for person in people if person is not None]
+
+    def _create_agent(self, agent_spec:dict, agent_particularities:str=None, add_to_library:bool=True) -> TinyPerson:
+        # the agent is created here. This is why generation methods cannot be cached. Instead, auxiliary methods are used
+        # for the actual model calls, so that they get cached properly without skipping the agent creation.
+        with TinyPersonFactory._agent_creation_lock:
+            # factories might be generating people concurrently, so names must be checked again right before creation
+            if TinyPerson.has_agent(agent_spec["name"]):
+                logger.debug(f"Agent {agent_spec['name']} was created meanwhile, skipping it.")
+                return None
+            person = TinyPerson(agent_spec["name"])
+        
+        self._setup_agent(person, agent_spec["_configuration"])
+        self._register_agent(person, agent_spec["_configuration"])
+
+        if add_to_library and self.persona_library is not None:
+            self.persona_library.add(person, self.context_text, agent_particularities)
+
+        return person
+
+    def _draw_from_library(self, agent_particularities:str=None) -> TinyPerson:
+        if self.persona_library is None:
+            return None
+        
+        def aux_accept(name, configuration):
+            return name.lower() not in self.generated_names and not self.persona_index.is_near_duplicate(name, configuration)
+
+        person = self.persona_library.draw(self.context_text, agent_particularities, accept=aux_accept)
+        if person is not None:
+            logger.debug(f"Drew {person.name} from the persona library.")
+            self._register_agent(person, person._configuration)
+        
+        return person
+
+    def _register_agent(self, person:TinyPerson, configuration:dict):
+        """
+        Keeps track of a person created by this factory, so that it is not generated again.
+        """
+        self.generated_minibios.append(person.minibio())
+        self.generated_names.add(person.get("name").lower())
+        self.persona_index.add(person.name, configuration)
+
+    def diversity_metrics(self) -> dict:
+        """
+        Returns diversity metrics of the persons generated so far (see `PersonaIndex.diversity_metrics`).
+        """
+        return self.persona_index.diversity_metrics()
+
+    def encode_complete_state(self) -> dict:
+        """
+        Encodes the complete state of the factory, including its index of generated persons. The persona library, if any, 
+        is kept on disk, so it is not part of the state.
+        """
+        state = {key: copy.deepcopy(value) for key, value in self.__dict__.items() if key not in ["generated_names", "persona_index", "persona_library"]}
+        state["generated_names"] = sorted(self.generated_names)
+        state["persona_index"] = self.persona_index.encode_complete_state()
+        return state
+
+    def decode_complete_state(self, state:dict):
+        """
+        Decodes the complete state of the factory, including its index of generated persons.
+        """
+        state = copy.deepcopy(state)
+        generated_names = state.pop("generated_names", [])
+        persona_index_state = state.pop("persona_index", None)
+
+        self.__dict__.update(state)
+        self.generated_names = set(generated_names)
+        if persona_index_state is not None:
+            self.persona_index = PersonaIndex().decode_complete_state(persona_index_state)
+        else:
+            # older states have no index, so only names remain unique
+            self.persona_index = PersonaIndex()
+        
+        return self
         
     
     @transactional
@@ -217,16 +948,28 @@ class TinyPersonFactory(TinyFactory):
         """
         return openai_utils.client().send_message(messages, temperature=temperature)
     
+    @transactional
+    def _aux_model_calls(self, messages_batch, temperature, max_workers):
+        """
+        Auxiliary method to make several model calls concurrently, within a single transaction, so that the whole 
+        batch is cached as one event.
+        """
+        def aux_call(messages):
+            try:
+                return openai_utils.client().send_message(messages, temperature=temperature)
+            except Exception as e:
+                logger.error(f"Error while calling the model: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(aux_call, messages_batch))
+    
     @transactional
     def _setup_agent(self, agent, configuration):
         """
         Sets up the agent with the necessary elements.
         """
-        for key, value in configuration.items():
-            if isinstance(value, list):
-                agent.define_several(key, value)
-            else:
-                agent.define(key, value)
+        agent.define_many(configuration)
         
         # does not return anything, as we don't want to cache the agent object itself.
     
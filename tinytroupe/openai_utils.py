@@ -6,6 +6,8 @@ import json
 import pickle
 import logging
 import configparser
+import contextlib
+import threading
 import tiktoken
 from tinytroupe import utils
 from tinytroupe.utils import compose_prompt_for_api # Added import to allow for Ollama usage
@@ -219,7 +221,8 @@ class OpenAIClient:
                     logger.info(f"Waiting {waiting_time} seconds before next API request (to avoid throttling)...")
                     time.sleep(waiting_time)
                     
-                    response = self._raw_model_call(model, chat_api_params)
+                    with concurrency_slot():
+                        response = self._raw_model_call(model, chat_api_params)
                     if self.cache_api_calls:
                         self.api_cache[cache_key] = response
                         self._save_cache()
@@ -613,11 +616,12 @@ class OllamaClient:
         logger.debug(f"Payload: {payload}")
 
         try:
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout
-            )
+            with concurrency_slot():
+                response = requests.post(
+                    url,
+                    json=payload,
+                    timeout=self.timeout
+                )
             response.raise_for_status()
             
             response_json = response.json()
@@ -768,6 +772,83 @@ def force_default_value(key, value):
     else:
         raise ValueError(f"Key {key} is not a valid configuration key.")
 
+###########################################################################
+# Concurrency control
+#
+# Several simulations (threads or worker processes) may share the same
+# model backend, notably a single local Ollama server. To avoid flooding it,
+# the number of model calls in flight can be bounded by a shared semaphore.
+###########################################################################
+_concurrency_limiter = None
+
+def set_concurrency_limiter(limiter):
+    """
+    Sets the semaphore-like object used to bound the number of concurrent model calls. Any object
+    supporting the context manager protocol works, e.g., a `threading.BoundedSemaphore` or a
+    `multiprocessing.Manager().BoundedSemaphore()` proxy shared among worker processes.
+
+    Args:
+    limiter: The limiter to use, or None to remove any limit.
+    """
+    global _concurrency_limiter
+    _concurrency_limiter = limiter
+
+def force_max_concurrent_calls(max_concurrent_calls):
+    """
+    Bounds the number of concurrent model calls within the current process.
+
+    Args:
+    max_concurrent_calls (int): The maximum number of concurrent calls, or None to remove any limit.
+    """
+    if max_concurrent_calls is None:
+        set_concurrency_limiter(None)
+    else:
+        set_concurrency_limiter(threading.BoundedSemaphore(max_concurrent_calls))
+
+def concurrency_slot():
+    """
+    Returns a context manager that holds one model call slot while it is active. If no limiter
+    is configured, the context manager does nothing.
+    """
+    if _concurrency_limiter is None:
+        return contextlib.nullcontext()
+    else:
+        return _concurrency_limiter
+
+###########################################################################
+# Token counting
+#
+# Used to keep prompts within a token budget. The tokenizer of the actual
+# model is not always available (e.g., local models, or no network access
+# to download tiktoken encodings), so counts are an estimate in that case.
+###########################################################################
+_token_encoding = None
+_token_encoding_unavailable = False
+
+# average number of characters per token, used when no tokenizer is available
+APPROXIMATE_CHARS_PER_TOKEN = 4
+
+def count_tokens(text:str) -> int:
+    """
+    Counts (or estimates, if no tokenizer can be loaded) the number of tokens in the given text.
+
+    Args:
+    text (str): The text to count tokens in.
+    """
+    global _token_encoding, _token_encoding_unavailable
+
+    if _token_encoding is None and not _token_encoding_unavailable:
+        try:
+            _token_encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.debug(f"Token count: could not load the tiktoken encoding ({e}). Estimating from text length.")
+            _token_encoding_unavailable = True
+    
+    if _token_encoding is not None:
+        return len(_token_encoding.encode(text, disallowed_special=()))
+    else:
+        return (len(text) + APPROXIMATE_CHARS_PER_TOKEN - 1) // APPROXIMATE_CHARS_PER_TOKEN
+
 # default client
 register_client("openai", OpenAIClient())
 register_client("azure", AzureClient())
@@ -3,6 +3,7 @@ General utilities and convenience functions.
 """
 import re
 import json
+import math
 import os
 import sys
 import hashlib
@@ -10,7 +11,11 @@ import textwrap
 import logging
 import chevron
 import copy
+import weakref
+import threading
+import contextlib
 from typing import Collection
+from collections.abc import Mapping, MutableMapping
 from datetime import datetime
 from pathlib import Path
 import configparser
@@ -20,6 +25,28 @@ AgentOrWorld = Union["TinyPerson", "TinyWorld"]
 # logger
 logger = logging.getLogger("tinytroupe")
 
+# Optional serialization backends. If they are not installed, the standard library is used instead.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard as zstd
+except ImportError:
+    try:
+        from compression import zstd # Python 3.14+
+    except ImportError:
+        try:
+            from backports import zstd
+        except ImportError:
+            zstd = None
+
 
 ################################################################################
 # Model input utilities
@@ -357,6 +384,244 @@ def start_logger(config: configparser.ConfigParser):
     # add ch to logger
     logger.addHandler(ch)
 
+################################################################################
+# Serialization
+################################################################################
+
+# File extensions that select the binary format, instead of JSON.
+MSGPACK_FILE_EXTENSION = ".msgpack"
+MSGPACK_ZSTD_FILE_EXTENSION = ".msgpack.zst"
+
+# To find integers that might not fit in 64 bits, that is, runs of 19 or more digits, quickly: digits are mapped to "0" 
+# and anything else to " ", so that runs are found with a plain substring search.
+_DIGIT_RUN_TRANSLATION = bytes(ord("0") if chr(code).isdigit() and code < 128 else ord(" ") for code in range(256))
+_LARGE_JSON_INTEGER_DIGITS = b"0" * 19
+
+def json_backend() -> str:
+    """
+    Returns the name of the JSON library used to read and write files: "orjson" if available, "json" otherwise.
+    """
+    return "orjson" if orjson is not None else "json"
+
+def write_serialized_file(obj, file_path: str, indent: bool = True) -> None:
+    """
+    Writes the specified object to a file. The format is chosen according to the file extension: 
+    `.msgpack` for MessagePack, `.msgpack.zst` for zstd-compressed MessagePack, and JSON for anything else.
+    Compact JSON is written with orjson if available, which is several times faster than the standard library.
+
+    Args:
+        obj: The object to write. It must be JSON-serializable.
+        file_path (str): The path of the file to write.
+        indent (bool): Whether to indent JSON output for readability. Compact output is faster to write and read.
+    """
+    with open(file_path, 'wb') as f:
+        f.write(serialize(obj, serialization_format_for(file_path), indent=indent))
+
+def read_serialized_file(file_path: str):
+    """
+    Reads an object from a file written by `write_serialized_file`, or from any JSON file.
+    """
+    with open(file_path, 'rb') as f:
+        return deserialize(f.read(), serialization_format_for(file_path))
+
+def serialize(obj, format: str = "json", indent: bool = False) -> bytes:
+    """
+    Serializes the specified object to bytes in the given format ("json", "msgpack" or "msgpack+zstd").
+    Indented JSON is meant for people to read, and is written with the standard library, as always. Compact JSON is 
+    written with orjson if available, unless the object holds anything that orjson would write differently from the 
+    standard library (e.g., NaN, or types that are not JSON types), so the output does not depend on the library.
+    """
+    if format == "json":
+        if indent:
+            return json.dumps(obj, indent=4).encode("utf-8")
+
+        if orjson is not None and _is_plain_json(obj):
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                # e.g., integers beyond 64 bits, which the standard library supports
+                pass
+
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    elif format in ["msgpack", "msgpack+zstd"]:
+        data = _require_serialization_module(msgpack, "msgpack").packb(obj, use_bin_type=True)
+        if format == "msgpack+zstd":
+            data = _require_serialization_module(zstd, "zstandard").compress(data)
+        return data
+
+    else:
+        raise ValueError(f"Unsupported serialization format: {format}.")
+
+def deserialize(data: bytes, format: str = "json"):
+    """
+    Deserializes an object from bytes in the given format ("json", "msgpack" or "msgpack+zstd").
+    """
+    if format == "json":
+        # orjson silently reads integers beyond 64 bits as floats, so the standard library is used for those
+        if orjson is not None and not _has_large_json_integer(data):
+            return orjson.loads(data)
+        return json.loads(data)
+
+    elif format in ["msgpack", "msgpack+zstd"]:
+        if format == "msgpack+zstd":
+            data = _require_serialization_module(zstd, "zstandard").decompress(data)
+        return _require_serialization_module(msgpack, "msgpack").unpackb(data, raw=False, strict_map_key=False)
+
+    else:
+        raise ValueError(f"Unsupported serialization format: {format}.")
+
+def serialization_format_for(file_path: str) -> str:
+    """
+    Returns the serialization format ("json", "msgpack" or "msgpack+zstd") implied by the extension of the specified file.
+    """
+    if file_path.endswith(MSGPACK_ZSTD_FILE_EXTENSION):
+        return "msgpack+zstd"
+    elif file_path.endswith(MSGPACK_FILE_EXTENSION):
+        return "msgpack"
+    else:
+        return "json"
+
+_PLAIN_JSON_SCALAR_TYPES = frozenset([str, int, bool, type(None)])
+_PLAIN_JSON_TYPES = _PLAIN_JSON_SCALAR_TYPES | {float, dict, list, tuple}
+
+def _is_plain_json(obj) -> bool:
+    """
+    Checks whether the object is made only of the exact JSON types, with finite floats and scalar keys, which orjson 
+    and the standard library write alike. Types are collected per container, so that containers of scalars only 
+    (e.g., most memory entries) are checked without iterating over them in Python.
+    """
+    stack = [obj]
+    while stack:
+        value = stack.pop()
+        value_type = type(value)
+        if value_type is dict:
+            if not _PLAIN_JSON_SCALAR_TYPES.issuperset(map(type, value)):
+                return False
+            items = value.values()
+        elif value_type is list or value_type is tuple:
+            items = value
+        elif value_type is float:
+            if not math.isfinite(value):
+                return False
+            continue
+        elif value_type in _PLAIN_JSON_SCALAR_TYPES:
+            continue
+        else:
+            return False
+        
+        item_types = set(map(type, items))
+        if item_types <= _PLAIN_JSON_SCALAR_TYPES:
+            continue
+        elif not item_types <= _PLAIN_JSON_TYPES:
+            return False
+        stack.extend(items)
+    
+    return True
+
+def _has_large_json_integer(data: bytes) -> bool:
+    digits = data.translate(_DIGIT_RUN_TRANSLATION)
+    start = digits.find(_LARGE_JSON_INTEGER_DIGITS)
+    while start != -1:
+        end = digits.find(b" ", start)
+        if end == -1:
+            end = len(digits)
+
+        # long digit runs are common within strings (e.g., hex digests), so a run is only taken for an integer where a 
+        # JSON value can be: after a colon, a comma or a bracket, and before a comma or a closing bracket. When in doubt 
+        # (e.g., too much whitespace around), it is taken for an integer, which is always safe.
+        before = data[max(0, start - 1024):start]
+        if before.endswith(b"-"):
+            before = before[:-1]
+        before = before.rstrip()
+        after = data[end:end + 1024].lstrip()
+        if before[-1:] in b":,[" and after[:1] in b",]}":
+            return True
+        
+        start = digits.find(_LARGE_JSON_INTEGER_DIGITS, end)
+    
+    return False
+
+def _require_serialization_module(module, package_name: str):
+    if module is None:
+        raise ImportError(f"The '{package_name}' package is required for this serialization format. Please install it, or use a JSON file instead.")
+    return module
+
+_IMMUTABLE_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+def copy_json_structure(value):
+    """
+    Copies a JSON-like structure in a single pass. Dicts, lists and tuples are copied, while immutable scalars are
+    shared with the original, since they can't change anyway. Other mappings are copied as dicts, and anything else 
+    falls back to `copy.deepcopy`.
+    This is much cheaper than `copy.deepcopy` for large states (e.g., long memories), as no memo needs to be kept.
+    The structure must not contain cycles, which is always the case for JSON-serializable states.
+    """
+    value_type = type(value)
+    if value_type in _IMMUTABLE_SCALAR_TYPES:
+        return value
+    # scalar items are checked inline, since they are the vast majority and function calls are comparatively expensive
+    elif value_type is dict or value_type is ReadOnlyDict:
+        return {k: v if type(v) in _IMMUTABLE_SCALAR_TYPES else copy_json_structure(v) for k, v in value.items()}
+    elif value_type is list or value_type is ReadOnlyList:
+        return [v if type(v) in _IMMUTABLE_SCALAR_TYPES else copy_json_structure(v) for v in value]
+    elif value_type is tuple:
+        return tuple(copy_json_structure(v) for v in value)
+    elif isinstance(value, Mapping):
+        # other read-only mappings (e.g., compact records) become plain dicts
+        return {k: copy_json_structure(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        # and so do other lists (e.g., read-only ones)
+        return [copy_json_structure(v) for v in value]
+    else:
+        return copy.deepcopy(value)
+
+def freeze_json_structure(value):
+    """
+    Returns a read-only copy of a JSON-like structure, where dicts and lists are replaced by `ReadOnlyDict` and 
+    `ReadOnlyList` instances. These still are dicts and lists for readers (and JSON encoders), but can't be modified,
+    so the structure can be safely shared. Anything else is copied as in `copy_json_structure`.
+    """
+    value_type = type(value)
+    if value_type in _IMMUTABLE_SCALAR_TYPES or value_type is ReadOnlyDict or value_type is ReadOnlyList:
+        return value
+    # as in `copy_json_structure`, scalar items are checked inline
+    elif value_type is dict or isinstance(value, Mapping):
+        return ReadOnlyDict({k: v if type(v) in _IMMUTABLE_SCALAR_TYPES else freeze_json_structure(v) for k, v in value.items()})
+    elif value_type is list or isinstance(value, list):
+        return ReadOnlyList([v if type(v) in _IMMUTABLE_SCALAR_TYPES else freeze_json_structure(v) for v in value])
+    elif value_type is tuple:
+        return tuple(freeze_json_structure(v) for v in value)
+    else:
+        return copy_json_structure(value)
+
+def _raise_read_only(self, *args, **kwargs):
+    raise TypeError(f"'{type(self).__name__}' object is read-only.")
+
+class ReadOnlyDict(dict):
+    """
+    A dict that can't be modified. See `freeze_json_structure`. Copies are regular dicts.
+    """
+    __slots__ = []
+
+    __setitem__ = __delitem__ = __ior__ = _raise_read_only
+    clear = pop = popitem = setdefault = update = _raise_read_only
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+class ReadOnlyList(list):
+    """
+    A list that can't be modified. See `freeze_json_structure`. Copies are regular lists.
+    """
+    __slots__ = []
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _raise_read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _raise_read_only
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
 class JsonSerializableRegistry:
     """
     A mixin class that provides JSON serialization, deserialization, and subclass registration.
@@ -373,40 +638,24 @@ class JsonSerializableRegistry:
             suppress (list, optional): Attributes to suppress from the serialization.
             file_path (str, optional): Path to a file where the JSON will be written.
         """
-        # Gather all serializable attributes from the class hierarchy
-        serializable_attrs = set()
-        suppress_attrs = set()
-        for cls in self.__class__.__mro__:
-            if hasattr(cls, 'serializable_attributes') and isinstance(cls.serializable_attributes, list):
-                serializable_attrs.update(cls.serializable_attributes)
-            if hasattr(cls, 'suppress_attributes_from_serialization') and isinstance(cls.suppress_attributes_from_serialization, list):
-                suppress_attrs.update(cls.suppress_attributes_from_serialization)
+        serializable_attrs, suppress_attrs, _ = self.__class__._serialization_plan()
         
         # Override attributes with method parameters if provided
         if include:
             serializable_attrs = set(include)
         if suppress:
-            suppress_attrs.update(suppress)
+            suppress_attrs = suppress_attrs.union(suppress)
         
         result = {"json_serializable_class_name": self.__class__.__name__}
-        for attr in serializable_attrs if serializable_attrs else self.__dict__:
+        for attr in serializable_attrs if serializable_attrs else list(self.__dict__):
             if attr not in suppress_attrs:
-                value = getattr(self, attr, None)
-                if isinstance(value, JsonSerializableRegistry):
-                    result[attr] = value.to_json()
-                elif isinstance(value, list):
-                    result[attr] = [item.to_json() if isinstance(item, JsonSerializableRegistry) else copy.deepcopy(item) for item in value]
-                elif isinstance(value, dict):
-                    result[attr] = {k: v.to_json() if isinstance(v, JsonSerializableRegistry) else copy.deepcopy(v) for k, v in value.items()}
-                else:
-                    result[attr] = copy.deepcopy(value)
+                result[attr] = JsonSerializableRegistry._encode_value(getattr(self, attr, None))
         
         if file_path:
             # Create directories if they do not exist
             import os
             os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, 'w') as f:
-                json.dump(result, f, indent=4)
+            write_serialized_file(result, file_path)
         
         return result
 
@@ -423,8 +672,7 @@ class JsonSerializableRegistry:
             An instance of the class populated with the data from json_dict_or_path.
         """
         if isinstance(json_dict_or_path, str):
-            with open(json_dict_or_path, 'r') as f:
-                json_dict = json.load(f)
+            json_dict = read_serialized_file(json_dict_or_path)
         else:
             json_dict = json_dict_or_path
         
@@ -432,17 +680,9 @@ class JsonSerializableRegistry:
         target_class = cls.class_mapping.get(subclass_name, cls)
         instance = target_class.__new__(target_class)  # Create an instance without calling __init__
         
-        # Gather all serializable attributes from the class hierarchy
-        serializable_attrs = set()
-        custom_serialization_initializers = {}
-        suppress_attrs = set(suppress) if suppress else set()
-        for cls in target_class.__mro__:
-            if hasattr(cls, 'serializable_attributes') and isinstance(cls.serializable_attributes, list):
-                serializable_attrs.update(cls.serializable_attributes)
-            if hasattr(cls, 'custom_serialization_initializers') and isinstance(cls.custom_serialization_initializers, dict):
-                custom_serialization_initializers.update(cls.custom_serialization_initializers)
-            if hasattr(cls, 'suppress_attributes_from_serialization') and isinstance(cls.suppress_attributes_from_serialization, list):
-                suppress_attrs.update(cls.suppress_attributes_from_serialization)
+        serializable_attrs, suppress_attrs, custom_serialization_initializers = target_class._serialization_plan()
+        if suppress:
+            suppress_attrs = suppress_attrs.union(suppress)
         
         # Assign values only for serializable attributes if specified, otherwise assign everything
         for key in serializable_attrs if serializable_attrs else json_dict:
@@ -461,10 +701,10 @@ class JsonSerializableRegistry:
                         if isinstance(item, dict) and 'json_serializable_class_name' in item:
                             deserialized_collection.append(JsonSerializableRegistry.from_json(item))
                         else:
-                            deserialized_collection.append(copy.deepcopy(item))
+                            deserialized_collection.append(copy_json_structure(item))
                     setattr(instance, key, deserialized_collection)
                 else:
-                    setattr(instance, key, copy.deepcopy(value))
+                    setattr(instance, key, copy_json_structure(value))
         
         # Call post-deserialization initialization if available
         if hasattr(instance, '_post_deserialization_init') and callable(instance._post_deserialization_init):
@@ -496,6 +736,54 @@ class JsonSerializableRegistry:
                     base_initializers.update(cls.custom_serialization_initializers)
                     cls.custom_serialization_initializers = base_initializers
 
+        # Attributes are now final, so the serialization plan can be computed once and for all
+        cls._compiled_serialization_plan = cls._compile_serialization_plan()
+
+    @classmethod
+    def _serialization_plan(cls) -> tuple:
+        """
+        Returns the (serializable attributes, suppressed attributes, custom initializers) of the class.
+        """
+        plan = cls.__dict__.get("_compiled_serialization_plan")
+        if plan is None:
+            # e.g., JsonSerializableRegistry itself, which is not a subclass of itself
+            plan = cls._compile_serialization_plan()
+            cls._compiled_serialization_plan = plan
+        return plan
+
+    @classmethod
+    def _compile_serialization_plan(cls) -> tuple:
+        # Gather all serializable attributes from the class hierarchy
+        serializable_attrs = {}
+        suppress_attrs = set()
+        custom_serialization_initializers = {}
+        for klass in cls.__mro__:
+            if hasattr(klass, 'serializable_attributes') and isinstance(klass.serializable_attributes, list):
+                serializable_attrs.update(dict.fromkeys(klass.serializable_attributes))
+            if hasattr(klass, 'custom_serialization_initializers') and isinstance(klass.custom_serialization_initializers, dict):
+                custom_serialization_initializers.update(klass.custom_serialization_initializers)
+            if hasattr(klass, 'suppress_attributes_from_serialization') and isinstance(klass.suppress_attributes_from_serialization, list):
+                suppress_attrs.update(klass.suppress_attributes_from_serialization)
+        
+        return tuple(serializable_attrs), frozenset(suppress_attrs), custom_serialization_initializers
+
+    @staticmethod
+    def _encode_value(value):
+        """
+        Encodes an attribute value. Immutable values are used as they are, and JSON-like containers are copied
+        in a single pass (see `copy_json_structure`).
+        """
+        if type(value) in _IMMUTABLE_SCALAR_TYPES:
+            return value
+        elif isinstance(value, JsonSerializableRegistry):
+            return value.to_json()
+        elif isinstance(value, list):
+            return [item.to_json() if isinstance(item, JsonSerializableRegistry) else copy_json_structure(item) for item in value]
+        elif isinstance(value, dict):
+            return {k: v.to_json() if isinstance(v, JsonSerializableRegistry) else copy_json_structure(v) for k, v in value.items()}
+        else:
+            return copy_json_structure(value)
+
     def _post_deserialization_init(self, **kwargs):
         # if there's a _post_init method, call it after deserialization
         if hasattr(self, '_post_init'):
@@ -517,6 +805,111 @@ def post_init(cls):
     cls.__init__ = new_init
     return cls
 
+class ObjectRegistry(MutableMapping):
+    """
+    A registry of named objects (e.g., all agents or all environments), which can be used just like a dict.
+
+    Objects can be referenced either strongly (the default) or weakly, in which case an object is dropped from the
+    registry as soon as nothing else references it, freeing its name. Lifecycles can also be managed explicitly
+    with `scope()`, which unregisters all objects registered within it upon exit.
+    """
+
+    def __init__(self, weak: bool = False):
+        self._objects = weakref.WeakValueDictionary() if weak else {}
+        self._scopes = []
+        self._lock = threading.RLock()
+
+    @property
+    def weak(self) -> bool:
+        return isinstance(self._objects, weakref.WeakValueDictionary)
+
+    @weak.setter
+    def weak(self, value: bool):
+        with self._lock:
+            if value != self.weak:
+                objects = self._objects
+                self._objects = weakref.WeakValueDictionary() if value else {}
+                self._objects.update(objects)
+
+    def register(self, name: str, obj) -> bool:
+        """
+        Registers an object under the specified name, unless the name is already in use.
+
+        Returns:
+            bool: True if the object was registered, False if the name is already in use.
+        """
+        with self._lock:
+            if name in self._objects:
+                return False
+
+            self._objects[name] = obj
+            for scope in self._scopes:
+                scope[name] = obj
+            return True
+
+    def unregister(self, name: str, obj=None):
+        """
+        Unregisters the object with the specified name, if any. If an object is given, it is only unregistered
+        if it is still the one registered under that name.
+        """
+        with self._lock:
+            if obj is None or self._objects.get(name) is obj:
+                self._objects.pop(name, None)
+
+    @contextlib.contextmanager
+    def scope(self):
+        """
+        A context manager that unregisters all objects registered within it upon exit, so that they can be
+        garbage collected and their names reused. Scopes can be nested.
+        """
+        # scoped objects are kept weakly, so that scopes themselves don't keep anything alive
+        scoped = weakref.WeakValueDictionary()
+        with self._lock:
+            self._scopes.append(scoped)
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._scopes.remove(scoped)
+                for name, obj in list(scoped.items()):
+                    self.unregister(name, obj)
+
+    def __getitem__(self, name):
+        return self._objects[name]
+
+    def __setitem__(self, name, obj):
+        with self._lock:
+            self._objects[name] = obj
+            for scope in self._scopes:
+                scope[name] = obj
+
+    def __delitem__(self, name):
+        with self._lock:
+            del self._objects[name]
+
+    def __contains__(self, name):
+        return name in self._objects
+
+    def __iter__(self):
+        # iterates over a snapshot, since weakly referenced objects might vanish at any time
+        return iter(list(self._objects.keys()))
+
+    def __len__(self):
+        return len(self._objects)
+
+    def values(self):
+        return list(self._objects.values())
+
+    def items(self):
+        return list(self._objects.items())
+
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self._objects.items())!r}, weak={self.weak})"
+
 ################################################################################
 # Other
 ################################################################################